@@ -1,20 +1,121 @@
 """
 Sistema de backup automático para banco de dados SQLite
 Implementa backup diário com retenção de backups antigos
+
+O backup copia o banco em passos (BACKUP_PAGES_PER_STEP páginas, com
+pausa entre eles) e grava o resultado comprimido em gzip, com o sha256
+do arquivo nos metadados. Em modo WAL a cópia mantém uma transação de
+leitura aberta: o snapshot fica consistente e as escritas seguem
+normalmente, mas os checkpoints não avançam até o fim da cópia e o
+arquivo -wal cresce com tudo o que for escrito nesse intervalo (o espaço
+é reaproveitado a partir do primeiro checkpoint depois do backup, mas o
+arquivo não encolhe). No modo rollback journal as escritas entram entre os passos,
+mas cada uma reinicia a cópia; depois de BACKUP_MAX_RESTARTS reinícios
+o restante é copiado de uma vez.
 """
 
 import os
-import shutil
+import gzip
+import hashlib
 import sqlite3
+import threading
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
 import json
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 
 logger = logging.getLogger('racket_hero.backup')
 
+# Páginas copiadas por passo (4 MiB com páginas de 4 KiB) e pausa entre passos
+BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '1024'))
+BACKUP_STEP_SLEEP_MS = float(os.getenv('BACKUP_STEP_SLEEP_MS', '10'))
+# Reinícios tolerados (escritas durante a cópia sem WAL) antes de copiar de uma vez
+BACKUP_MAX_RESTARTS = int(os.getenv('BACKUP_MAX_RESTARTS', '5'))
+# Compressão gzip do arquivo final (0 grava o .db sem comprimir)
+BACKUP_COMPRESS = os.getenv('BACKUP_COMPRESS', '1').lower() not in ('0', 'false', 'no')
+BACKUP_GZIP_LEVEL = int(os.getenv('BACKUP_GZIP_LEVEL', '3'))
+
+_CHUNK_SIZE = 1024 * 1024
+_BACKUP_PATTERNS = ('backup_*.db', 'backup_*.db.gz')
+
+
+class _TooManyRestarts(Exception):
+    """Cópia em passos reiniciada demais (interrompe o backup() do sqlite3)"""
+
+
+class BackupProgress:
+    """
+    Andamento do backup em curso neste processo (um por vez na prática:
+    agendamento diário e endpoint manual), para o endpoint de progresso.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {'running': False}
+    
+    def update(self, **fields):
+        with self._lock:
+            self._state.update(fields)
+            return dict(self._state)
+    
+    def start(self, filename: str) -> dict:
+        with self._lock:
+            self._state = {
+                'running': True,
+                'filename': filename,
+                'phase': 'copy',
+                'percent': 0.0,
+                'pages_done': 0,
+                'pages_total': None,
+                'bytes_done': 0,
+                'bytes_total': None,
+                'restarts': 0,
+                'started': datetime.now().isoformat(),
+            }
+            return dict(self._state)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._state)
+
+
+backup_progress = BackupProgress()
+
+
+def _metadata_path(backup_path: Path) -> Path:
+    """backup_X.db e backup_X.db.gz guardam os metadados em backup_X.json"""
+    name = backup_path.name[:-3] if backup_path.name.endswith('.gz') else backup_path.name
+    return backup_path.with_name(name).with_suffix('.json')
+
+
+def file_sha256(path: Path) -> str:
+    """sha256 de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashingWriter:
+    """Arquivo de saída que calcula o sha256 do que é gravado (o .gz final)"""
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+    
+    def flush(self):
+        self.raw.flush()
+
 
 class BackupManager:
     """Gerenciar backups do banco de dados"""
@@ -45,21 +146,29 @@ class BackupManager:
         
         logger.info(f"BackupManager inicializado: {backup_dir}")
     
-    def create_backup(self, tag: str = None) -> Tuple[bool, str]:
+    def create_backup(
+        self,
+        tag: str = None,
+        progress: Optional[Callable[[dict], None]] = None
+    ) -> Tuple[bool, str]:
         """
         Criar backup do banco de dados
         
         Args:
             tag: Tag opcional para identificar o backup
+            progress: Chamada a cada passo com o andamento (fase, percentual, páginas/bytes)
         
         Returns:
             Tupla (sucesso, mensagem)
         """
+        snapshot_path = compressed_path = None
         try:
             # Gerar nome do arquivo
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             tag_str = f'_{tag}' if tag else ''
             backup_filename = f'backup_{timestamp}{tag_str}.db'
+            if BACKUP_COMPRESS:
+                backup_filename += '.gz'
             backup_path = self.backup_dir / backup_filename
             
             # Verificar se arquivo de banco existe
@@ -68,31 +177,56 @@ class BackupManager:
                 logger.error(msg)
                 return False, msg
             
-            # Criar backup usando sqlite3
-            connection = sqlite3.connect(self.db_path)
+            started = time.perf_counter()
+            report = self._progress_reporter(backup_filename, progress)
+            
+            # Cópia consistente em passos para um arquivo temporário
+            snapshot_path = self.backup_dir / f'.{backup_filename}.partial'
+            pages, restarts = self._stepped_copy(self.db_path, snapshot_path, report)
+            uncompressed_size = snapshot_path.stat().st_size
             
-            # Modo de backup seguro
-            backup_connection = sqlite3.connect(str(backup_path))
-            with backup_connection:
-                connection.backup(backup_connection)
+            # Comprimir em streaming (ou só mover) calculando o sha256 do arquivo final
+            # (o arquivo só aparece com o nome final depois de completo)
+            if BACKUP_COMPRESS:
+                compressed_path = self.backup_dir / f'.{backup_filename}.compressing'
+                checksum = self._compress(snapshot_path, compressed_path, report)
+                compressed_path.replace(backup_path)
+            else:
+                snapshot_path.replace(backup_path)
+                checksum = file_sha256(backup_path)
             
-            backup_connection.close()
-            connection.close()
+            duration = time.perf_counter() - started
+            report(phase='done', percent=100.0, running=False)
             
             # Registrar metadados
-            self._save_backup_metadata(backup_path)
+            self._save_backup_metadata(backup_path, {
+                'sha256': checksum,
+                'compressed': BACKUP_COMPRESS,
+                'uncompressed_size': uncompressed_size,
+                'pages': pages,
+                'restarts': restarts,
+                'duration_seconds': round(duration, 2),
+            })
             
             # Limpar backups antigos
             self._cleanup_old_backups()
             
             msg = f"Backup criado com sucesso: {backup_filename}"
-            logger.info(msg)
+            logger.info(
+                f"{msg} ({uncompressed_size / 2**20:.1f} MB -> "
+                f"{backup_path.stat().st_size / 2**20:.1f} MB em {duration:.1f}s, {restarts} reinícios)"
+            )
             return True, msg
         
         except Exception as e:
             msg = f"Erro ao criar backup: {str(e)}"
             logger.error(msg)
+            backup_progress.update(running=False, phase='failed', error=str(e))
             return False, msg
+        finally:
+            for temporary in (snapshot_path, compressed_path):
+                if temporary is not None and temporary.exists():
+                    temporary.unlink()
     
     def restore_backup(self, backup_filename: str) -> Tuple[bool, str]:
         """
@@ -112,14 +246,32 @@ class BackupManager:
                 logger.error(msg)
                 return False, msg
             
+            # Conferir o sha256 gravado nos metadados antes de tocar no banco
+            ok, msg = self.verify_backup(backup_filename)
+            if not ok:
+                logger.error(msg)
+                return False, msg
+            
             # Criar backup do DB atual antes de restaurar
             current_backup = self.backup_dir / f'pre_restore_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
             if Path(self.db_path).exists():
-                shutil.copy(self.db_path, current_backup)
+                self._sqlite_copy(self.db_path, str(current_backup))
                 logger.info(f"Backup pré-restauração criado: {current_backup.name}")
             
-            # Restaurar
-            shutil.copy(backup_path, self.db_path)
+            # Restaurar pela API de backup (copiar o arquivo por cima de um
+            # banco em modo WAL deixaria o -wal antigo ser reaplicado)
+            if backup_path.name.endswith('.gz'):
+                restored = self.backup_dir / f'.{backup_filename}.restore'
+                try:
+                    with gzip.open(backup_path, 'rb') as src, open(restored, 'wb') as dst:
+                        for chunk in iter(lambda: src.read(_CHUNK_SIZE), b''):
+                            dst.write(chunk)
+                    self._sqlite_copy(str(restored), self.db_path)
+                finally:
+                    if restored.exists():
+                        restored.unlink()
+            else:
+                self._sqlite_copy(str(backup_path), self.db_path)
             
             msg = f"Banco restaurado com sucesso de: {backup_filename}"
             logger.info(msg)
@@ -130,6 +282,32 @@ class BackupManager:
             logger.error(msg)
             return False, msg
     
+    def verify_backup(self, backup_filename: str) -> Tuple[bool, str]:
+        """
+        Conferir o sha256 do arquivo com o registrado nos metadados
+        
+        Args:
+            backup_filename: Nome do arquivo de backup
+        
+        Returns:
+            Tupla (íntegro, mensagem); backups antigos sem sha256 passam
+        """
+        backup_path = self.backup_dir / backup_filename
+        metadata_file = _metadata_path(backup_path)
+        expected = None
+        if metadata_file.exists():
+            try:
+                with open(metadata_file, 'r') as f:
+                    expected = json.load(f).get('sha256')
+            except Exception as e:
+                logger.warning(f"Erro ao ler metadados de {backup_filename}: {str(e)}")
+        if not expected:
+            return True, f"Backup sem sha256 registrado: {backup_filename}"
+        actual = file_sha256(backup_path)
+        if actual != expected:
+            return False, f"Checksum não confere para {backup_filename}: esperado {expected}, obtido {actual}"
+        return True, f"Checksum conferido: {backup_filename}"
+    
     def list_backups(self) -> List[dict]:
         """
         Listar todos os backups disponíveis
@@ -139,8 +317,8 @@ class BackupManager:
         """
         backups = []
         
-        for backup_file in sorted(self.backup_dir.glob('backup_*.db'), reverse=True):
-            metadata_file = backup_file.with_suffix('.json')
+        for backup_file in sorted(self._backup_files(), key=lambda p: p.name, reverse=True):
+            metadata_file = _metadata_path(backup_file)
             
             info = {
                 'filename': backup_file.name,
@@ -185,7 +363,7 @@ class BackupManager:
             backup_path.unlink()
             
             # Deletar metadados também
-            metadata_file = backup_path.with_suffix('.json')
+            metadata_file = _metadata_path(backup_path)
             if metadata_file.exists():
                 metadata_file.unlink()
             
@@ -198,8 +376,122 @@ class BackupManager:
             logger.error(msg)
             return False, msg
     
-    def _save_backup_metadata(self, backup_path: Path):
-        """Salvar metadados do backup em JSON"""
+    def _backup_files(self) -> List[Path]:
+        """Backups no diretório (comprimidos ou não)"""
+        return [path for pattern in _BACKUP_PATTERNS for path in self.backup_dir.glob(pattern)]
+    
+    @staticmethod
+    def _progress_reporter(filename: str, progress: Optional[Callable[[dict], None]]):
+        """Atualizar backup_progress, o callback e o log (a cada 10%)"""
+        backup_progress.start(filename)
+        logged = {'copy': -1, 'compress': -1}
+        
+        def report(**fields):
+            state = backup_progress.update(**fields)
+            phase = state.get('phase')
+            decile = int(state.get('percent', 0) // 10)
+            if phase in logged and decile > logged[phase]:
+                logged[phase] = decile
+                logger.info(f"Backup {filename}: {phase} {state['percent']:.0f}%")
+            if progress is not None:
+                progress(state)
+        
+        return report
+    
+    @staticmethod
+    def _stepped_copy(source_path: str, target_path: Path, report) -> Tuple[int, int]:
+        """
+        Copiar o banco em passos de BACKUP_PAGES_PER_STEP páginas com pausa entre eles
+        
+        Returns:
+            Tupla (páginas copiadas, reinícios)
+        """
+        source = sqlite3.connect(source_path, isolation_level=None)
+        target = sqlite3.connect(str(target_path))
+        state = {'done': 0, 'total': 0, 'restarts': 0}
+        sleep = BACKUP_STEP_SLEEP_MS / 1000
+        
+        def step(status, remaining, total):
+            done = total - remaining
+            if done <= state['done'] and status not in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+                # Passo sem avanço: outra conexão escreveu no banco e o sqlite recomeçou a cópia
+                state['restarts'] += 1
+                if state['restarts'] > BACKUP_MAX_RESTARTS:
+                    raise _TooManyRestarts()
+            state['done'], state['total'] = done, total
+            report(
+                pages_done=done, pages_total=total, restarts=state['restarts'],
+                percent=round(done * 100 / total, 1) if total else 100.0
+            )
+            # Pausa entre passos: sem WAL a cópia não segura lock aqui e as
+            # escritas passam (reiniciando a cópia). No WAL a transação de
+            # leitura continua aberta: as escritas passam, mas o checkpoint
+            # não avança além do snapshot e o -wal cresce até o fim do backup
+            if remaining and sleep > 0:
+                time.sleep(sleep)
+        
+        try:
+            wal = source.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal'
+            if wal:
+                # Transação de leitura aberta durante toda a cópia: os passos
+                # leem o mesmo snapshot e escritas de outras conexões não
+                # reiniciam o backup (no WAL, leitores não bloqueiam escritores).
+                # Custo: enquanto ela estiver aberta, checkpoints não reciclam o
+                # -wal, que cresce com as escritas feitas durante o backup
+                source.execute('BEGIN')
+                source.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+            try:
+                source.backup(target, pages=max(BACKUP_PAGES_PER_STEP, 1), progress=step)
+            except _TooManyRestarts:
+                logger.warning(
+                    f"Backup reiniciado {state['restarts']} vezes por escritas concorrentes; "
+                    f"copiando de uma vez"
+                )
+                source.backup(target)
+                state['done'] = state['total'] = target.execute('PRAGMA page_count').fetchone()[0]
+                report(
+                    pages_done=state['done'], pages_total=state['total'],
+                    restarts=state['restarts'], percent=100.0
+                )
+            finally:
+                if wal:
+                    source.execute('COMMIT')
+        finally:
+            target.close()
+            source.close()
+        return state['total'], state['restarts']
+    
+    @staticmethod
+    def _compress(snapshot_path: Path, target_path: Path, report) -> str:
+        """Comprimir o snapshot em gzip por blocos; retorna o sha256 do .gz"""
+        total = snapshot_path.stat().st_size
+        done = 0
+        report(phase='compress', percent=0.0, bytes_done=0, bytes_total=total)
+        with open(target_path, 'wb') as raw:
+            writer = _HashingWriter(raw)
+            # mtime=0: o mesmo banco gera o mesmo .gz (e o mesmo sha256)
+            with gzip.GzipFile(fileobj=writer, mode='wb', compresslevel=BACKUP_GZIP_LEVEL, mtime=0) as gz, \
+                    open(snapshot_path, 'rb') as src:
+                for chunk in iter(lambda: src.read(_CHUNK_SIZE), b''):
+                    gz.write(chunk)
+                    done += len(chunk)
+                    report(bytes_done=done, percent=round(done * 100 / total, 1) if total else 100.0)
+        return writer.digest.hexdigest()
+    
+    @staticmethod
+    def _sqlite_copy(source_path: str, target_path: str):
+        """Copiar um banco SQLite para outro com a API de backup do sqlite3"""
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    
+    def _save_backup_metadata(self, backup_path: Path, extra: dict = None):
+        """Salvar metadados do backup em JSON (sha256, tamanhos e duração em `extra`)"""
         try:
             metadata = {
                 'created': datetime.now().isoformat(),
@@ -207,10 +499,11 @@ class BackupManager:
                 'db_path': self.db_path,
                 'retention_until': (
                     datetime.now() + timedelta(days=self.retention_days)
-                ).isoformat()
+                ).isoformat(),
+                **(extra or {})
             }
             
-            metadata_file = backup_path.with_suffix('.json')
+            metadata_file = _metadata_path(backup_path)
             with open(metadata_file, 'w') as f:
                 json.dump(metadata, f, indent=2)
         except Exception as e:
@@ -218,7 +511,7 @@ class BackupManager:
     
     def _cleanup_old_backups(self):
         """Remover backups antigos baseado em retenção e limite máximo"""
-        backups = list(self.backup_dir.glob('backup_*.db'))
+        backups = self._backup_files()
         
         # Remover por data de retenção
         cutoff_date = datetime.now() - timedelta(days=self.retention_days)
@@ -227,7 +520,7 @@ class BackupManager:
             if modified_time < cutoff_date:
                 try:
                     backup_file.unlink()
-                    metadata_file = backup_file.with_suffix('.json')
+                    metadata_file = _metadata_path(backup_file)
                     if metadata_file.exists():
                         metadata_file.unlink()
                     logger.info(f"Backup antigo deletado: {backup_file.name}")
@@ -236,7 +529,7 @@ class BackupManager:
         
         # Remover se exceder máximo
         remaining_backups = sorted(
-            self.backup_dir.glob('backup_*.db'),
+            self._backup_files(),
             key=lambda x: x.stat().st_mtime,
             reverse=True
         )
@@ -245,7 +538,7 @@ class BackupManager:
             for old_backup in remaining_backups[self.max_backups:]:
                 try:
                     old_backup.unlink()
-                    metadata_file = old_backup.with_suffix('.json')
+                    metadata_file = _metadata_path(old_backup)
                     if metadata_file.exists():
                         metadata_file.unlink()
                     logger.info(f"Backup excedente deletado: {old_backup.name}")
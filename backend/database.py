@@ -1,12 +1,30 @@
 # database.py - Configuração SQLAlchemy
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
 
 # Obter URL do banco de dados das variáveis de ambiente
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./racket_hero.db")
+if DATABASE_URL.startswith("postgres://"):
+    # Formato antigo (Heroku/Render) não é aceito pelo SQLAlchemy 2
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_POSTGRES = DATABASE_URL.startswith("postgresql")
+
+# Pool de conexões do PostgreSQL (por processo: com N workers, o servidor
+# recebe até N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexões)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
 
 # Criar engine
 # Para SQLite :memory:, usar StaticPool para garantir mesma conexão
@@ -16,12 +34,74 @@ if DATABASE_URL == "sqlite:///:memory:":
         connect_args={"check_same_thread": False},
         poolclass=StaticPool  # Usar mesmo banco para todas as conexões
     )
+elif IS_POSTGRES:
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        # statement_timeout em ms (0 = sem limite), aplicado na sessão do servidor
+        connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    )
 else:
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+        connect_args={"check_same_thread": False} if IS_SQLITE else {}
     )
 
+# Perfil de PRAGMAs do SQLite aplicado em toda conexão nova.
+# SQLITE_TUNING=0 desliga o perfil; cada PRAGMA pode ser ajustado pela sua
+# variável e desligado individualmente com valor vazio.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1").lower() not in ("0", "false", "no")
+SQLITE_PRAGMAS = {
+    # busy_timeout primeiro: a troca para WAL precisa de lock exclusivo
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),  # negativo = KiB (64 MiB)
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+
+def _pragma_settings() -> dict:
+    """PRAGMAs configurados (vazio se o perfil está desligado)"""
+    if not SQLITE_TUNING:
+        return {}
+    return {name: value for name, value in SQLITE_PRAGMAS.items() if value.strip()}
+
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        """Aplicar o perfil de PRAGMAs em cada conexão aberta pelo pool"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in _pragma_settings().items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+# Consultas acima de SLOW_QUERY_MS vão para logs/slow_queries.log com
+# parâmetros mascarados, rota e plano de execução (utils.slow_query)
+from utils.slow_query import instrument as instrument_slow_queries  # noqa: E402
+
+instrument_slow_queries(engine)
+
+
+def effective_sqlite_pragmas() -> dict:
+    """Ler os valores efetivos dos PRAGMAs do perfil em uma conexão do pool"""
+    if not IS_SQLITE:
+        return {}
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in SQLITE_PRAGMAS
+        }
+
 # Criar session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -33,9 +113,13 @@ def get_db():
     Dependency para obter session do banco de dados.
     Usar em rotas FastAPI.
     
+    O acesso ao banco é síncrono: rotas e dependencies que usam sessão
+    devem ser `def` (não `async def`) para o FastAPI executá-las no
+    threadpool sem bloquear o event loop.
+    
     Exemplo:
         @router.get("/items")
-        async def read_items(db: Session = Depends(get_db)):
+        def read_items(db: Session = Depends(get_db)):
             return db.query(Item).all()
     """
     db = SessionLocal()
@@ -44,12 +128,39 @@ def get_db():
     finally:
         db.close()
 
+def run_migrations(bind=None):
+    """Aplicar as migrações do Alembic pendentes (alembic upgrade head)"""
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "migrations"))
+    with (bind or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
 def init_db():
-    """Inicializar banco de dados (criar todas as tabelas)."""
+    """Inicializar banco de dados (criar tabelas e aplicar migrações)."""
     # Importar models para registrar no Base
     from models.usuario import Usuario  # noqa
     from models.event import Event  # noqa
     from models.player import Player  # noqa
     from models.match import Match  # noqa
+    from models.standing import Standing  # noqa
+    from models.rating_history import RatingHistory  # noqa
+    from models.evento_organizador import EventoOrganizador  # noqa
+    from utils.standings import backfill_missing_standings
+    from utils.elo import backfill_rating_history
     
     Base.metadata.create_all(bind=engine)
+    
+    # Migrações (índices e ajustes em tabelas que já existiam)
+    run_migrations()
+    
+    # Preencher classificação e checkpoints de eventos anteriores às tabelas
+    session = SessionLocal()
+    try:
+        backfill_missing_standings(session)
+        backfill_rating_history(session)
+    finally:
+        session.close()
@@ -3,9 +3,13 @@ Logging configurado para produção - Racket Hero
 Implementa logging centralizado com níveis DEBUG, INFO, WARNING, ERROR
 """
 
+import atexit
+import copy
 import logging
 import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime, timezone
 import json
 from pathlib import Path
@@ -16,7 +20,8 @@ class JSONFormatter(logging.Formatter):
     
     def format(self, record):
         log_data = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            # Hora do evento, não da escrita (com a fila elas diferem)
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -25,19 +30,100 @@ class JSONFormatter(logging.Formatter):
             'line': record.lineno,
         }
         
+        # Campos estruturados passados em extra={'data': {...}}
+        data = getattr(record, 'data', None)
+        if isinstance(data, dict):
+            log_data.update(data)
+        
         # Adicionar exceção se houver
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data['exception'] = record.exc_text
         
         return json.dumps(log_data)
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia quem loga.
+    
+    Com a fila cheia (disco/console lentos, rajada de logs) o registro é
+    descartado e contado em `dropped`. A formatação fica para a thread do
+    QueueListener: aqui só se resolve a mensagem e o traceback.
+    """
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.enqueued += 1
+
+
+class _NameFilter(logging.Filter):
+    """Aceitar só registros de um logger e dos filhos dele"""
+    
+    def filter(self, record):
+        return record.name == self.name or record.name.startswith(self.name + '.')
+
+
+# Pipeline assíncrono ativo (um por processo; setup_logging substitui o anterior)
+_queue_handler = None
+_listener = None
+
+
+def stop_logging_queue():
+    """Parar a thread de escrita, gravando o que ainda está na fila"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging_queue)
+
+
+def logging_stats():
+    """Contadores da fila de logs para monitoramento"""
+    if _queue_handler is None:
+        return {"async": False}
+    with _queue_handler._lock:
+        return {
+            "async": True,
+            "queue_size": _queue_handler.queue.qsize(),
+            "max_size": _queue_handler.queue.maxsize,
+            "enqueued": _queue_handler.enqueued,
+            "dropped": _queue_handler.dropped,
+        }
+
+
 def setup_logging(
     log_level=logging.INFO,
     log_dir='logs',
     console_output=True,
     file_output=True,
-    json_format=True
+    json_format=True,
+    async_output=None,
+    queue_size=None
 ):
     """
     Configurar logging para produção
@@ -48,10 +134,19 @@ def setup_logging(
         console_output: Se True, saída para console
         file_output: Se True, saída para arquivo
         json_format: Se True, formatar logs como JSON
+        async_output: Se True, handlers escrevem numa thread própria via fila
+            (padrão: LOG_ASYNC, ligado)
+        queue_size: Registros pendentes antes de descartar (padrão: LOG_QUEUE_SIZE)
     
     Returns:
         logger: Logger configurado
     """
+    global _queue_handler, _listener
+    
+    if async_output is None:
+        async_output = os.getenv('LOG_ASYNC', '1').lower() not in ('0', 'false', 'no')
+    if queue_size is None:
+        queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
     
     # Criar diretório de logs se não existir
     log_path = Path(log_dir)
@@ -62,7 +157,12 @@ def setup_logging(
     logger.setLevel(log_level)
     
     # Remover handlers existentes (evitar duplicação)
+    stop_logging_queue()
+    _queue_handler = None
     logger.handlers.clear()
+    api_logger = logging.getLogger('racket_hero.api')
+    api_logger.handlers.clear()
+    handlers = []
     
     # Formatter
     if json_format:
@@ -78,7 +178,7 @@ def setup_logging(
         console_handler = logging.StreamHandler()
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # Handler para arquivo (rotação diária)
     if file_output:
@@ -91,7 +191,7 @@ def setup_logging(
         )
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
         
         # Arquivo de erros
         error_handler = logging.FileHandler(
@@ -100,7 +200,7 @@ def setup_logging(
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
-        logger.addHandler(error_handler)
+        handlers.append(error_handler)
         
         # Arquivo de acesso (APIs)
         access_handler = logging.FileHandler(
@@ -109,8 +209,30 @@ def setup_logging(
         )
         access_handler.setLevel(logging.INFO)
         access_handler.setFormatter(formatter)
-        api_logger = logging.getLogger('racket_hero.api')
-        api_logger.addHandler(access_handler)
+        access_handler.addFilter(_NameFilter('racket_hero.api'))
+        handlers.append(access_handler)
+        
+        # Consultas lentas (utils.slow_query): SQL, parâmetros mascarados e plano
+        slow_query_handler = logging.FileHandler(
+            filename=log_path / 'slow_queries.log',
+            encoding='utf-8'
+        )
+        slow_query_handler.setLevel(logging.WARNING)
+        slow_query_handler.setFormatter(formatter)
+        slow_query_handler.addFilter(_NameFilter('racket_hero.slow_query'))
+        handlers.append(slow_query_handler)
+    
+    if async_output and handlers:
+        # Requisições só enfileiram; formatação e escrita ficam na thread do listener
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = logging.handlers.QueueListener(
+            _queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        logger.addHandler(_queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
@@ -1,30 +1,42 @@
 # main.py - Aplicação FastAPI principal
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 import os
 from pathlib import Path
-import logging
 import atexit
+import anyio
 
-from database import init_db, get_db, engine
-from routers import auth, events, players, matches, ranking, evento_organizadores, admin
-from logger_production import setup_logging, get_logger
+from database import init_db, get_db, engine, effective_sqlite_pragmas
+from routers import auth, events, players, matches, ranking, live, evento_organizadores, admin
+from logger_production import setup_logging, get_logger, logging_stats
 from backup_manager import backup_endpoint_handler
+from utils.cache import read_cache
+from utils.security import PasswordPoolBusy
+from utils.rate_limit import limiter, rate_limit_exceeded
+from utils import rate_limit
+from utils.auth_cache import auth_cache
+from utils.live import live_hub
+from utils.metrics import MetricsMiddleware, metrics, exposition, start_flusher, stop_flusher
+from utils.profiling import ProfilingMiddleware
+from slowapi.errors import RateLimitExceeded
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 # Configurar logging production
-setup_logging(log_level=logging.INFO, log_dir='logs', json_format=True)
+setup_logging(log_level=os.getenv('LOG_LEVEL', 'INFO').upper(), log_dir=os.getenv('LOG_DIR', 'logs'), json_format=True)
 log = get_logger("main")
 
 # Inicializar banco de dados na importação
 try:
     init_db()
     log.info("Banco de dados inicializado")
+    pragmas = effective_sqlite_pragmas()
+    if pragmas:
+        log.info(f"PRAGMAs SQLite efetivos: {pragmas}")
 except Exception as e:
     log.error(f"Erro ao inicializar banco de dados: {e}", exc_info=True)
 
@@ -44,11 +56,76 @@ try:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Retry-After", "X-Profile"],
     )
     log.info(f"CORS configurado para: {CORS_ORIGINS}")
 except Exception as e:
     log.error(f"Erro ao configurar CORS: {e}")
 
+# Métricas por rota (latência, tamanho, consultas SQL); expostas em /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Profiling sob demanda (admin com X-Profile: 1) e 1 a cada N por rota
+# (PROFILE_SAMPLE_EVERY); por fora das métricas para o perfil cobrir tudo
+app.add_middleware(ProfilingMiddleware)
+
+# Threadpool das rotas síncronas (todo acesso ao banco roda nele, fora do event loop)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+@app.on_event("startup")
+def configure_threadpool():
+    """Ajustar o número de threads usadas para rotas e dependencies `def`"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    log.info(f"Threadpool configurado com {THREADPOOL_SIZE} threads")
+
+@app.on_event("startup")
+def start_cache_listener():
+    """Assinar invalidações de cache dos outros workers (CACHE_BACKEND=redis)"""
+    read_cache.start_listener()
+    log.info(f"Cache de leitura: backend {read_cache.backend.name}")
+
+@app.on_event("shutdown")
+def stop_cache_listener():
+    read_cache.stop_listener()
+
+@app.on_event("startup")
+def start_metrics_flusher():
+    """Com METRICS_DIR, gravar as métricas do worker para o scrape somar todos"""
+    start_flusher()
+
+@app.on_event("shutdown")
+def stop_metrics_flusher():
+    stop_flusher()
+
+def _domain_metrics():
+    """Contadores que já existem nos caches, hub ao vivo, limites e logs"""
+    cache, auth, limits = read_cache.stats(), auth_cache.stats(), rate_limit.stats()
+    return [
+        ("read_cache_hits_total", (), cache["hits"]),
+        ("read_cache_misses_total", (), cache["misses"]),
+        ("auth_cache_hits_total", (), auth["hits"]),
+        ("auth_cache_misses_total", (), auth["misses"]),
+        ("live_subscribers", (), live_hub.stats()["subscribers"]),
+        ("rate_limit_rejected_total", (), limits["rejected_total"]),
+        ("log_records_dropped_total", (), logging_stats().get("dropped", 0)),
+    ]
+
+metrics.add_collector(_domain_metrics)
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy(request: Request, exc: PasswordPoolBusy):
+    """Pool de bcrypt saturado (login/registro/reset): recusar na hora"""
+    log.warning(f"Pool de senhas saturado: {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, tente novamente em instantes"},
+        headers={"Retry-After": "1", "error_code": "PASSWORD_POOL_BUSY"}
+    )
+
+# Limites por IP/usuário (decorators @limiter nas rotas de auth e escrita)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded)
+
 # Health check endpoint
 @app.get("/health", tags=["System"])
 async def health_check():
@@ -60,9 +137,15 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+# Métricas no formato Prometheus
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+def prometheus_metrics():
+    """Métricas HTTP, de banco e de domínio (todos os workers com METRICS_DIR)"""
+    return PlainTextResponse(exposition(), media_type="text/plain; version=0.0.4")
+
 # Database health check endpoint
 @app.get("/health/db", tags=["System"])
-async def health_check_db(db: Session = Depends(get_db)):
+def health_check_db(db: Session = Depends(get_db)):
     """Verificar saúde da API e do banco de dados"""
     try:
         # Testar conexão com o banco
@@ -94,6 +177,7 @@ app.include_router(evento_organizadores.router)  # Já tem prefix /events
 app.include_router(players.router, prefix="/api/players", tags=["Players"])
 app.include_router(matches.router, prefix="/api/matches", tags=["Matches"])
 app.include_router(ranking.router, prefix="/api/ranking", tags=["Ranking"])
+app.include_router(live.router, prefix="/api/live", tags=["Live"])
 app.include_router(admin.router, tags=["Admin"])
 
 # Agendar backups diários (3 da manhã)
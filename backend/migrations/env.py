@@ -0,0 +1,53 @@
+# migrations/env.py - Ambiente do Alembic
+
+from alembic import context
+
+from database import Base, engine, IS_SQLITE
+import models  # noqa: F401 - registrar todos os models no Base
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Gerar o SQL das migrações sem conectar (alembic upgrade --sql)"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=IS_SQLITE,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """
+    Aplicar as migrações no banco.
+
+    Usa a conexão recebida de database.run_migrations (init_db) ou, pela
+    linha de comando, o engine da aplicação (mesmo pool e mesmo banco em
+    memória dos testes).
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.begin() as connection:
+        _run(connection)
+
+
+def _run(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=IS_SQLITE,  # ALTER TABLE limitado no SQLite
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,71 @@
+"""Índices compostos para as consultas mais frequentes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+As tabelas continuam sendo criadas por create_all em init_db; esta
+revisão acrescenta os índices em bancos que já existiam e é idempotente
+em bancos novos (os models também declaram os índices).
+
+- player(event_id, usuario_id) único: inscrição (INSERT ... ON CONFLICT)
+- match(event_id, created_at): listagem de partidas por período
+- event(active, usuario_id): list_my_events de organizadores
+- evento_organizador(event_id, usuario_id) único: checagem de organizador
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("player", "uq_player_event_usuario", ["event_id", "usuario_id"], True),
+    ("match", "ix_match_event_created", ["event_id", "created_at"], False),
+    ("event", "ix_event_active_usuario", ["active", "usuario_id"], False),
+    ("evento_organizador", "uq_evento_organizador_event_usuario", ["event_id", "usuario_id"], True),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Organizadores repetidos são só associação: manter o registro mais antigo
+    if sa.inspect(bind).has_table("evento_organizador"):
+        op.execute(
+            "DELETE FROM evento_organizador WHERE id NOT IN ("
+            "SELECT MIN(id) FROM evento_organizador GROUP BY event_id, usuario_id)"
+        )
+
+    # Jogadores repetidos têm partidas: não há como juntar automaticamente
+    if sa.inspect(bind).has_table("player"):
+        duplicates = bind.execute(sa.text(
+            "SELECT event_id, usuario_id, COUNT(*) FROM player WHERE usuario_id IS NOT NULL "
+            "GROUP BY event_id, usuario_id HAVING COUNT(*) > 1"
+        )).fetchall()
+        if duplicates:
+            raise RuntimeError(
+                "Inscrições duplicadas (event_id, usuario_id, total): "
+                f"{[tuple(row) for row in duplicates]}. Remova-as antes de migrar."
+            )
+
+    for table, name, columns, unique in INDEXES:
+        existing = _existing_indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for table, name, _, _ in reversed(INDEXES):
+        existing = _existing_indexes(table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
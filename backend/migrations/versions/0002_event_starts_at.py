@@ -0,0 +1,79 @@
+"""Início tipado e indexado do evento (event.starts_at)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Acrescenta event.starts_at (DateTime) calculado a partir dos campos texto
+date/time, que continuam existindo, e o índice (active, starts_at) usado
+nos filtros por período e na ordenação por data de list_events.
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+event_table = sa.table(
+    "event",
+    sa.column("id", sa.Integer),
+    sa.column("date", sa.String),
+    sa.column("time", sa.String),
+    sa.column("starts_at", sa.DateTime),
+)
+
+
+def _parse(date, time):
+    # Cópia de models.event.parse_starts_at (migrações não importam models)
+    if not date:
+        return None
+    try:
+        day = datetime.strptime(date.strip(), "%Y-%m-%d")
+    except ValueError:
+        return None
+    try:
+        hour, minute = map(int, (time or "00:00").strip().split(":")[:2])
+        return day.replace(hour=hour, minute=minute)
+    except ValueError:
+        return day
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("event"):
+        return
+
+    if "starts_at" not in {c["name"] for c in inspector.get_columns("event")}:
+        op.add_column("event", sa.Column("starts_at", sa.DateTime(), nullable=True))
+
+    rows = bind.execute(
+        sa.select(event_table.c.id, event_table.c.date, event_table.c.time)
+        .where(event_table.c.starts_at.is_(None))
+    ).fetchall()
+    updates = [
+        {"event_id": row.id, "starts_at": _parse(row.date, row.time)}
+        for row in rows
+    ]
+    updates = [u for u in updates if u["starts_at"] is not None]
+    if updates:
+        bind.execute(
+            event_table.update()
+            .where(event_table.c.id == sa.bindparam("event_id"))
+            .values(starts_at=sa.bindparam("starts_at")),
+            updates
+        )
+
+    if "ix_event_active_starts_at" not in {ix["name"] for ix in inspector.get_indexes("event")}:
+        op.create_index("ix_event_active_starts_at", "event", ["active", "starts_at"])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "ix_event_active_starts_at" in {ix["name"] for ix in inspector.get_indexes("event")}:
+        op.drop_index("ix_event_active_starts_at", table_name="event")
+    with op.batch_alter_table("event") as batch:
+        batch.drop_column("starts_at")
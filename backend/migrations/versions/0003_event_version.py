@@ -0,0 +1,30 @@
+"""Versão dos dados do evento (event.version)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Acrescenta event.version, contador incrementado pelas escritas de
+jogadores e partidas e usado como ETag das leituras de ranking e
+partidas (GET condicional com If-None-Match).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("event"):
+        return
+    if "version" not in {c["name"] for c in inspector.get_columns("event")}:
+        op.add_column("event", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("event") as batch:
+        batch.drop_column("version")
@@ -5,5 +5,7 @@ from models.event import Event
 from models.player import Player
 from models.match import Match
 from models.evento_organizador import EventoOrganizador
+from models.standing import Standing
+from models.rating_history import RatingHistory
 
-__all__ = ["Usuario", "Event", "Player", "Match", "EventoOrganizador"]
+__all__ = ["Usuario", "Event", "Player", "Match", "EventoOrganizador", "Standing", "RatingHistory"]
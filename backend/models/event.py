@@ -1,9 +1,26 @@
 """Modelo de Evento para Torneios."""
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, event
 from database import Base
 
 
+def parse_starts_at(date: Optional[str], time: Optional[str]) -> Optional[datetime]:
+    """Combinar os campos texto date (YYYY-MM-DD) e time (HH:MM) em um datetime"""
+    if not date:
+        return None
+    try:
+        day = datetime.strptime(date.strip(), "%Y-%m-%d")
+    except ValueError:
+        return None
+    try:
+        hour, minute = map(int, (time or "00:00").strip().split(":")[:2])
+        return day.replace(hour=hour, minute=minute)
+    except ValueError:
+        return day
+
+
 class Event(Base):
     """
     Modelo de Evento - Representa um torneio/evento de ping-pong.
@@ -13,14 +30,33 @@ class Event(Base):
         name: Nome do evento
         date: Data no formato YYYY-MM-DD
         time: Hora no formato HH:MM
+        starts_at: Início do evento (date + time tipados, para filtros e
+            ordenação por data no banco; mantido em sincronia automaticamente)
         usuario_id: ID do usuário (organizador) que criou o evento
         active: Flag para soft delete
+        version: Versão dos dados do evento (jogadores, partidas, ranking);
+            incrementada a cada escrita e usada como ETag das leituras
     """
     __tablename__ = "event"
+    __table_args__ = (
+        # Eventos ativos de um organizador (list_my_events, migração 0001)
+        Index("ix_event_active_usuario", "active", "usuario_id"),
+        # Eventos ativos por período/ordem de data (list_events, migração 0002)
+        Index("ix_event_active_starts_at", "active", "starts_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     date = Column(String)  # YYYY-MM-DD format
     time = Column(String)  # HH:MM format
+    starts_at = Column(DateTime, nullable=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), index=True, nullable=True)
     active = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def _sync_starts_at(mapper, connection, target):
+    """Recalcular starts_at a partir de date/time antes de gravar"""
+    target.starts_at = parse_starts_at(target.date, target.time)
@@ -1,6 +1,6 @@
 """Modelo de associação Evento-Organizador (Many-to-Many)."""
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, func
 from database import Base
 
 
@@ -16,8 +16,13 @@ class EventoOrganizador(Base):
         usuario_id: ID do usuário/organizador (FK para usuarios)
         criado_em: Timestamp de quando o organizador foi adicionado
         é_criador: Flag indicando se foi o criador original do evento
+    
+    Cada usuário aparece uma vez por evento (índice único).
     """
     __tablename__ = "evento_organizador"
+    __table_args__ = (
+        Index("uq_evento_organizador_event_usuario", "event_id", "usuario_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("event.id"), index=True, nullable=False)
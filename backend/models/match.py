@@ -1,6 +1,7 @@
 """Modelo de Partida para Torneios de Ping-Pong."""
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
@@ -17,8 +18,16 @@ class Match(Base):
         winner_id: ID do vencedor (FK)
         created_at: Timestamp de criação (auto-preenchido)
         updated_at: Timestamp de atualização (auto-preenchido)
+        event, player_1, player_2, winner: Relacionamentos (lazy por padrão;
+            usar joinedload/selectinload para carregar junto com a partida)
     """
     __tablename__ = "match"
+    # Trazer created_at/updated_at no próprio INSERT (RETURNING), sem refresh
+    __mapper_args__ = {"eager_defaults": True}
+    # Listagem por evento e período (migração 0001)
+    __table_args__ = (
+        Index("ix_match_event_created", "event_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("event.id"), index=True)
@@ -27,3 +36,8 @@ class Match(Base):
     winner_id = Column(Integer, ForeignKey("player.id"), index=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    event = relationship("Event", foreign_keys=[event_id])
+    player_1 = relationship("Player", foreign_keys=[player_1_id])
+    player_2 = relationship("Player", foreign_keys=[player_2_id])
+    winner = relationship("Player", foreign_keys=[winner_id])
@@ -1,6 +1,6 @@
 """Modelo de Jogador para Eventos de Ping-Pong."""
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from database import Base
 
 
@@ -15,8 +15,14 @@ class Player(Base):
         name: Nome do jogador
         club: Clube do jogador (opcional)
         initial_elo: Rating Elo inicial
+    
+    Um usuário se inscreve no máximo uma vez por evento (índice único,
+    usado pelo INSERT ... ON CONFLICT da inscrição).
     """
     __tablename__ = "player"
+    __table_args__ = (
+        Index("uq_player_event_usuario", "event_id", "usuario_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("event.id"), index=True)
@@ -0,0 +1,37 @@
+"""Modelo de histórico de rating por partida."""
+
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from database import Base
+
+
+class RatingHistory(Base):
+    """
+    Modelo de Histórico de Rating - Checkpoint do Elo de um jogador em uma partida.
+
+    Cada partida com vencedor gera uma linha por jogador com o rating antes
+    e depois da partida. As linhas, ordenadas por match_id, são os
+    checkpoints usados para recalcular apenas o sufixo de partidas quando
+    uma partida é editada ou removida.
+
+    Attributes:
+        id: Primary key
+        event_id: ID do evento (FK)
+        match_id: ID da partida (FK) - define a ordem dentro do evento
+        player_id: ID do jogador (FK)
+        elo_before: Rating antes da partida
+        elo_after: Rating depois da partida
+        delta: Variação do rating na partida (elo_after - elo_before)
+    """
+    __tablename__ = "rating_history"
+    __table_args__ = (
+        Index("ix_rating_history_event_match", "event_id", "match_id"),
+        Index("ix_rating_history_player_match", "player_id", "match_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("event.id"), nullable=False)
+    match_id = Column(Integer, ForeignKey("match.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("player.id"), nullable=False)
+    elo_before = Column(Float, nullable=False)
+    elo_after = Column(Float, nullable=False)
+    delta = Column(Float, nullable=False, default=0.0)
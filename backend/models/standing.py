@@ -0,0 +1,35 @@
+"""Modelo de Classificação materializada por evento."""
+
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from database import Base
+
+
+class Standing(Base):
+    """
+    Modelo de Classificação - Linha do ranking de um jogador em um evento.
+
+    Mantida incrementalmente pelas rotas de partidas, na mesma transação em
+    que a partida é gravada, para que o ranking seja uma leitura única
+    ordenada pelo índice (event_id, elo).
+
+    Attributes:
+        id: Primary key
+        event_id: ID do evento (FK)
+        player_id: ID do jogador (FK, único)
+        wins: Número de vitórias
+        losses: Número de derrotas
+        matches: Partidas disputadas (inclusive sem vencedor definido)
+        elo: Rating Elo atual (espelha Player.initial_elo)
+    """
+    __tablename__ = "standing"
+    __table_args__ = (
+        Index("ix_standing_event_elo", "event_id", "elo"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("event.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("player.id"), unique=True, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    matches = Column(Integer, default=0, nullable=False)
+    elo = Column(Float, default=1600.0, nullable=False)
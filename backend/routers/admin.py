@@ -1,17 +1,26 @@
 # routers/admin.py - Endpoints administrativos
 
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from backup_manager import backup_endpoint_handler, BackupManager
+from typing import Optional
+from backup_manager import backup_endpoint_handler, backup_progress, BackupManager
 from database import get_db
-from models import Usuario
+from models import Usuario, Event
+from models.usuario import TipoUsuario
+from utils.permissions import require_tipo
+from utils.cache import read_cache, PLAYER_READS
+from utils.live import live_hub
+from utils.auth_cache import auth_cache
+from utils import rate_limit, profiling
 from logger_production import get_logger
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 logger = get_logger("admin")
 
 # Dependency para verificar se é admin
-async def get_current_admin_user(db: Session = Depends(get_db)):
+def get_current_admin_user(db: Session = Depends(get_db)):
     """Verificar se usuário é admin (por enquanto, simulado)"""
     # Em produção, implementar autenticação real
     # Por enquanto, apenas log que foi acessado
@@ -19,7 +28,7 @@ async def get_current_admin_user(db: Session = Depends(get_db)):
     return True
 
 @router.post("/backup", status_code=201)
-async def manual_backup(admin: bool = Depends(get_current_admin_user)):
+def manual_backup(admin: bool = Depends(get_current_admin_user)):
     """
     Criar backup manual do banco de dados
     
@@ -40,7 +49,7 @@ async def manual_backup(admin: bool = Depends(get_current_admin_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/backups")
-async def list_backups(admin: bool = Depends(get_current_admin_user)):
+def list_backups(admin: bool = Depends(get_current_admin_user)):
     """
     Listar todos os backups disponíveis
     
@@ -59,8 +68,24 @@ async def list_backups(admin: bool = Depends(get_current_admin_user)):
         logger.error(f"Erro ao listar backups: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/backups/progress")
+def backup_status(admin: bool = Depends(get_current_admin_user)):
+    """
+    Andamento do backup em curso (ou do último) neste worker
+    
+    **Require**: Admin access
+    
+    **Response**:
+    - `running`: Se há backup em andamento
+    - `phase`: `copy` (páginas do SQLite), `compress` (gzip), `done` ou `failed`
+    - `percent`: Percentual da fase atual
+    - `pages_done`/`pages_total`, `bytes_done`/`bytes_total`: Contadores da cópia e da compressão
+    - `restarts`: Reinícios da cópia causados por escritas (sem WAL)
+    """
+    return backup_progress.snapshot()
+
 @router.post("/backups/{filename}/restore", status_code=200)
-async def restore_backup(filename: str, admin: bool = Depends(get_current_admin_user)):
+def restore_backup(filename: str, admin: bool = Depends(get_current_admin_user)):
     """
     Restaurar banco de um backup
     
@@ -80,6 +105,8 @@ async def restore_backup(filename: str, admin: bool = Depends(get_current_admin_
         success, msg = manager.restore_backup(filename)
         
         if success:
+            read_cache.clear()
+            live_hub.resync()
             logger.info(f"Backup restaurado com sucesso: {filename}")
             return {
                 "success": True,
@@ -96,7 +123,7 @@ async def restore_backup(filename: str, admin: bool = Depends(get_current_admin_
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/backups/{filename}", status_code=200)
-async def delete_backup(filename: str, admin: bool = Depends(get_current_admin_user)):
+def delete_backup(filename: str, admin: bool = Depends(get_current_admin_user)):
     """
     Deletar um backup
     
@@ -127,7 +154,7 @@ async def delete_backup(filename: str, admin: bool = Depends(get_current_admin_u
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/system/health")
-async def system_health(admin: bool = Depends(get_current_admin_user)):
+def system_health(admin: bool = Depends(get_current_admin_user)):
     """
     Verificar saúde do sistema
     
@@ -137,10 +164,15 @@ async def system_health(admin: bool = Depends(get_current_admin_user)):
     - `status`: Status geral do sistema
     - `database`: Status do banco de dados
     - `backups`: Último backup criado
-    - `logs`: Últimas linhas do log
+    - `logs`: Últimas linhas do log e fila de escrita (`queue.dropped`: registros descartados)
+      e consultas lentas registradas/suprimidas (`slow_queries`)
+    - `password_pool`: Operações de bcrypt concluídas e recusadas (503)
     """
     import os
     from datetime import datetime
+    from utils.security import password_pool
+    from logger_production import logging_stats
+    from utils.slow_query import slow_queries
     
     try:
         logger.info("Health check solicitado")
@@ -177,15 +209,144 @@ async def system_health(admin: bool = Depends(get_current_admin_user)):
             },
             "logs": {
                 "recent_lines": len(last_logs),
-                "content": last_logs[-3:] if last_logs else []
-            }
+                "content": last_logs[-3:] if last_logs else [],
+                "queue": logging_stats(),
+                "slow_queries": slow_queries.stats()
+            },
+            "password_pool": password_pool.stats()
         }
     except Exception as e:
         logger.error(f"Erro no health check: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ratings/recompute")
+def recompute_ratings(
+    event_id: Optional[int] = None,
+    workers: int = Query(1, ge=1, le=16),
+    usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN)),
+    db: Session = Depends(get_db)
+):
+    """
+    Recalcular o Elo em lote (após mudar ELO_K_FACTOR ou corrigir dados)
+    
+    **Require**: Admin access
+    
+    **Parameters**:
+    - `event_id`: Evento a recalcular (omitido = todos os eventos)
+    - `workers`: Processos usados para calcular eventos em paralelo
+    
+    **Response**:
+    - `events`: Partidas recalculadas por evento
+    - `total_matches`: Total de partidas recalculadas
+    """
+    from utils.elo_batch import recompute_events
+    
+    try:
+        if event_id is not None:
+            if not db.query(Event.id).filter(Event.id == event_id).first():
+                raise HTTPException(status_code=404, detail="Evento não encontrado")
+            event_ids = [event_id]
+        else:
+            event_ids = [row[0] for row in db.query(Event.id).order_by(Event.id).all()]
+        
+        logger.info(f"[{usuario.email}] Recálculo de Elo solicitado para {len(event_ids)} eventos")
+        summary = recompute_events(db, event_ids, workers=workers)
+        for recomputed_id in summary:
+            read_cache.invalidate(recomputed_id, *PLAYER_READS)
+            live_hub.resync(recomputed_id)
+        
+        return {
+            "success": True,
+            "events": summary,
+            "total_matches": sum(summary.values())
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao recalcular Elo: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+def cache_stats(usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))):
+    """
+    Contadores do cache de leitura (evento, jogadores e ranking)
+    
+    **Require**: Admin access
+    
+    **Response**:
+    - `hits`/`misses`/`hit_rate`: Acertos e faltas desde o início do processo
+    - `entries`/`max_entries`: Ocupação do LRU
+    - `evictions`: Entradas descartadas por falta de espaço
+    - `invalidations`: Invalidações feitas pelas escritas
+    - `auth`: Cache da autenticação (usuários e tokens decodificados)
+    """
+    return {**read_cache.stats(), "auth": auth_cache.stats()}
+
+@router.get("/live/stats")
+def live_stats(usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))):
+    """
+    Contadores das conexões ao vivo (WebSocket/SSE) deste worker
+    
+    **Require**: Admin access
+    
+    **Response**:
+    - `events`/`subscribers`: Eventos acompanhados e conexões abertas
+    - `published`: Mudanças de partidas transmitidas
+    - `resyncs`: Snapshots pedidos pelas escritas (jogadores, outros workers)
+    - `overflows`: Conexões lentas cuja fila encheu e virou snapshot
+    - `snapshots`: Snapshots montados (um por evento para todas as conexões que pediram juntas)
+    """
+    return live_hub.stats()
+
+@router.get("/rate-limit/stats")
+def rate_limit_stats(usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))):
+    """
+    Limites de requisições configurados e recusas (429) deste worker
+    
+    **Require**: Admin access
+    
+    **Response**:
+    - `enabled`/`storage`: Limitador ligado e onde ficam os contadores
+    - `limits`: Limites por grupo de rotas (RATE_LIMIT_*)
+    - `rejected_total`: Requisições recusadas desde o início do processo
+    - `rejected`: Recusas por rota e tipo de chave (`ip` ou `user`)
+    """
+    return rate_limit.stats()
+
+@router.get("/profiles")
+def list_profiles(usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))):
+    """
+    Perfis de requisições gravados (header X-Profile e modo contínuo)
+    
+    **Require**: Admin access
+    
+    **Response**:
+    - `profiles`: Arquivos de stacks colapsadas (`sampled/` = modo contínuo)
+    - `sample_every`: 1 a cada N requisições por rota (0 = desligado)
+    """
+    profiles = profiling.list_profiles()
+    return {
+        "profiles": profiles,
+        "total": len(profiles),
+        "sample_every": profiling.PROFILE_SAMPLE_EVERY,
+        "interval_ms": profiling.PROFILE_INTERVAL_MS
+    }
+
+@router.get("/profiles/{filename:path}")
+def download_profile(filename: str, usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))):
+    """
+    Baixar um perfil (formato "a;b;c N", para flamegraph.pl ou speedscope)
+    
+    **Require**: Admin access
+    """
+    path = profiling.profile_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(path, media_type="text/plain", filename=os.path.basename(path))
+
 @router.post("/seed-test-accounts", status_code=201)
-async def seed_test_accounts(db: Session = Depends(get_db)):
+def seed_test_accounts(db: Session = Depends(get_db)):
     """
     Criar contas de teste no banco de dados.
     
@@ -1,6 +1,6 @@
 # routers/auth.py - Endpoints de autenticação
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 import os
@@ -13,9 +13,10 @@ from schemas.auth import (
 )
 from utils.security import (
     hash_password, verify_password, create_access_token, create_refresh_token,
-    verify_token, create_reset_password_token, verify_reset_token,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    verify_token, create_reset_password_token, verify_reset_token, needs_rehash,
+    PasswordPoolBusy, ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from utils.rate_limit import limiter, LOGIN_LIMIT, AUTH_LIMIT
 from logger_production import get_logger
 
 router = APIRouter()
@@ -30,8 +31,10 @@ logger = get_logger("auth")
     status_code=status.HTTP_201_CREATED,
     responses={400: {"model": ErrorResponse}}
 )
-async def register(
-    request: RegistroRequest,
+@limiter.limit(AUTH_LIMIT)
+def register(
+    request: Request,
+    dados: RegistroRequest,
     db: Session = Depends(get_db)
 ):
     """
@@ -44,12 +47,12 @@ async def register(
     
     **Response:** TokenResponse com access_token e refresh_token
     """
-    logger.info(f"Tentativa de registro: {request.email}")
+    logger.info(f"Tentativa de registro: {dados.email}")
     
     # Verificar se email já existe
-    usuario_existente = db.query(Usuario).filter(Usuario.email == request.email).first()
+    usuario_existente = db.query(Usuario).filter(Usuario.email == dados.email).first()
     if usuario_existente:
-        logger.warning(f"Erro de registro: email duplicado {request.email}")
+        logger.warning(f"Erro de registro: email duplicado {dados.email}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já registrado",
@@ -58,10 +61,10 @@ async def register(
     
     # Criar novo usuário
     novo_usuario = Usuario(
-        email=request.email,
-        nome=request.nome,
-        senha_hash=hash_password(request.senha),
-        tipo=request.tipo,  # Usar tipo da requisição (padrão: "usuario")
+        email=dados.email,
+        nome=dados.nome,
+        senha_hash=hash_password(dados.senha),
+        tipo=dados.tipo,  # Usar tipo da requisição (padrão: "usuario")
         ativo=True
     )
     
@@ -69,7 +72,7 @@ async def register(
     db.commit()
     db.refresh(novo_usuario)
     
-    logger.info(f"Usuário registrado com sucesso: {novo_usuario.id} ({request.email})")
+    logger.info(f"Usuário registrado com sucesso: {novo_usuario.id} ({dados.email})")
     
     # Criar tokens
     access_token = create_access_token(novo_usuario.id, novo_usuario.email, novo_usuario.tipo)
@@ -95,8 +98,10 @@ async def register(
     response_model=TokenResponse,
     responses={401: {"model": ErrorResponse}}
 )
-async def login(
-    request: LoginRequest,
+@limiter.limit(LOGIN_LIMIT)
+def login(
+    request: Request,
+    dados: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """
@@ -108,13 +113,13 @@ async def login(
     
     **Response:** TokenResponse com access_token e refresh_token
     """
-    logger.info(f"Tentativa de login: {request.email}")
+    logger.info(f"Tentativa de login: {dados.email}")
     
     # Buscar usuário por email
-    usuario = db.query(Usuario).filter(Usuario.email == request.email).first()
+    usuario = db.query(Usuario).filter(Usuario.email == dados.email).first()
     
     if not usuario:
-        logger.warning(f"Falha de login: email não encontrado {request.email}")
+        logger.warning(f"Falha de login: email não encontrado {dados.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -122,8 +127,8 @@ async def login(
         )
     
     # Verificar senha
-    if not verify_password(request.senha, usuario.senha_hash):
-        logger.warning(f"Falha de login: senha incorreta para {request.email}")
+    if not verify_password(dados.senha, usuario.senha_hash):
+        logger.warning(f"Falha de login: senha incorreta para {dados.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -132,14 +137,23 @@ async def login(
     
     # Verificar se usuário está ativo
     if not usuario.ativo:
-        logger.warning(f"Tentativa de login com usuário inativo: {request.email}")
+        logger.warning(f"Tentativa de login com usuário inativo: {dados.email}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuário inativo",
             headers={"error_code": "USER_INACTIVE"}
         )
     
-    logger.info(f"Login bem-sucedido: {usuario.id} ({request.email})")
+    # Refazer o hash se BCRYPT_ROUNDS mudou (a senha em texto só existe aqui)
+    if needs_rehash(usuario.senha_hash):
+        try:
+            usuario.senha_hash = hash_password(dados.senha)
+            db.commit()
+            logger.info(f"Hash de senha atualizado para o custo atual: {usuario.id}")
+        except PasswordPoolBusy:
+            pass  # fica para o próximo login
+    
+    logger.info(f"Login bem-sucedido: {usuario.id} ({dados.email})")
     
     # Criar tokens
     access_token = create_access_token(usuario.id, usuario.email, usuario.tipo)
@@ -165,8 +179,10 @@ async def login(
     response_model=TokenResponse,
     responses={401: {"model": ErrorResponse}}
 )
-async def refresh_token(
-    request: RefreshTokenRequest,
+@limiter.limit(AUTH_LIMIT)
+def refresh_token(
+    request: Request,
+    dados: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
     """
@@ -179,7 +195,7 @@ async def refresh_token(
     **Response:** TokenResponse com novo access_token
     """
     # Verificar refresh token
-    token_data = verify_token(request.refresh_token)
+    token_data = verify_token(dados.refresh_token)
     
     if not token_data:
         raise HTTPException(
@@ -222,8 +238,10 @@ async def refresh_token(
     status_code=status.HTTP_200_OK,
     responses={404: {"model": ErrorResponse}}
 )
-async def forgot_password(
-    request: ForgotPasswordRequest,
+@limiter.limit(AUTH_LIMIT)
+def forgot_password(
+    request: Request,
+    dados: ForgotPasswordRequest,
     db: Session = Depends(get_db)
 ):
     """
@@ -237,7 +255,7 @@ async def forgot_password(
     **Response:** {"message": "Email enviado com instruções de reset"}
     """
     # Buscar usuário
-    usuario = db.query(Usuario).filter(Usuario.email == request.email).first()
+    usuario = db.query(Usuario).filter(Usuario.email == dados.email).first()
     
     if not usuario:
         # Não revelamos se email existe ou não (segurança)
@@ -267,8 +285,10 @@ async def forgot_password(
     response_model=TokenResponse,
     responses={400: {"model": ErrorResponse}, 401: {"model": ErrorResponse}}
 )
-async def reset_password(
-    request: ResetPasswordRequest,
+@limiter.limit(AUTH_LIMIT)
+def reset_password(
+    request: Request,
+    dados: ResetPasswordRequest,
     db: Session = Depends(get_db)
 ):
     """
@@ -281,7 +301,7 @@ async def reset_password(
     **Response:** TokenResponse com novo access_token
     """
     # Verificar token
-    usuario_id = verify_reset_token(request.token)
+    usuario_id = verify_reset_token(dados.token)
     
     if not usuario_id:
         raise HTTPException(
@@ -301,7 +321,7 @@ async def reset_password(
         )
     
     # Atualizar senha
-    usuario.senha_hash = hash_password(request.nova_senha)
+    usuario.senha_hash = hash_password(dados.nova_senha)
     usuario.reset_token = None
     usuario.reset_token_expires = None
     db.commit()
@@ -331,7 +351,7 @@ async def reset_password(
     response_model=UsuarioResponse,
     responses={401: {"model": ErrorResponse}}
 )
-async def get_current_user(
+def get_current_user(
     authorization: str = None,
     db: Session = Depends(get_db)
 ):
@@ -9,6 +9,7 @@ from database import SessionLocal, get_db
 from models import Event, EventoOrganizador
 from models.usuario import Usuario, TipoUsuario
 from utils.permissions import require_permission, require_tipo, Permissao
+from utils.upsert import insert_ignore
 from logger import get_logger
 
 log = get_logger("evento_organizadores")
@@ -17,7 +18,7 @@ router = APIRouter(prefix="/events", tags=["evento_organizadores"])
 
 
 @router.post("/{event_id}/organizadores", response_model=dict)
-async def add_organizador(
+def add_organizador(
     event_id: int,
     organizador_data: dict,  # {"usuario_id": int}
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
@@ -55,25 +56,18 @@ async def add_organizador(
         if not novo_org:
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
         
-        # Verificar se já é organizador
-        já_é_org = session.query(EventoOrganizador).filter(
-            EventoOrganizador.event_id == event_id,
-            EventoOrganizador.usuario_id == novo_org_id
-        ).first()
+        # Adicionar novo organizador (None se já é organizador)
+        evento_org_id = insert_ignore(session, EventoOrganizador, {
+            "event_id": event_id,
+            "usuario_id": novo_org_id,
+            "é_criador": 0
+        }, ["event_id", "usuario_id"])
         
-        if já_é_org:
+        if evento_org_id is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"'{novo_org.email}' já é organizador deste evento"
             )
-        
-        # Adicionar novo organizador
-        evento_org = EventoOrganizador(
-            event_id=event_id,
-            usuario_id=novo_org_id,
-            é_criador=0
-        )
-        session.add(evento_org)
         session.commit()
         
         log.info(f"[{usuario.email}] Organizador '{novo_org.email}' adicionado ao evento '{event.name}'")
@@ -100,7 +94,7 @@ async def add_organizador(
 
 
 @router.get("/{event_id}/organizadores", response_model=List[dict])
-async def list_organizadores(
+def list_organizadores(
     event_id: int,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
 ):
@@ -143,7 +137,7 @@ async def list_organizadores(
 
 
 @router.delete("/{event_id}/organizadores/{organizador_id}", response_model=dict)
-async def remove_organizador(
+def remove_organizador(
     event_id: int,
     organizador_id: int,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
@@ -2,14 +2,17 @@
 events.py - Router para gerenciar eventos
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 from database import SessionLocal, get_db
 from models import Event, EventoOrganizador
 from models.usuario import Usuario, TipoUsuario
 from models.player import Player
 from utils.permissions import require_permission, require_tipo, Permissao
+from utils.pagination import keyset_page
+from utils.cache import read_cache, EVENT
 from logger_production import get_logger
 
 log = get_logger("events_router")
@@ -17,7 +20,7 @@ log = get_logger("events_router")
 router = APIRouter()
 
 @router.post("", response_model=dict, status_code=201)
-async def create_event(
+def create_event(
     event_data: dict,
     usuario: Usuario = Depends(require_tipo(TipoUsuario.ORGANIZADOR))
 ):
@@ -47,6 +50,7 @@ async def create_event(
         )
         session.add(evento_org)
         session.commit()
+        read_cache.invalidate(event.id)
         
         log.info(f"[{usuario.email}] Evento criado: {event.name} (ID: {event.id})")
         
@@ -65,11 +69,51 @@ async def create_event(
         session.close()
 
 @router.get("", response_model=List[dict])
-async def list_events(usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))):
-    """Listar todos os eventos (requer permissão VER_EVENTOS)"""
+def list_events(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_total: bool = False,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    upcoming_days: Optional[int] = Query(None, ge=0, le=366),
+    order: str = Query("id", pattern="^(id|date|-date)$"),
+    usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
+):
+    """
+    Listar todos os eventos ativos (requer permissão VER_EVENTOS).
+    
+    Paginação por cursor: informar `limit` e seguir o header X-Next-Cursor.
+    
+    - `date_from`/`date_to`: período (inclusivo) da data do evento
+    - `upcoming_days`: eventos de agora até N dias à frente
+    - `order`: `id` (padrão), `date` ou `-date` (mais recentes primeiro)
+    
+    Filtros e ordenação por data usam starts_at e o índice
+    (active, starts_at); eventos sem data válida ficam de fora deles.
+    """
     session = SessionLocal()
     try:
-        events = session.query(Event).filter(Event.active == True).all()
+        query = session.query(Event).filter(Event.active == True)
+        
+        by_date = order != "id" or date_from or date_to or upcoming_days is not None
+        if by_date:
+            query = query.filter(Event.starts_at.isnot(None))
+        if date_from:
+            query = query.filter(Event.starts_at >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            query = query.filter(Event.starts_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+        if upcoming_days is not None:
+            now = datetime.now()
+            query = query.filter(Event.starts_at >= now, Event.starts_at <= now + timedelta(days=upcoming_days))
+        
+        if order == "id":
+            events = keyset_page(query, Event.id, response, cursor, limit, include_total)
+        else:
+            events = keyset_page(
+                query, (Event.starts_at, Event.id), response, cursor, limit, include_total,
+                descending=order == "-date"
+            )
         
         log.info(f"[{usuario.email}] Listando {len(events)} eventos")
         
@@ -79,10 +123,13 @@ async def list_events(usuario: Usuario = Depends(require_permission(Permissao.VE
                 "name": e.name,
                 "date": e.date,
                 "time": e.time,
+                "starts_at": e.starts_at.isoformat() if e.starts_at else None,
                 "active": e.active
             }
             for e in events
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         log.error(f"Erro ao listar eventos: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -90,7 +137,7 @@ async def list_events(usuario: Usuario = Depends(require_permission(Permissao.VE
         session.close()
 
 @router.get("/meus-eventos", response_model=List[dict])
-async def list_my_events(usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))):
+def list_my_events(usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))):
     """
     Listar apenas os eventos que pertencem ao usuário.
     
@@ -141,16 +188,13 @@ async def list_my_events(usuario: Usuario = Depends(require_permission(Permissao
     finally:
         session.close()
 
-@router.get("/{event_id}", response_model=dict)
-async def get_event(event_id: int):
-    """Obter evento por ID"""
+def _load_event(event_id: int):
+    """Carregar o evento para o cache de leitura (None se não existe)"""
     session = SessionLocal()
     try:
         event = session.query(Event).filter(Event.id == event_id).first()
-        
         if not event:
-            raise HTTPException(status_code=404, detail="Evento não encontrado")
-        
+            return None
         return {
             "id": event.id,
             "name": event.name,
@@ -158,16 +202,27 @@ async def get_event(event_id: int):
             "time": event.time,
             "active": event.active
         }
+    finally:
+        session.close()
+
+@router.get("/{event_id}", response_model=dict)
+def get_event(event_id: int):
+    """Obter evento por ID (servido pelo cache de leitura)"""
+    try:
+        event = read_cache.get_or_load(event_id, EVENT, lambda: _load_event(event_id))
+        
+        if not event:
+            raise HTTPException(status_code=404, detail="Evento não encontrado")
+        
+        return event
     except HTTPException:
         raise
     except Exception as e:
         log.error(f"Erro ao obter evento: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        session.close()
 
 @router.put("/{event_id}", response_model=dict)
-async def update_event(
+def update_event(
     event_id: int,
     event_data: dict,
     usuario: Usuario = Depends(require_tipo(TipoUsuario.ORGANIZADOR))
@@ -192,6 +247,7 @@ async def update_event(
         
         session.commit()
         session.refresh(event)
+        read_cache.invalidate(event_id)
         
         log.info(f"[{usuario.email}] Evento atualizado: {event.name} (ID: {event.id})")
         
@@ -212,7 +268,7 @@ async def update_event(
         session.close()
 
 @router.delete("/{event_id}", response_model=dict)
-async def delete_event(
+def delete_event(
     event_id: int,
     usuario: Usuario = Depends(require_tipo(TipoUsuario.ADMIN))
 ):
@@ -227,6 +283,7 @@ async def delete_event(
         # Soft delete: apenas marcar como inativo
         event.active = False
         session.commit()
+        read_cache.invalidate(event_id)
         
         log.info(f"[{usuario.email}] Evento deletado (soft delete): {event.name} (ID: {event.id})")
         
@@ -0,0 +1,127 @@
+"""
+live.py - Ranking e partidas ao vivo (WebSocket e Server-Sent Events)
+
+Ao conectar o cliente recebe um snapshot do ranking e depois as mudanças
+de partidas do evento:
+
+    {"type": "snapshot", "event_id", "version", "ranking": [...]}
+    {"type": "match", "action", "event_id", "version", "matches": [...], "standings": [...]}
+
+`standings` traz só as linhas alteradas (sem a posição; o cliente
+reordena por Elo). Mensagens com version menor ou igual à do último
+snapshot já estão contidas nele e podem ser ignoradas. Um novo snapshot
+pode chegar a qualquer momento (cliente lento, escrita em outro worker,
+mudança de jogadores).
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from routers.ranking import ranking_snapshot
+from utils.live import live_hub, Subscriber, RESYNC
+from logger import get_logger
+
+log = get_logger("live_router")
+
+router = APIRouter()
+
+# Intervalo do comentário de keepalive do SSE (proxies fecham conexões ociosas)
+KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+# Código de fechamento do WebSocket para evento inexistente
+CLOSE_EVENT_NOT_FOUND = 4404
+
+
+async def _snapshot(event_id: int) -> Optional[str]:
+    """Snapshot do ranking em JSON (do cache de leitura); None se o evento não existe"""
+    snapshot = await run_in_threadpool(ranking_snapshot, event_id)
+    if snapshot is None:
+        return None
+    version, ranking = snapshot
+    return json.dumps({"type": "snapshot", "event_id": event_id, "version": version, "ranking": ranking})
+
+
+async def _messages(subscriber: Subscriber):
+    """Mensagens da conexão em JSON; None a cada KEEPALIVE_SECONDS sem mudanças"""
+    while True:
+        payload = await subscriber.next(KEEPALIVE_SECONDS)
+        if payload is RESYNC:
+            payload = await live_hub.snapshot(subscriber, _snapshot)
+            if payload is None:
+                return
+        yield payload
+
+
+async def _sse(subscriber: Subscriber, first: str):
+    try:
+        yield f"data: {first}\n\n"
+        async for payload in _messages(subscriber):
+            yield ": keepalive\n\n" if payload is None else f"data: {payload}\n\n"
+    finally:
+        live_hub.unsubscribe(subscriber)
+
+
+@router.get("/{event_id}/stream")
+async def live_stream(event_id: int):
+    """
+    Mudanças do evento por Server-Sent Events (público).
+
+    Uma mensagem `data:` por mudança; comentários de keepalive quando
+    não há mudanças.
+    """
+    # Inscrever antes do snapshot: nenhuma mudança se perde entre os dois
+    subscriber = live_hub.subscribe(event_id)
+    first = await live_hub.snapshot(subscriber, _snapshot)
+    if first is None:
+        live_hub.unsubscribe(subscriber)
+        raise HTTPException(status_code=404, detail="Evento não encontrado")
+
+    log.info(f"Conexão SSE no evento {event_id}")
+    return StreamingResponse(
+        _sse(subscriber, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _send_all(websocket: WebSocket, subscriber: Subscriber) -> None:
+    async for payload in _messages(subscriber):
+        if payload is not None:
+            await websocket.send_text(payload)
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    # Mensagens do cliente são ignoradas; só interessa saber quando ele sai
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/{event_id}/ws")
+async def live_websocket(websocket: WebSocket, event_id: int):
+    """Mudanças do evento por WebSocket (público)"""
+    await websocket.accept()
+    subscriber = live_hub.subscribe(event_id)
+    try:
+        first = await live_hub.snapshot(subscriber, _snapshot)
+        if first is None:
+            await websocket.close(code=CLOSE_EVENT_NOT_FOUND)
+            return
+        await websocket.send_text(first)
+
+        tasks = [
+            asyncio.ensure_future(_send_all(websocket, subscriber)),
+            asyncio.ensure_future(_until_disconnect(websocket))
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if tasks[0] in done and tasks[1] not in done:
+            await websocket.close()
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                log.warning(f"Conexão WebSocket do evento {event_id} encerrada: {task.exception()}")
+    finally:
+        live_hub.unsubscribe(subscriber)
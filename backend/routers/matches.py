@@ -2,35 +2,43 @@
 matches.py - Router para gerenciar partidas
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
-from sqlalchemy.orm import Session
+import csv
+import io
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, aliased
 from database import SessionLocal, get_db
 from models import Match, Player, Event
 from models.usuario import Usuario
 from utils.permissions import require_permission, Permissao
-from schemas.matches import MatchCreate, MatchUpdate, MatchResponse
+from schemas.matches import (
+    MatchCreate, MatchUpdate, MatchResponse,
+    MatchBulkCreate, MatchBulkResponse, MatchBulkItemResult
+)
+from models.rating_history import RatingHistory
+from utils.standings import load_standings, record_match, sync_elo
+from utils.elo import append_match, apply_result, change_winner, remove_match
+from utils.event_lock import lock_event, unlock_event
+from utils.pagination import keyset_page
+from utils.cache import read_cache, PLAYER_READS
+from utils.etag import bump_event_version, event_etag, is_not_modified, not_modified, set_etag
+from utils.live import publish_match_delta
+from utils.metrics import metrics
+from utils.rate_limit import limiter, user_or_ip, WRITE_LIMIT, WRITE_IP_LIMIT
 from logger_production import get_logger
 
 log = get_logger("matches_router")
 
-# Função de cálculo de Elo
-def calculate_elo_change(winner_elo: float, loser_elo: float, k_factor: int = 32) -> float:
-    """
-    Calcula mudança de Elo após partida.
-    K-factor padrão de 32 para jogadores normais.
-    
-    Fórmula: change = K * (1 - expected_score)
-    expected_score = 1 / (1 + 10^((loser_elo - winner_elo)/400))
-    """
-    expected_winner = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
-    elo_change = k_factor * (1 - expected_winner)
-    return elo_change
-
 router = APIRouter()
 
 @router.post("", response_model=MatchResponse, status_code=status.HTTP_201_CREATED)
-async def create_match(
+@limiter.shared_limit(WRITE_LIMIT, scope="match_writes", key_func=user_or_ip)
+@limiter.shared_limit(WRITE_IP_LIMIT, scope="match_writes_ip")
+def create_match(
+    request: Request,
     match_data: MatchCreate,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
 ):
@@ -45,8 +53,8 @@ async def create_match(
     try:
         log.info(f"Criando partida: P1={match_data.player_1_id}, P2={match_data.player_2_id}, Winner={match_data.winner_id}")
         
-        # Validar evento existe
-        event = session.query(Event).filter(Event.id == match_data.event_id).first()
+        # Validar evento existe (e serializar as escritas do evento até o fim da rota)
+        event = lock_event(session, match_data.event_id)
         if not event:
             log.warning(f"Partida falhou: evento {match_data.event_id} não encontrado")
             raise HTTPException(status_code=404, detail="Evento não encontrado")
@@ -84,29 +92,30 @@ async def create_match(
             winner_id=match_data.winner_id
         )
         
+        # Gravar partida para obter o ID (ordem da partida no evento)
+        session.add(match)
+        session.flush()
+        
         log.info(f"Partida criada com ID={match.id}, winner_id={match.winner_id}")
         
         # Calcular mudanças de Elo APENAS se winner_id foi informado
+        append_match(session, match, p1, p2)
         if match_data.winner_id is not None:
-            if match_data.winner_id == match_data.player_1_id:
-                # Player 1 venceu
-                elo_change = calculate_elo_change(p1.initial_elo, p2.initial_elo)
-                p1.initial_elo += elo_change
-                p2.initial_elo -= elo_change
-                winner_name = p1.name
-            else:
-                # Player 2 venceu
-                elo_change = calculate_elo_change(p2.initial_elo, p1.initial_elo)
-                p2.initial_elo += elo_change
-                p1.initial_elo -= elo_change
-                winner_name = p2.name
+            winner_name = p1.name if match_data.winner_id == p1.id else p2.name
         else:
             # Sem vencedor definido
             winner_name = None
         
+        # Atualizar classificação na mesma transação da partida
+        standings = load_standings(session, match_data.event_id, [p1.id, p2.id])
+        record_match(standings, p1.id, p2.id, match_data.winner_id)
+        sync_elo(standings, [p1, p2])
+        bump_event_version(session, match_data.event_id)
+        
         # Salvar alterações
-        session.add(match)
         session.commit()
+        read_cache.invalidate(match_data.event_id, *PLAYER_READS)
+        metrics.inc("matches_created_total")
         session.refresh(match)
         
         log.info(f"DEBUG: Após commit/refresh, winner_id={match.winner_id}")
@@ -117,7 +126,7 @@ async def create_match(
         log.info(f"[{usuario.email}] Partida criada: {p1.name} vs {p2.name}, Vencedor: {winner_name}")
         log.info(f"Novo Elo - {p1.name}: {p1.initial_elo:.1f}, {p2.name}: {p2.initial_elo:.1f}")
         
-        return MatchResponse(
+        result = MatchResponse(
             id=match.id,
             event_id=match.event_id,
             player_1_id=match.player_1_id,
@@ -131,6 +140,8 @@ async def create_match(
             created_at=match.created_at,
             updated_at=match.updated_at
         )
+        publish_match_delta(session, match.event_id, "created", [result], [p1.id, p2.id])
+        return result
     except HTTPException:
         session.rollback()
         raise
@@ -140,13 +151,244 @@ async def create_match(
         raise HTTPException(status_code=400, detail=str(e))
     finally:
         session.close()
+        unlock_event(session)
+
+@router.post("/bulk", response_model=MatchBulkResponse, status_code=status.HTTP_201_CREATED)
+@limiter.shared_limit(WRITE_LIMIT, scope="match_writes", key_func=user_or_ip)
+@limiter.shared_limit(WRITE_IP_LIMIT, scope="match_writes_ip")
+def create_matches_bulk(
+    request: Request,
+    bulk_data: MatchBulkCreate,
+    usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
+):
+    """
+    Criar várias partidas de um evento em uma única transação.
+    
+    Todos os jogadores do lote são validados com uma única query e o Elo
+    é aplicado em memória na ordem de envio. Itens inválidos são
+    reportados individualmente e não impedem a gravação dos demais.
+    """
+    session = SessionLocal()
+    try:
+        event_id = bulk_data.event_id
+        log.info(f"Criando lote de {len(bulk_data.matches)} partidas no evento {event_id}")
+        
+        # Validar evento existe (e serializar as escritas do evento até o fim da rota)
+        event = lock_event(session, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Evento não encontrado")
+        
+        # Carregar todos os jogadores do lote de uma vez (apenas do evento)
+        player_ids = set()
+        for item in bulk_data.matches:
+            player_ids.update((item.player_1_id, item.player_2_id))
+        players = {
+            p.id: p for p in session.query(Player).filter(
+                Player.id.in_(player_ids), Player.event_id == event_id
+            ).all()
+        }
+        
+        # Validar itens
+        results = []
+        accepted = []
+        for index, item in enumerate(bulk_data.matches):
+            if item.player_1_id not in players or item.player_2_id not in players:
+                detail = "Um ou ambos jogadores não encontrados neste evento"
+            elif item.player_1_id == item.player_2_id:
+                detail = "Jogadores devem ser diferentes"
+            elif item.winner_id is not None and item.winner_id not in [item.player_1_id, item.player_2_id]:
+                detail = "Vencedor deve ser um dos dois jogadores"
+            else:
+                detail = None
+            
+            results.append(MatchBulkItemResult(
+                index=index,
+                status="error" if detail else "created",
+                detail=detail
+            ))
+            if not detail:
+                accepted.append((index, Match(
+                    event_id=event_id,
+                    player_1_id=item.player_1_id,
+                    player_2_id=item.player_2_id,
+                    winner_id=item.winner_id
+                )))
+        
+        if accepted:
+            # Um INSERT em lote; IDs na ordem de envio
+            session.add_all([match for _, match in accepted])
+            session.flush()
+            
+            # Aplicar Elo em memória, na ordem de envio
+            ratings = {pid: p.initial_elo for pid, p in players.items()}
+            standings = load_standings(session, event_id, players)
+            history = []
+            for index, match in accepted:
+                history.extend(apply_result(
+                    ratings, event_id, match.id,
+                    match.player_1_id, match.player_2_id, match.winner_id
+                ))
+                record_match(standings, match.player_1_id, match.player_2_id, match.winner_id)
+                
+                p1 = players[match.player_1_id]
+                p2 = players[match.player_2_id]
+                results[index].match = MatchResponse(
+                    id=match.id,
+                    event_id=event_id,
+                    player_1_id=match.player_1_id,
+                    player_2_id=match.player_2_id,
+                    winner_id=match.winner_id,
+                    player_1_name=p1.name,
+                    player_2_name=p2.name,
+                    winner_name=players[match.winner_id].name if match.winner_id else None,
+                    player_1_elo=ratings[p1.id],
+                    player_2_elo=ratings[p2.id],
+                    created_at=match.created_at,
+                    updated_at=match.updated_at
+                )
+            
+            if history:
+                session.bulk_insert_mappings(RatingHistory, history)
+            for pid, p in players.items():
+                p.initial_elo = ratings[pid]
+            sync_elo(standings, players.values())
+            bump_event_version(session, event_id)
+            
+            session.commit()
+            read_cache.invalidate(event_id, *PLAYER_READS)
+            metrics.inc("matches_created_total", value=len(accepted))
+            publish_match_delta(
+                session, event_id, "created",
+                [results[index].match for index, _ in accepted], players
+            )
+        
+        failed = len(results) - len(accepted)
+        log.info(f"[{usuario.email}] Lote no evento {event_id}: {len(accepted)} partidas criadas, {failed} rejeitadas")
+        
+        return MatchBulkResponse(
+            event_id=event_id,
+            created=len(accepted),
+            failed=failed,
+            results=results
+        )
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        log.error(f"Erro ao criar lote de partidas: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        session.close()
+        unlock_event(session)
+
+EXPORT_COLUMNS = [
+    "id", "player_1_id", "player_1_name", "player_2_id", "player_2_name",
+    "winner_id", "winner_name", "created_at"
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def _matches_query(session: Session, event_id: int):
+    """Partidas do evento com os jogadores em um único SELECT (sem query por partida)"""
+    P1, P2, W = aliased(Player), aliased(Player), aliased(Player)
+    return session.query(
+        Match.id,
+        Match.event_id,
+        Match.player_1_id,
+        Match.player_2_id,
+        Match.winner_id,
+        func.coalesce(P1.name, "Desconhecido").label("player_1_name"),
+        func.coalesce(P2.name, "Desconhecido").label("player_2_name"),
+        W.name.label("winner_name"),
+        func.coalesce(P1.initial_elo, 0).label("player_1_elo"),
+        func.coalesce(P2.initial_elo, 0).label("player_2_elo"),
+        Match.created_at,
+        Match.updated_at
+    ).outerjoin(
+        P1, P1.id == Match.player_1_id
+    ).outerjoin(
+        P2, P2.id == Match.player_2_id
+    ).outerjoin(
+        W, W.id == Match.winner_id
+    ).filter(
+        Match.event_id == event_id
+    )
+
+
+def _stream_csv(session: Session, query):
+    """Gerar o CSV em blocos; fecha a sessão ao terminar"""
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        # stream_results: cursor do lado do servidor no PostgreSQL
+        rows = query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        for i, row in enumerate(rows, 1):
+            writer.writerow([getattr(row, column) for column in EXPORT_COLUMNS])
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        session.close()
+
+
+@router.get("/{event_id}/export")
+def export_matches(event_id: int):
+    """
+    Exportar todas as partidas de um evento em CSV (público).
+    
+    A resposta é enviada em streaming, sem carregar o evento inteiro em
+    memória.
+    """
+    session = SessionLocal()
+    try:
+        event = session.query(Event).filter(Event.id == event_id).first()
+        if not event:
+            raise HTTPException(status_code=404, detail="Evento não encontrado")
+        query = _matches_query(session, event_id).order_by(Match.id)
+    except HTTPException:
+        session.close()
+        raise
+    except Exception as e:
+        session.close()
+        log.error(f"Erro ao exportar partidas: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    log.info(f"Exportando partidas do evento {event_id}")
+    return StreamingResponse(
+        _stream_csv(session, query),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="partidas_evento_{event_id}.csv"'}
+    )
+
 
 @router.get("/{event_id}", response_model=List[MatchResponse])
-async def list_matches(event_id: int):
+def list_matches(
+    event_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    player_id: Optional[int] = None,
+    winner_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_total: bool = False
+):
     """
     Listar partidas de um evento (público).
     
-    Retorna lista de partidas com IDs e nomes dos jogadores.
+    Retorna lista de partidas com IDs e nomes dos jogadores, em ordem de
+    criação. Paginação por cursor: informar `limit` e repetir a chamada
+    com `cursor` igual ao header X-Next-Cursor até ele não vir mais.
+    Filtros: `player_id` (qualquer lado), `winner_id`, `date_from`/`date_to`
+    (criação). `include_total=true` devolve X-Total-Count.
+    
+    ETag pela versão do evento: com If-None-Match igual responde 304 sem
+    consultar as partidas.
     """
     session = SessionLocal()
     try:
@@ -155,29 +397,25 @@ async def list_matches(event_id: int):
         if not event:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
         
-        matches = session.query(Match).filter(Match.event_id == event_id).all()
+        etag = event_etag("matches", event_id, event.version, request)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         
-        result = []
-        for m in matches:
-            p1 = session.query(Player).filter(Player.id == m.player_1_id).first()
-            p2 = session.query(Player).filter(Player.id == m.player_2_id).first()
-            
-            winner = session.query(Player).filter(Player.id == m.winner_id).first() if m.winner_id else None
-            
-            result.append(MatchResponse(
-                id=m.id,
-                event_id=m.event_id,
-                player_1_id=m.player_1_id,
-                player_2_id=m.player_2_id,
-                winner_id=m.winner_id,
-                player_1_name=p1.name if p1 else "Desconhecido",
-                player_2_name=p2.name if p2 else "Desconhecido",
-                winner_name=winner.name if winner else None,
-                player_1_elo=p1.initial_elo if p1 else 0,
-                player_2_elo=p2.initial_elo if p2 else 0,
-                created_at=m.created_at,
-                updated_at=m.updated_at
-            ))
+        query = _matches_query(session, event_id)
+        
+        if player_id is not None:
+            query = query.filter(or_(Match.player_1_id == player_id, Match.player_2_id == player_id))
+        if winner_id is not None:
+            query = query.filter(Match.winner_id == winner_id)
+        if date_from is not None:
+            query = query.filter(Match.created_at >= date_from)
+        if date_to is not None:
+            query = query.filter(Match.created_at <= date_to)
+        
+        # Chave do cursor: id (atribuído na inserção, mesma ordem de created_at)
+        rows = keyset_page(query, Match.id, response, cursor, limit, include_total)
+        result = [row._asdict() for row in rows]
         
         log.info(f"Listadas {len(result)} partidas do evento {event_id}")
         return result
@@ -191,7 +429,10 @@ async def list_matches(event_id: int):
         session.close()
 
 @router.put("/{match_id}", response_model=MatchResponse)
-async def update_match(
+@limiter.shared_limit(WRITE_LIMIT, scope="match_writes", key_func=user_or_ip)
+@limiter.shared_limit(WRITE_IP_LIMIT, scope="match_writes_ip")
+def update_match(
+    request: Request,
     match_id: int,
     match_data: MatchUpdate,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
@@ -203,7 +444,10 @@ async def update_match(
     """
     session = SessionLocal()
     try:
-        # Validar partida existe
+        # Validar partida existe (lida só depois de serializar as escritas do evento)
+        event_id = session.query(Match.event_id).filter(Match.id == match_id).scalar()
+        if event_id is not None:
+            lock_event(session, event_id)
         match = session.query(Match).filter(Match.id == match_id).first()
         if not match:
             raise HTTPException(status_code=404, detail="Partida não encontrada")
@@ -216,39 +460,26 @@ async def update_match(
                     detail="Vencedor deve ser um dos dois jogadores"
                 )
         
-        # Obter jogadores
-        p1 = session.query(Player).filter(Player.id == match.player_1_id).first()
-        p2 = session.query(Player).filter(Player.id == match.player_2_id).first()
+        # Trocar resultado antigo pelo novo na classificação
+        event_id = match.event_id
+        standings = load_standings(session, event_id, [match.player_1_id, match.player_2_id])
+        record_match(standings, match.player_1_id, match.player_2_id, match.winner_id, sign=-1)
+        record_match(standings, match.player_1_id, match.player_2_id, match_data.winner_id)
         
-        # Reverter Elo anterior (se havia vencedor)
-        if match.winner_id is not None:
-            if match.winner_id == match.player_1_id:
-                elo_change_old = calculate_elo_change(p1.initial_elo, p2.initial_elo)
-                p1.initial_elo -= elo_change_old
-                p2.initial_elo += elo_change_old
-            else:
-                elo_change_old = calculate_elo_change(p2.initial_elo, p1.initial_elo)
-                p2.initial_elo -= elo_change_old
-                p1.initial_elo += elo_change_old
+        # Recalcular Elo a partir desta partida (partidas posteriores incluídas)
+        affected = {match.player_1_id, match.player_2_id}
+        if match_data.winner_id != match.winner_id:
+            affected.update(change_winner(session, match, match_data.winner_id))
         
-        # Aplicar novo Elo (se novo vencedor foi informado)
+        p1 = session.query(Player).filter(Player.id == match.player_1_id).first()
+        p2 = session.query(Player).filter(Player.id == match.player_2_id).first()
         winner_name = None
-        if match_data.winner_id is not None:
-            if match_data.winner_id == match.player_1_id:
-                elo_change_new = calculate_elo_change(p1.initial_elo, p2.initial_elo)
-                p1.initial_elo += elo_change_new
-                p2.initial_elo -= elo_change_new
-                winner_name = p1.name
-            else:
-                elo_change_new = calculate_elo_change(p2.initial_elo, p1.initial_elo)
-                p2.initial_elo += elo_change_new
-                p1.initial_elo -= elo_change_new
-                winner_name = p2.name
-        
-        # Atualizar partida
-        match.winner_id = match_data.winner_id
+        if match.winner_id is not None:
+            winner_name = p1.name if match.winner_id == p1.id else p2.name
         
+        bump_event_version(session, event_id)
         session.commit()
+        read_cache.invalidate(event_id, *PLAYER_READS)
         session.refresh(match)
         session.refresh(p1)
         session.refresh(p2)
@@ -256,7 +487,7 @@ async def update_match(
         log.info(f"[{usuario.email}] Partida {match_id} atualizada. Novo vencedor: {winner_name}")
         log.info(f"Novo Elo - {p1.name}: {p1.initial_elo:.1f}, {p2.name}: {p2.initial_elo:.1f}")
         
-        return MatchResponse(
+        result = MatchResponse(
             id=match.id,
             event_id=match.event_id,
             player_1_id=match.player_1_id,
@@ -270,28 +501,58 @@ async def update_match(
             created_at=match.created_at,
             updated_at=match.updated_at
         )
+        publish_match_delta(session, event_id, "updated", [result], affected)
+        return result
+
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        log.error(f"Erro ao atualizar partida: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        session.close()
+        unlock_event(session)
+
+@router.delete("/{match_id}", response_model=dict)
+@limiter.shared_limit(WRITE_LIMIT, scope="match_writes", key_func=user_or_ip)
+@limiter.shared_limit(WRITE_IP_LIMIT, scope="match_writes_ip")
+def delete_match(
+    request: Request,
+    match_id: int,
+    usuario: Usuario = Depends(require_permission(Permissao.EDITAR_PARTIDA))
+):
+    """
+    Deletar uma partida.
+    
+    Recalcula o Elo das partidas posteriores do evento a partir do
+    checkpoint anterior à partida removida.
+    """
+    session = SessionLocal()
+    try:
+        # Partida lida só depois de serializar as escritas do evento
+        event_id = session.query(Match.event_id).filter(Match.id == match_id).scalar()
+        if event_id is not None:
+            lock_event(session, event_id)
+        match = session.query(Match).filter(Match.id == match_id).first()
+        if not match:
+            raise HTTPException(status_code=404, detail="Partida não encontrada")
         
-        # Obter jogadores
-        p1 = session.query(Player).filter(Player.id == match.player_1_id).first()
-        p2 = session.query(Player).filter(Player.id == match.player_2_id).first()
-        
-        # Reverter Elo APENAS se winner_id não é NULL
-        if match.winner_id is not None:
-            if match.winner_id == match.player_1_id:
-                elo_change = calculate_elo_change(p1.initial_elo, p2.initial_elo)
-                p1.initial_elo -= elo_change
-                p2.initial_elo += elo_change
-            else:
-                elo_change = calculate_elo_change(p2.initial_elo, p1.initial_elo)
-                p2.initial_elo -= elo_change
-                p1.initial_elo += elo_change
+        # Descontar partida da classificação
+        standings = load_standings(session, match.event_id, [match.player_1_id, match.player_2_id])
+        record_match(standings, match.player_1_id, match.player_2_id, match.winner_id, sign=-1)
         
-        # Deletar partida
-        session.delete(match)
+        # Deletar partida e recalcular sufixo
+        event_id = match.event_id
+        affected = {match.player_1_id, match.player_2_id}
+        ratings = remove_match(session, match)
+        bump_event_version(session, event_id)
         session.commit()
+        read_cache.invalidate(event_id, *PLAYER_READS)
+        publish_match_delta(session, event_id, "deleted", [{"id": match_id}], affected | set(ratings))
         
-        log.info(f"[{usuario.email}] Partida {match_id} deletada. Elo revertido.")
-        log.info(f"Novo Elo - {p1.name}: {p1.initial_elo:.1f}, {p2.name}: {p2.initial_elo:.1f}")
+        log.info(f"[{usuario.email}] Partida {match_id} deletada. Elo recalculado para {len(ratings)} jogadores.")
         
         return {
             "mensagem": "Partida deletada com sucesso",
@@ -307,3 +568,4 @@ async def update_match(
         raise HTTPException(status_code=400, detail=str(e))
     finally:
         session.close()
+        unlock_event(session)
@@ -2,12 +2,19 @@
 players.py - Router para gerenciar jogadores
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
 from database import SessionLocal
-from models import Player
+from models import Player, Match, RatingHistory
 from models.usuario import Usuario
 from utils.permissions import require_permission, Permissao
+from utils.standings import new_standing, remove_standing
+from utils.series import downsample_lttb
+from utils.pagination import keyset_page, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from utils.cache import read_cache, PLAYERS, EVENT_PLAYERS, PLAYER_READS
+from utils.upsert import insert_ignore
+from utils.etag import bump_event_version
+from utils.live import live_hub
 from logger import get_logger
 
 log = get_logger("players_router")
@@ -15,7 +22,7 @@ log = get_logger("players_router")
 router = APIRouter()
 
 @router.post("", response_model=dict, status_code=201)
-async def create_player(player_data: dict):
+def create_player(player_data: dict):
     """Criar novo jogador"""
     session = SessionLocal()
     try:
@@ -26,8 +33,13 @@ async def create_player(player_data: dict):
             initial_elo=player_data.get("initial_elo", 1600)
         )
         session.add(player)
+        session.flush()
+        session.add(new_standing(player))
+        bump_event_version(session, player.event_id)
         session.commit()
         session.refresh(player)
+        read_cache.invalidate(player.event_id, *PLAYER_READS)
+        live_hub.resync(player.event_id)  # ranking completo para quem acompanha ao vivo
         
         log.info(f"Jogador criado: {player.name} (ID: {player.id}, Elo: {player.initial_elo})")
         
@@ -45,31 +57,78 @@ async def create_player(player_data: dict):
     finally:
         session.close()
 
-@router.get("/{event_id}", response_model=List[dict])
-async def list_players(event_id: int):
-    """Listar jogadores de um evento"""
+def _player_page(event_id: int, cursor, limit, club, include_total, check_event: bool):
+    """
+    Carregar uma página de jogadores do evento para o cache de leitura.
+    
+    Retorna (lista, headers de paginação), ou None se check_event e o
+    evento não existe.
+    """
     session = SessionLocal()
     try:
-        players = session.query(Player).filter(Player.event_id == event_id).all()
+        if check_event:
+            from models import Event
+            if not session.query(Event.id).filter(Event.id == event_id).first():
+                return None
         
+        query = session.query(Player).filter(Player.event_id == event_id)
+        if club is not None:
+            query = query.filter(Player.club == club)
+        scratch = Response()
+        players = keyset_page(query, Player.id, scratch, cursor, limit, include_total)
+        headers = {
+            name: scratch.headers[name]
+            for name in (NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER) if name in scratch.headers
+        }
         return [
             {
                 "id": p.id,
                 "event_id": p.event_id,
+                "usuario_id": p.usuario_id,
                 "name": p.name,
                 "club": p.club,
                 "initial_elo": p.initial_elo
             }
             for p in players
+        ], headers
+    finally:
+        session.close()
+
+
+@router.get("/{event_id}", response_model=List[dict])
+def list_players(
+    event_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    club: Optional[str] = None,
+    include_total: bool = False
+):
+    """
+    Listar jogadores de um evento (paginação por cursor, filtro por clube).
+    
+    Servido pelo cache de leitura; invalidado pelas escritas de jogadores
+    e partidas do evento.
+    """
+    try:
+        players, headers = read_cache.get_or_load(
+            event_id, PLAYERS,
+            lambda: _player_page(event_id, cursor, limit, club, include_total, check_event=False),
+            params=(cursor, limit, club, include_total)
+        )
+        response.headers.update(headers)
+        return [
+            {key: value for key, value in p.items() if key != "usuario_id"}
+            for p in players
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         log.error(f"Erro ao listar jogadores: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        session.close()
 
 @router.get("/player/{player_id}", response_model=dict)
-async def get_player(player_id: int):
+def get_player(player_id: int):
     """Obter jogador por ID"""
     session = SessionLocal()
     try:
@@ -93,8 +152,66 @@ async def get_player(player_id: int):
     finally:
         session.close()
 
+@router.get("/player/{player_id}/rating-history", response_model=dict)
+def get_player_rating_history(
+    player_id: int,
+    max_points: int = Query(500, ge=3, le=5000)
+):
+    """
+    Obter a evolução do rating de um jogador (uma leitura do histórico).
+    
+    Séries maiores que max_points são reduzidas preservando picos e vales.
+    """
+    session = SessionLocal()
+    try:
+        player = session.query(Player).filter(Player.id == player_id).first()
+        
+        if not player:
+            raise HTTPException(status_code=404, detail="Jogador não encontrado")
+        
+        # Índice (player_id, match_id) entrega as linhas já ordenadas
+        rows = session.query(
+            RatingHistory.match_id,
+            RatingHistory.elo_before,
+            RatingHistory.elo_after,
+            RatingHistory.delta,
+            Match.created_at
+        ).join(
+            Match, Match.id == RatingHistory.match_id
+        ).filter(
+            RatingHistory.player_id == player_id
+        ).order_by(RatingHistory.match_id).all()
+        
+        points = downsample_lttb(rows, max_points, value=lambda r: r.elo_after)
+        
+        return {
+            "player_id": player.id,
+            "event_id": player.event_id,
+            "name": player.name,
+            "initial_elo": rows[0].elo_before if rows else player.initial_elo,
+            "current_elo": player.initial_elo,
+            "total_points": len(rows),
+            "points": [
+                {
+                    "match_id": r.match_id,
+                    "elo_before": r.elo_before,
+                    "elo": r.elo_after,
+                    "delta": r.delta,
+                    "played_at": r.created_at.isoformat() if r.created_at else None
+                }
+                for r in points
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Erro ao obter histórico de rating: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        session.close()
+
 @router.post("/eventos/{event_id}/inscricao", response_model=dict)
-async def register_user_to_event(
+def register_user_to_event(
     event_id: int,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
 ):
@@ -102,8 +219,8 @@ async def register_user_to_event(
     Registrar usuário autenticado como jogador em um evento.
     
     - Requer autenticação
-    - Verifica se usuário já está registrado
-    - Cria registro de Player com usuario_id
+    - Cria registro de Player com usuario_id (INSERT ... ON CONFLICT:
+      inscrições simultâneas do mesmo usuário não duplicam)
     """
     session = SessionLocal()
     try:
@@ -114,25 +231,24 @@ async def register_user_to_event(
         if not event:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
         
-        # Verificar se usuário já está registrado no evento
-        existing = session.query(Player).filter(
-            Player.event_id == event_id,
-            Player.usuario_id == usuario.id
-        ).first()
+        # Criar registro de Player; None se o usuário já está registrado
+        player_id = insert_ignore(session, Player, {
+            "event_id": event_id,
+            "usuario_id": usuario.id,
+            "name": usuario.email.split("@")[0],  # Usar parte antes do @ do email como nome
+            "initial_elo": 1600.0
+        }, ["event_id", "usuario_id"])
         
-        if existing:
+        if player_id is None:
             raise HTTPException(status_code=400, detail="Você já está registrado neste evento")
         
-        # Criar registro de Player
-        player = Player(
-            event_id=event_id,
-            usuario_id=usuario.id,
-            name=usuario.email.split("@")[0],  # Usar parte antes do @ do email como nome
-            initial_elo=1600.0
-        )
-        session.add(player)
+        player = session.get(Player, player_id)
+        session.add(new_standing(player))
+        bump_event_version(session, event_id)
         session.commit()
         session.refresh(player)
+        read_cache.invalidate(event_id, *PLAYER_READS)
+        live_hub.resync(event_id)
         
         log.info(f"[{usuario.email}] Registrou-se no evento {event.name} (ID: {event_id})")
         
@@ -155,42 +271,39 @@ async def register_user_to_event(
         session.close()
 
 @router.get("/eventos/{event_id}/inscritos", response_model=List[dict])
-async def list_event_players(event_id: int):
+def list_event_players(
+    event_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    club: Optional[str] = None,
+    include_total: bool = False
+):
     """
     Listar todos os jogadores (inscritos) de um evento.
+    
+    Mesma paginação por cursor, filtro por clube e cache de list_players.
     """
-    session = SessionLocal()
     try:
-        from models import Event
-        
-        # Verificar se evento existe
-        event = session.query(Event).filter(Event.id == event_id).first()
-        if not event:
+        page = read_cache.get_or_load(
+            event_id, EVENT_PLAYERS,
+            lambda: _player_page(event_id, cursor, limit, club, include_total, check_event=True),
+            params=(cursor, limit, club, include_total)
+        )
+        if page is None:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
         
-        players = session.query(Player).filter(Player.event_id == event_id).all()
-        
-        return [
-            {
-                "id": p.id,
-                "event_id": p.event_id,
-                "usuario_id": p.usuario_id,
-                "name": p.name,
-                "club": p.club,
-                "initial_elo": p.initial_elo
-            }
-            for p in players
-        ]
+        players, headers = page
+        response.headers.update(headers)
+        return players
     except HTTPException:
         raise
     except Exception as e:
         log.error(f"Erro ao listar jogadores do evento: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        session.close()
 
 @router.delete("/eventos/{event_id}/inscricao", response_model=dict)
-async def unregister_user_from_event(
+def unregister_user_from_event(
     event_id: int,
     usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))
 ):
@@ -210,8 +323,12 @@ async def unregister_user_from_event(
             raise HTTPException(status_code=404, detail="Você não está registrado neste evento")
         
         player_id = player.id
+        remove_standing(session, player_id)
         session.delete(player)
+        bump_event_version(session, event_id)
         session.commit()
+        read_cache.invalidate(event_id, *PLAYER_READS)
+        live_hub.resync(event_id)
         
         log.info(f"[{usuario.email}] Removeu-se do evento {event_id}")
         
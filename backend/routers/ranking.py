@@ -2,57 +2,102 @@
 ranking.py - Router para gerenciar rankings
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Optional, Tuple
 from database import SessionLocal
-from models import Player, Match
+from models import Player, Standing
+from utils.standings import rebuild_event_standings, standing_row
+from utils.cache import read_cache, RANKING
+from utils.etag import event_version, event_etag, is_not_modified, not_modified, set_etag
 from logger import get_logger
 
 log = get_logger("ranking_router")
 
 router = APIRouter()
 
-@router.get("/{event_id}", response_model=List[dict])
-async def get_ranking(event_id: int):
-    """Obter ranking de um evento (ordenado por Elo)"""
+
+def _query_standings(session, event_id: int):
+    """Ler classificação do evento já ordenada (índice event_id, elo)."""
+    return session.query(
+        Standing, Player.name, Player.club
+    ).join(
+        Player, Player.id == Standing.player_id
+    ).filter(
+        Standing.event_id == event_id
+    ).order_by(
+        Standing.elo.desc(), Standing.player_id
+    ).all()
+
+
+def _load_ranking(event_id: int) -> list:
+    """Montar o ranking do evento para o cache de leitura"""
     session = SessionLocal()
     try:
-        # Buscar jogadores do evento
-        players = session.query(Player).filter(Player.event_id == event_id).all()
+        rows = _query_standings(session, event_id)
         
-        if not players:
-            return []
-        
-        # Buscar partidas para calcular vitórias
-        matches = session.query(Match).filter(Match.event_id == event_id).all()
-        
-        # Contar vitórias e partidas por jogador
-        victories = {}
-        total_matches = {}
-        for player in players:
-            victories[player.id] = len([m for m in matches if m.winner_id == player.id])
-            total_matches[player.id] = len([m for m in matches if m.player_1_id == player.id or m.player_2_id == player.id])
+        # Evento com jogadores mas sem classificação materializada (dados antigos)
+        if not rows:
+            if not session.query(Player.id).filter(Player.event_id == event_id).first():
+                return []
+            rebuild_event_standings(session, event_id)
+            session.commit()
+            rows = _query_standings(session, event_id)
         
         # Montar ranking
-        ranking = [
-            {
-                "rank": idx + 1,
-                "player_id": p.id,
-                "name": p.name,
-                "club": p.club,
-                "elo": round(p.initial_elo, 1),
-                "victories": victories.get(p.id, 0),
-                "matches": total_matches.get(p.id, 0),
-                "win_percentage": round((victories.get(p.id, 0) / total_matches.get(p.id, 1)) * 100, 1) if total_matches.get(p.id, 0) > 0 else 0
-            }
-            for idx, p in enumerate(sorted(players, key=lambda x: x.initial_elo, reverse=True))
+        return [
+            {"rank": idx + 1, **standing_row(s, name, club)}
+            for idx, (s, name, club) in enumerate(rows)
         ]
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _current_version(event_id: int):
+    session = SessionLocal()
+    try:
+        return event_version(session, event_id)
+    finally:
+        session.close()
+
+
+def _cached_ranking(event_id: int, version) -> list:
+    # Versão na chave: o valor em cache é sempre o da versão do ETag
+    return read_cache.get_or_load(
+        event_id, RANKING, lambda: _load_ranking(event_id), params=(version,)
+    )
+
+
+def ranking_snapshot(event_id: int) -> Optional[Tuple[int, list]]:
+    """Versão e ranking atuais do evento (None se o evento não existe)"""
+    version = _current_version(event_id)
+    if version is None:
+        return None
+    return version, _cached_ranking(event_id, version)
+
+
+@router.get("/{event_id}", response_model=List[dict])
+def get_ranking(event_id: int, request: Request, response: Response):
+    """
+    Obter ranking de um evento (ordenado por Elo).
+    
+    Servido pelo cache de leitura; invalidado pelas escritas de jogadores
+    e partidas do evento. O ETag é a versão do evento: com If-None-Match
+    igual responde 304 antes de montar o ranking.
+    """
+    try:
+        version = _current_version(event_id)
+        if version is not None:
+            etag = event_etag("ranking", event_id, version, request)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+            set_etag(response, etag)
         
+        ranking = _cached_ranking(event_id, version)
         log.info(f"Ranking gerado para evento {event_id}: {len(ranking)} jogadores")
-        
         return ranking
     except Exception as e:
         log.error(f"Erro ao obter ranking: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        session.close()
@@ -1,7 +1,7 @@
 # schemas/matches.py - Pydantic models para partidas
 
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -37,6 +37,31 @@ class MatchUpdate(BaseModel):
     )
 
 
+class MatchBulkItem(BaseModel):
+    """Partida dentro de um lote (evento informado no lote)"""
+    player_1_id: int
+    player_2_id: int
+    winner_id: Optional[int] = None
+
+
+class MatchBulkCreate(BaseModel):
+    """Schema para criar várias partidas de um evento de uma vez"""
+    event_id: int
+    matches: List[MatchBulkItem] = Field(..., min_length=1, max_length=500)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "event_id": 1,
+                "matches": [
+                    {"player_1_id": 5, "player_2_id": 6, "winner_id": 5},
+                    {"player_1_id": 7, "player_2_id": 8, "winner_id": None}
+                ]
+            }
+        }
+    )
+
+
 class PlayerInfo(BaseModel):
     """Info do jogador para resposta"""
     id: int
@@ -79,6 +104,22 @@ class MatchResponse(BaseModel):
     )
 
 
+class MatchBulkItemResult(BaseModel):
+    """Resultado de um item do lote, na posição em que foi enviado"""
+    index: int
+    status: str  # "created" ou "error"
+    match: Optional[MatchResponse] = None
+    detail: Optional[str] = None
+
+
+class MatchBulkResponse(BaseModel):
+    """Resposta da criação em lote"""
+    event_id: int
+    created: int
+    failed: int
+    results: List[MatchBulkItemResult]
+
+
 class MatchList(BaseModel):
     """Schema simples para listar partidas"""
     id: int
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark da latência de escrita durante um backup do SQLite.
+
+Gera (ou reaproveita) um banco grande e mede os commits de uma thread
+escritora, no mesmo processo do backup como no agendador da aplicação,
+em três momentos: sem backup, durante a cópia antiga de uma vez
+(connection.backup sem passos, .db sem compressão) e durante o
+BackupManager.create_backup atual (passos + gzip + sha256).
+
+Uso:
+    cd backend
+    python scripts/bench_backup.py --size-mb 2048 --journal-mode wal
+    python scripts/bench_backup.py --db /tmp/bench_backup.db --journal-mode delete
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from backup_manager import BackupManager  # noqa: E402
+
+WORDS = (
+    "jogador partida evento ranking torneio vitoria derrota mesa set ponto "
+    "saque rede raquete clube cidade categoria chave grupo final semifinal"
+).split()
+
+
+def build_database(path: Path, size_mb: int, journal_mode: str):
+    """Tabela de partidas com texto semi-aleatório (compressão realista)"""
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS partidas ("
+        "id INTEGER PRIMARY KEY, event_id INTEGER, jogador_1 TEXT, jogador_2 TEXT, "
+        "placar TEXT, notas TEXT, criado_em TEXT)"
+    )
+    rng = random.Random(42)
+    target = size_mb * 1024 * 1024
+    while path.stat().st_size < target:
+        rows = [
+            (
+                rng.randint(1, 5000),
+                f"{rng.choice(WORDS).title()} {rng.randint(1, 99999)}",
+                f"{rng.choice(WORDS).title()} {rng.randint(1, 99999)}",
+                f"{rng.randint(0, 3)}-{rng.randint(0, 3)}",
+                " ".join(rng.choice(WORDS) for _ in range(120)),
+                f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+            )
+            for _ in range(20000)
+        ]
+        conn.executemany(
+            "INSERT INTO partidas (event_id, jogador_1, jogador_2, placar, notas, criado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+
+class Writer(threading.Thread):
+    """Um commit a cada `interval` segundos, como o endpoint de criar partida"""
+
+    def __init__(self, path: Path, interval: float):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.latencies = []
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(str(self.path), timeout=5)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                conn.execute(
+                    "INSERT INTO partidas (event_id, jogador_1, jogador_2, placar, notas, criado_em) "
+                    "VALUES (1, 'A', 'B', '3-1', 'bench', '2025-12-20T19:00:00')"
+                )
+                conn.commit()
+                self.latencies.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                self.errors += 1
+                conn.rollback()
+            self._stop_event.wait(self.interval)
+        conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def summary(label, writer, duration=None, size=None):
+    lat = sorted(writer.latencies)
+    if not lat:
+        print(f"{label:<28} sem escritas concluídas ({writer.errors} erros)")
+        return
+    pct = lambda q: lat[min(len(lat) - 1, int(len(lat) * q))] * 1000  # noqa: E731
+    extra = ""
+    if duration is not None:
+        extra = f"  backup {duration:6.1f}s  {size / 2**20:8.1f} MB"
+    print(
+        f"{label:<28} escritas {len(lat):5d}  p50 {pct(0.5):7.1f} ms  p99 {pct(0.99):7.1f} ms  "
+        f"max {lat[-1] * 1000:7.1f} ms  erros {writer.errors}{extra}"
+    )
+
+
+def legacy_backup(db_path: Path, backup_dir: Path) -> Path:
+    """Backup como era antes: uma chamada, .db sem compressão"""
+    target = backup_dir / "legacy.db"
+    source = sqlite3.connect(str(db_path))
+    dest = sqlite3.connect(str(target))
+    with dest:
+        source.backup(dest)
+    dest.close()
+    source.close()
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de escrita durante backups do SQLite")
+    parser.add_argument("--size-mb", type=int, default=2048, help="Tamanho do banco gerado")
+    parser.add_argument("--db", help="Banco já gerado (reaproveitado entre execuções)")
+    parser.add_argument("--journal-mode", choices=("wal", "delete"), default="wal")
+    parser.add_argument("--write-interval-ms", type=float, default=20.0)
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_backup_"))
+    db_path = Path(args.db) if args.db else work_dir / "bench.db"
+    try:
+        if not db_path.exists():
+            print(f"Gerando banco de {args.size_mb} MB em {db_path} ...")
+            build_database(db_path, args.size_mb, args.journal_mode)
+        conn = sqlite3.connect(str(db_path))
+        mode = conn.execute(f"PRAGMA journal_mode={args.journal_mode}").fetchone()[0]
+        conn.close()
+        print(f"Banco: {db_path.stat().st_size / 2**20:.0f} MB, journal_mode={mode}, "
+              f"escrita a cada {args.write_interval_ms:.0f} ms")
+
+        interval = args.write_interval_ms / 1000
+        backup_dir = work_dir / "backups"
+        backup_dir.mkdir(exist_ok=True)
+
+        writer = Writer(db_path, interval)
+        writer.start()
+        time.sleep(args.baseline_seconds)
+        writer.stop()
+        summary("sem backup", writer)
+
+        writer = Writer(db_path, interval)
+        writer.start()
+        time.sleep(0.5)
+        started = time.perf_counter()
+        target = legacy_backup(db_path, backup_dir)
+        duration = time.perf_counter() - started
+        writer.stop()
+        summary("antes: backup de uma vez", writer, duration, target.stat().st_size)
+        target.unlink()
+
+        manager = BackupManager(db_path=str(db_path), backup_dir=str(backup_dir))
+        writer = Writer(db_path, interval)
+        writer.start()
+        time.sleep(0.5)
+        started = time.perf_counter()
+        ok, msg = manager.create_backup(tag="bench")
+        duration = time.perf_counter() - started
+        writer.stop()
+        if not ok:
+            print(msg)
+            return
+        info = manager.list_backups()[0]
+        summary("agora: passos + gzip", writer, duration, info["size"])
+        print(f"  reinícios {info['restarts']}, páginas {info['pages']}, sha256 {info['sha256'][:16]}...")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark de requisições concorrentes contra um servidor uvicorn real.
+
+Cria um banco SQLite temporário com um evento grande, sobe a API em um
+subprocesso e dispara requisições pesadas (listagem de partidas) em
+paralelo com sondas leves em /health. A latência do /health mostra se o
+event loop está sendo bloqueado pelas consultas ao banco.
+
+Uso:
+    cd backend
+    python scripts/bench_concurrency.py --concurrency 20 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def seed(database_url: str, n_players: int, n_matches: int) -> int:
+    """Popular o banco temporário e retornar o id do evento"""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import random
+    from database import SessionLocal, init_db
+    from models import Event, Player, Match
+
+    init_db()
+    session = SessionLocal()
+    try:
+        event = Event(name="Benchmark", date="2025-12-20", time="19:00")
+        session.add(event)
+        session.flush()
+        players = [Player(event_id=event.id, name=f"Jogador {i}", initial_elo=1600.0) for i in range(n_players)]
+        session.add_all(players)
+        session.flush()
+
+        rng = random.Random(7)
+        rows = []
+        for _ in range(n_matches):
+            p1, p2 = rng.sample(players, 2)
+            rows.append({"event_id": event.id, "player_1_id": p1.id, "player_2_id": p2.id,
+                         "winner_id": rng.choice([p1.id, p2.id])})
+        session.bulk_insert_mappings(Match, rows)
+        session.commit()
+        return event.id
+    finally:
+        session.close()
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+
+async def run_load(base_url: str, event_id: int, total: int, concurrency: int) -> dict:
+    """Disparar `total` listagens com `concurrency` clientes e sondar /health"""
+    heavy, probes = [], []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_ready(client)
+
+        async def worker():
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                response = await client.get(f"/api/matches/{event_id}")
+                response.raise_for_status()
+                heavy.append(time.perf_counter() - started)
+
+        async def prober(done: asyncio.Event):
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        done = asyncio.Event()
+        probe_task = asyncio.create_task(prober(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    def pct(values, q):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+    return {
+        "elapsed": elapsed,
+        "throughput": total / elapsed,
+        "heavy_p50": pct(heavy, 0.50),
+        "heavy_p95": pct(heavy, 0.95),
+        "health_p50": pct(probes, 0.50),
+        "health_p95": pct(probes, 0.95),
+        "health_max": max(probes) * 1000,
+        "health_mean": statistics.mean(probes) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concorrência da API")
+    parser.add_argument("--requests", type=int, default=200, help="Total de listagens pesadas")
+    parser.add_argument("--concurrency", type=int, default=20, help="Clientes simultâneos")
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--matches", type=int, default=3000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        event_id = seed(database_url, args.players, args.matches)
+
+        env = dict(os.environ, DATABASE_URL=database_url)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        )
+        try:
+            result = asyncio.run(run_load(
+                f"http://127.0.0.1:{args.port}", event_id, args.requests, args.concurrency
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print(f"{args.requests} listagens de {args.matches} partidas, {args.concurrency} clientes")
+    print(f"  Tempo total:        {result['elapsed']:.2f}s ({result['throughput']:.1f} req/s)")
+    print(f"  Listagem p50/p95:   {result['heavy_p50']:.0f} / {result['heavy_p95']:.0f} ms")
+    print(f"  /health p50/p95:    {result['health_p50']:.1f} / {result['health_p95']:.1f} ms")
+    print(f"  /health média/máx:  {result['health_mean']:.1f} / {result['health_max']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do ranking ao vivo (SSE) contra um servidor uvicorn real.
+
+Sobe a API em um subprocesso (um worker) com um banco SQLite temporário,
+abre milhares de conexões SSE ociosas no mesmo evento e mede:
+
+- memória do worker por conexão (VmRSS antes/depois);
+- latência do /health com as conexões abertas (o event loop segue livre);
+- tempo até cada conexão receber a mudança de uma partida criada;
+- tempo até cada conexão receber o snapshot de um resync (jogador novo),
+  com a latência do /health durante ele e quantos snapshots foram montados.
+
+Uso:
+    cd backend
+    python scripts/bench_live.py --subscribers 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_concurrency import wait_ready  # noqa: E402
+
+
+def seed(database_url: str, n_players: int) -> int:
+    """Popular o banco temporário e retornar o id do evento"""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from database import SessionLocal, init_db
+    from models import Event, Player
+    from utils.standings import new_standing
+
+    init_db()
+    session = SessionLocal()
+    try:
+        event = Event(name="Ao vivo", date="2025-12-20", time="19:00")
+        session.add(event)
+        session.flush()
+        players = [Player(event_id=event.id, name=f"Jogador {i}", initial_elo=1600.0) for i in range(n_players)]
+        session.add_all(players)
+        session.flush()
+        session.add_all([new_standing(p) for p in players])
+        session.commit()
+        return event.id
+    finally:
+        session.close()
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def run_load(base_url: str, pid: int, event_id: int, subscribers: int, connect_concurrency: int) -> dict:
+    host, port = httpx.URL(base_url).host, httpx.URL(base_url).port
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_ready(client)
+
+        credentials = {"email": "bench@test.com", "senha": "Senha123!"}
+        await client.post("/api/auth/register", json={**credentials, "nome": "Bench", "tipo": "admin"})
+        token = (await client.post("/api/auth/login", json=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        player_ids = [row["player_id"] for row in (await client.get(f"/api/ranking/{event_id}")).json()[:2]]
+
+        rss_before = rss_mb(pid)
+        connected = asyncio.Semaphore(connect_concurrency)
+        ready = 0
+        all_ready = asyncio.Event()
+        received = []
+        resynced = []
+        sent_at = {}
+
+        async def subscriber():
+            # Socket cru em vez de httpx: o custo medido fica no servidor, não no cliente
+            nonlocal ready
+            async with connected:
+                reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+                writer.write(f"GET /api/live/{event_id}/stream HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            try:
+                # Corpo em chunked: cada mensagem SSE chega em um chunk próprio
+                while line := await reader.readline():
+                    if not line.startswith(b"data: "):
+                        continue
+                    message = json.loads(line[6:])
+                    if message["type"] == "snapshot" and "t" not in sent_at:
+                        ready += 1
+                        if ready == subscribers:
+                            all_ready.set()
+                    elif message["type"] == "match":
+                        received.append(time.perf_counter() - sent_at["t"])
+                    elif message["type"] == "snapshot" and "resync" in sent_at:
+                        resynced.append(time.perf_counter() - sent_at["resync"])
+                        return
+            finally:
+                writer.close()
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber()) for _ in range(subscribers)]
+        await all_ready.wait()
+        connect_time = time.perf_counter() - started
+        rss_after = rss_mb(pid)
+
+        probes = []
+        for _ in range(50):
+            probe_started = time.perf_counter()
+            await client.get("/health")
+            probes.append(time.perf_counter() - probe_started)
+            await asyncio.sleep(0.01)
+
+        sent_at["t"] = time.perf_counter()
+        response = await client.post("/api/matches", headers=headers, json={
+            "event_id": event_id, "player_1_id": player_ids[0],
+            "player_2_id": player_ids[1], "winner_id": player_ids[0]
+        })
+        response.raise_for_status()
+        while len(received) < subscribers:
+            await asyncio.sleep(0.01)
+
+        # Jogador novo: resync de todas as conexões (um snapshot montado para todas)
+        snapshots_before = (await client.get("/api/admin/live/stats", headers=headers)).json()["snapshots"]
+        sent_at["resync"] = time.perf_counter()
+        response = await client.post("/api/players", headers=headers, json={
+            "event_id": event_id, "name": "Jogador novo"
+        })
+        response.raise_for_status()
+        resync_probes = []
+        while len(resynced) < subscribers:
+            probe_started = time.perf_counter()
+            await client.get("/health")
+            resync_probes.append(time.perf_counter() - probe_started)
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=120)
+        stats = (await client.get("/api/admin/live/stats", headers=headers)).json()
+
+    return {
+        "connect_time": connect_time,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+        "health_p50": pct(probes, 0.50),
+        "health_p95": pct(probes, 0.95),
+        "fanout_p50": pct(received, 0.50),
+        "fanout_p99": pct(received, 0.99),
+        "fanout_max": max(received) * 1000,
+        "received": len(received),
+        "overflows": stats["overflows"],
+        "resync_p50": pct(resynced, 0.50),
+        "resync_max": max(resynced) * 1000,
+        "resync_health_max": max(resync_probes, default=0) * 1000,
+        "resync_snapshots": stats["snapshots"] - snapshots_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do ranking ao vivo (SSE)")
+    parser.add_argument("--subscribers", type=int, default=5000, help="Conexões SSE simultâneas")
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="Conexões abertas em paralelo")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    # Cada conexão usa um descritor no cliente e outro no servidor
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 2 * args.subscribers + 256)), hard))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        event_id = seed(database_url, args.players)
+
+        env = dict(os.environ, DATABASE_URL=database_url)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+             "--log-level", "warning", "--backlog", "4096"],
+            cwd=BACKEND_DIR, env=env
+        )
+        try:
+            result = asyncio.run(run_load(
+                f"http://127.0.0.1:{args.port}", server.pid, event_id,
+                args.subscribers, args.connect_concurrency
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    per_connection = (result["rss_after"] - result["rss_before"]) * 1024 / args.subscribers
+    print(f"{args.subscribers} conexões SSE ociosas em um worker")
+    print(f"  Tempo para conectar: {result['connect_time']:.2f}s")
+    print(f"  Memória do worker:   {result['rss_before']:.0f} -> {result['rss_after']:.0f} MB "
+          f"({per_connection:.1f} KB/conexão)")
+    print(f"  /health p50/p95:     {result['health_p50']:.1f} / {result['health_p95']:.1f} ms")
+    print(f"  Entrega da partida:  p50 {result['fanout_p50']:.0f} / p99 {result['fanout_p99']:.0f} / "
+          f"máx {result['fanout_max']:.0f} ms ({result['received']} conexões, {result['overflows']} filas cheias)")
+    print(f"  Snapshot do resync:  p50 {result['resync_p50']:.0f} / máx {result['resync_max']:.0f} ms, "
+          f"/health máx {result['resync_health_max']:.1f} ms, {result['resync_snapshots']} snapshot(s) montado(s)")
+
+
+if __name__ == "__main__":
+    main()
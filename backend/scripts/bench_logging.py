@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo dos logs na latência das requisições.
+
+Sobe a API em um subprocesso (um worker) três vezes com o mesmo banco
+inicial e cria partidas em paralelo (cada criação gera várias linhas INFO):
+
+- sync:  handlers escrevendo na thread da requisição (LOG_ASYNC=0);
+- async: QueueHandler + thread de escrita (padrão);
+- off:   LOG_LEVEL=ERROR, nenhuma linha INFO é gerada.
+
+O console do servidor vai para um arquivo, como num serviço real.
+
+Uso:
+    cd backend
+    python scripts/bench_logging.py --concurrency 10 --requests 400
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_concurrency import wait_ready  # noqa: E402
+from bench_live import seed  # noqa: E402
+
+CONFIGS = {
+    "sync": {"LOG_ASYNC": "0"},
+    "async": {"LOG_ASYNC": "1"},
+    "off": {"LOG_LEVEL": "ERROR"},
+}
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def run_load(base_url: str, event_id: int, total: int, concurrency: int) -> dict:
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_ready(client)
+        credentials = {"email": "bench@test.com", "senha": "Senha123!"}
+        await client.post("/api/auth/register", json={**credentials, "nome": "Bench", "tipo": "admin"})
+        token = (await client.post("/api/auth/login", json=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        player_ids = [row["player_id"] for row in (await client.get(f"/api/ranking/{event_id}")).json()]
+
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                p1, p2 = player_ids[i % len(player_ids)], player_ids[(i * 7 + 1) % len(player_ids)]
+                if p1 == p2:
+                    p2 = player_ids[(i + 1) % len(player_ids)]
+                started = time.perf_counter()
+                response = await client.post("/api/matches", headers=headers, json={
+                    "event_id": event_id, "player_1_id": p1, "player_2_id": p2, "winner_id": p1
+                })
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        health = (await client.get("/api/admin/system/health", headers=headers)).json()
+
+    return {
+        "throughput": total / elapsed,
+        "p50": pct(latencies, 0.50),
+        "p95": pct(latencies, 0.95),
+        "p99": pct(latencies, 0.99),
+        "queue": health["logs"]["queue"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do custo dos logs")
+    parser.add_argument("--requests", type=int, default=400, help="Partidas criadas por configuração")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = Path(tmp) / "template.db"
+        event_id = seed(f"sqlite:///{template}", args.players)
+        import database
+        database.engine.dispose()  # fecha as conexões: o WAL volta para o arquivo antes da cópia
+
+        print(f"{args.requests} partidas, {args.concurrency} clientes, 1 worker")
+        for name, extra_env in CONFIGS.items():
+            run_dir = Path(tmp) / name
+            run_dir.mkdir()
+            shutil.copy(template, run_dir / "bench.db")
+            env = dict(
+                os.environ, DATABASE_URL=f"sqlite:///{run_dir / 'bench.db'}",
+                LOG_DIR=str(run_dir / "logs"), RATE_LIMIT_ENABLED="0", **extra_env
+            )
+            with open(run_dir / "console.log", "w") as console:
+                server = subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+                     "--log-level", "warning", "--no-access-log"],
+                    cwd=BACKEND_DIR, env=env, stdout=console, stderr=console
+                )
+                try:
+                    result = asyncio.run(run_load(
+                        f"http://127.0.0.1:{args.port}", event_id, args.requests, args.concurrency
+                    ))
+                finally:
+                    server.terminate()
+                    server.wait(timeout=10)
+
+            app_log = run_dir / "logs" / "app.log"
+            lines = sum(1 for _ in open(app_log)) if app_log.exists() else 0
+            queue = result["queue"]
+            dropped = queue.get("dropped", "-")
+            print(f"  [{name:5}] {result['throughput']:6.1f} req/s  "
+                  f"p50 {result['p50']:5.1f} / p95 {result['p95']:5.1f} / p99 {result['p99']:5.1f} ms  "
+                  f"({lines} linhas em app.log, descartadas: {dropped})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark de logins concorrentes contra um servidor uvicorn real.
+
+Roda o mesmo teste com duas configurações do pool de senhas:
+
+- ilimitado: bcrypt ocupa quantas threads do threadpool houver pedidos
+  (comportamento anterior ao password_pool);
+- limitado: PASSWORD_WORKERS/PASSWORD_MAX_PENDING padrão, excesso
+  recusado com 503.
+
+Durante os logins, sondas em GET /api/events (rota síncrona com banco)
+mostram se as outras rotas continuam sendo atendidas.
+
+Uso:
+    cd backend
+    python scripts/bench_login.py --concurrency 50 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_concurrency import wait_ready  # noqa: E402
+
+CREDENTIALS = {"email": "bench@test.com", "senha": "Senha123!"}
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def run_load(base_url: str, total: int, concurrency: int) -> dict:
+    logins, rejected, probes = [], 0, []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_ready(client)
+        await client.post("/api/auth/register", json={**CREDENTIALS, "nome": "Bench", "tipo": "usuario"})
+
+        async def worker():
+            nonlocal rejected
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login", json=CREDENTIALS)
+                if response.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                    queue.put_nowait(None)  # cliente tenta de novo
+                    continue
+                response.raise_for_status()
+                logins.append(time.perf_counter() - started)
+
+        async def prober(done: asyncio.Event):
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/events")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        done = asyncio.Event()
+        probe_task = asyncio.create_task(prober(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "elapsed": elapsed,
+        "throughput": total / elapsed,
+        "login_p50": pct(logins, 0.50),
+        "login_p95": pct(logins, 0.95),
+        "rejected": rejected,
+        "probe_p50": pct(probes, 0.50),
+        "probe_p95": pct(probes, 0.95),
+    }
+
+
+def run_server(port: int, database_url: str, extra_env: dict, total: int, concurrency: int) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, **extra_env)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        return asyncio.run(run_load(f"http://127.0.0.1:{port}", total, concurrency))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de login concorrente")
+    parser.add_argument("--requests", type=int, default=200, help="Total de logins")
+    parser.add_argument("--concurrency", type=int, default=50, help="Clientes simultâneos")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    configs = {
+        "ilimitado": {"PASSWORD_WORKERS": "40", "PASSWORD_MAX_PENDING": "100000"},
+        "limitado": {},
+    }
+    print(f"{args.requests} logins, {args.concurrency} clientes, {os.cpu_count()} CPUs")
+    for name, extra_env in configs.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_server(
+                args.port, f"sqlite:///{Path(tmp) / 'bench.db'}", extra_env, args.requests, args.concurrency
+            )
+        print(f"  [{name}]")
+        print(f"    Vazão:               {result['throughput']:.1f} logins/s ({result['elapsed']:.1f}s)")
+        print(f"    Login p50/p95:       {result['login_p50']:.0f} / {result['login_p95']:.0f} ms")
+        print(f"    Recusados (503):     {result['rejected']}")
+        print(f"    GET /api/events p50/p95: {result['probe_p50']:.0f} / {result['probe_p95']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
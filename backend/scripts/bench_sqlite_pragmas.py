@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência leitura/escrita no SQLite com e sem o perfil de PRAGMAs.
+
+Cada modo roda em um processo separado (as variáveis SQLITE_* são lidas na
+importação de database.py) sobre um banco temporário: threads escritoras
+inserem partidas com um commit por partida, como o endpoint de criação, e
+threads leitoras listam as partidas do evento.
+
+Uso:
+    cd backend
+    python scripts/bench_sqlite_pragmas.py --seconds 10 --writers 2 --readers 6
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def run_child(args) -> dict:
+    """Executar a carga no processo atual (DATABASE_URL já configurada)"""
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from sqlalchemy.exc import OperationalError
+    from database import SessionLocal, init_db, effective_sqlite_pragmas
+    from models import Event, Player, Match
+
+    init_db()
+    session = SessionLocal()
+    event = Event(name="Benchmark", date="2025-12-20", time="19:00")
+    session.add(event)
+    session.flush()
+    players = [Player(event_id=event.id, name=f"J{i}") for i in range(32)]
+    session.add_all(players)
+    session.flush()
+    event_id, player_ids = event.id, [p.id for p in players]
+    session.bulk_insert_mappings(Match, [
+        {"event_id": event_id, "player_1_id": player_ids[i % 32], "player_2_id": player_ids[(i + 1) % 32],
+         "winner_id": player_ids[i % 32]}
+        for i in range(args.matches)
+    ])
+    session.commit()
+    session.close()
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            s = SessionLocal()
+            try:
+                s.add(Match(event_id=event_id, player_1_id=player_ids[i % 32],
+                            player_2_id=player_ids[(i + 3) % 32], winner_id=player_ids[i % 32]))
+                s.commit()
+                bump("writes")
+            except OperationalError:
+                s.rollback()
+                bump("errors")
+            finally:
+                s.close()
+            i += 1
+
+    def reader():
+        while time.monotonic() < deadline:
+            s = SessionLocal()
+            try:
+                s.query(Match.id, Match.winner_id).filter(Match.event_id == event_id).order_by(Match.id).all()
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+            finally:
+                s.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    counts["pragmas"] = effective_sqlite_pragmas()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do perfil de PRAGMAs do SQLite")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--matches", type=int, default=2000, help="Partidas pré-carregadas")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    for label, tuning in (("sem perfil", "0"), ("com perfil", "1")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, SQLITE_TUNING=tuning,
+                       DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}")
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", "--seconds", str(args.seconds),
+                 "--writers", str(args.writers), "--readers", str(args.readers),
+                 "--matches", str(args.matches)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{label}: {result['pragmas']}")
+        print(f"  escritas: {result['writes'] / args.seconds:.1f}/s  "
+              f"leituras: {result['reads'] / args.seconds:.1f}/s  "
+              f"erros (database is locked): {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
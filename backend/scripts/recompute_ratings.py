@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular o Elo de eventos em lote.
+Usar após mudar ELO_K_FACTOR ou corrigir partidas diretamente no banco.
+
+Uso:
+    cd backend
+    python scripts/recompute_ratings.py --all --workers 4
+    python scripts/recompute_ratings.py --event-id 3 --event-id 7
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Adicionar diretório do backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import SessionLocal, init_db
+from models import Event
+from utils.elo import K_FACTOR
+from utils.elo_batch import recompute_events
+
+
+def main():
+    """Recalcular o Elo dos eventos informados"""
+    parser = argparse.ArgumentParser(description="Recalcular Elo em lote")
+    parser.add_argument("--event-id", type=int, action="append", default=[],
+                        help="Evento a recalcular (pode repetir)")
+    parser.add_argument("--all", action="store_true", help="Recalcular todos os eventos")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para calcular eventos em paralelo")
+    args = parser.parse_args()
+
+    if not args.all and not args.event_id:
+        parser.error("informe --event-id ou --all")
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        if args.all:
+            event_ids = [row[0] for row in db.query(Event.id).order_by(Event.id).all()]
+        else:
+            event_ids = args.event_id
+
+        print(f"Recalculando {len(event_ids)} eventos (K={K_FACTOR}, workers={args.workers})...")
+        summary = recompute_events(db, event_ids, workers=args.workers)
+
+        for event_id, total in summary.items():
+            print(f"  • Evento {event_id}: {total} partidas")
+        print(f"Total: {sum(summary.values())} partidas")
+
+    except Exception as e:
+        print(f"❌ Erro ao recalcular: {e}")
+        db.rollback()
+        sys.exit(1)
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
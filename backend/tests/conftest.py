@@ -1,11 +1,14 @@
 import os
 import pytest
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
-# Configurar variável de ambiente ANTES de qualquer import
-os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+# Configurar variável de ambiente ANTES de qualquer import.
+# TEST_DATABASE_URL permite rodar contra um PostgreSQL local descartável
+# (as tabelas são recriadas a cada teste); sem ela, SQLite em memória.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite:///:memory:")
 
 # Importar models para registrar
 from models.usuario import Usuario  # noqa
@@ -16,6 +19,10 @@ from models.match import Match  # noqa
 # Agora importar database e main
 from database import Base, get_db, init_db
 from main import app
+from utils.cache import read_cache
+from utils.auth_cache import auth_cache
+from utils import rate_limit
+from utils.query_tracker import capture_queries
 import database
 
 
@@ -49,8 +56,11 @@ def test_db():
     
     yield engine
     
-    # Cleanup
+    # Cleanup (ids se repetem entre testes: descartar os caches)
     Base.metadata.drop_all(bind=engine)
+    read_cache.clear()
+    auth_cache.clear()
+    rate_limit.reset()
     app.dependency_overrides.clear()
 
 
@@ -60,6 +70,48 @@ def client(test_db):
     return TestClient(app)
 
 
+@pytest.fixture
+def test_admin_token(test_db, client):
+    """Fixture para obter token de admin"""
+    # Fazer login ou registrar
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "admin@test.com", "senha": "Senha123!"}
+    )
+    
+    # Se login falhar, primeiro registrar como admin
+    if response.status_code != 200:
+        client.post(
+            "/api/auth/register",
+            json={
+                "email": "admin@test.com",
+                "nome": "Admin",
+                "senha": "Senha123!",
+                "tipo": "admin"
+            }
+        )
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "admin@test.com", "senha": "Senha123!"}
+        )
+    
+    return response.json().get("access_token")
+
+
+@pytest.fixture
+def max_queries(test_db):
+    """
+    Orçamento de consultas SQL para um trecho do teste:
 
+        with max_queries(4):
+            client.get(f"/api/matches/{event_id}")
 
+    Falha listando as consultas mais repetidas (suspeitas de N+1).
+    """
+    @contextmanager
+    def check(limit: int):
+        with capture_queries(database.engine) as tracker:
+            yield tracker
+        assert tracker.count <= limit, f"Mais de {limit} consultas: {tracker.report()}"
 
+    return check
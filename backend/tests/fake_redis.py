@@ -0,0 +1,145 @@
+"""
+Servidor local que fala o protocolo do Redis (RESP2) para os testes.
+
+Implementa só os comandos usados pelo RedisBackend do cache: strings,
+hashes, expiração e pub/sub. Os dados ficam em memória.
+"""
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+
+class FakeRedisServer:
+    """Servidor RESP em uma porta livre de 127.0.0.1, em thread de fundo"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.subscribers = defaultdict(set)
+        self.lock = threading.RLock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.write_lock = threading.Lock()
+                try:
+                    while True:
+                        command = self._read_command()
+                        if command is None:
+                            break
+                        reply = server.execute(self, command)
+                        if reply is not None:
+                            self.send(reply)
+                finally:
+                    with server.lock:
+                        for handlers in server.subscribers.values():
+                            handlers.discard(self)
+
+            def send(self, payload: bytes):
+                with self.write_lock:
+                    self.wfile.write(payload)
+                    self.wfile.flush()
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                count = int(line[1:].strip())
+                args = []
+                for _ in range(count):
+                    length = int(self.rfile.readline()[1:].strip())
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Codificação RESP
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    @classmethod
+    def _array(cls, items):
+        return b"*%d\r\n" % len(items) + b"".join(
+            b":%d\r\n" % i if isinstance(i, int) else cls._bulk(i) for i in items
+        )
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, conn, args):
+        name = args[0].upper().decode()
+        with self.lock:
+            if name == "PING":
+                return b"+PONG\r\n"
+            if name in ("CLIENT", "SELECT"):
+                return b"+OK\r\n"
+            if name == "GET":
+                return self._bulk(self.data.get(args[1]) if self._alive(args[1]) else None)
+            if name == "SET":
+                self.data[args[1]] = args[2]
+                self.expires.pop(args[1], None)
+                return b"+OK\r\n"
+            if name in ("INCR", "INCRBY"):
+                step = int(args[2]) if name == "INCRBY" else 1
+                value = int(self.data.get(args[1], b"0") if self._alive(args[1]) else 0) + step
+                self.data[args[1]] = str(value).encode()
+                return b":%d\r\n" % value
+            if name == "DEL":
+                removed = 0
+                for key in args[1:]:
+                    if self._alive(key):
+                        removed += 1
+                    self.data.pop(key, None)
+                    self.expires.pop(key, None)
+                return b":%d\r\n" % removed
+            if name == "HGET":
+                fields = self.data.get(args[1], {}) if self._alive(args[1]) else {}
+                return self._bulk(fields.get(args[2]))
+            if name == "HSET":
+                self._alive(args[1])  # descarta o hash se expirou
+                fields = self.data.setdefault(args[1], {})
+                added = sum(1 for f in args[2::2] if f not in fields)
+                for field, value in zip(args[2::2], args[3::2]):
+                    fields[field] = value
+                return b":%d\r\n" % added
+            if name == "PEXPIRE":
+                if not self._alive(args[1]):
+                    return b":0\r\n"
+                self.expires[args[1]] = time.monotonic() + int(args[2]) / 1000
+                return b":1\r\n"
+            if name == "PUBLISH":
+                receivers = list(self.subscribers.get(args[1], ()))
+                for receiver in receivers:
+                    receiver.send(self._array([b"message", args[1], args[2]]))
+                return b":%d\r\n" % len(receivers)
+            if name == "SUBSCRIBE":
+                for i, channel in enumerate(args[1:], 1):
+                    self.subscribers[channel].add(conn)
+                    conn.send(self._array([b"subscribe", channel, i]))
+                return None
+            if name == "UNSUBSCRIBE":
+                channels = args[1:] or [c for c, s in self.subscribers.items() if conn in s]
+                for i, channel in enumerate(channels):
+                    self.subscribers[channel].discard(conn)
+                    conn.send(self._array([b"unsubscribe", channel, len(channels) - i - 1]))
+                if not channels:
+                    conn.send(self._array([b"unsubscribe", None, 0]))
+                return None
+            return b"-ERR unknown command '%s'\r\n" % name.encode()
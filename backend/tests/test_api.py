@@ -9,34 +9,6 @@ from models.match import Match
 from utils.security import hash_password
 
 
-@pytest.fixture
-def test_admin_token(test_db, client):
-    """Fixture para obter token de admin"""
-    # Fazer login ou registrar
-    response = client.post(
-        "/api/auth/login",
-        json={"email": "admin@test.com", "senha": "Senha123!"}
-    )
-    
-    # Se login falhar, primeiro registrar como admin
-    if response.status_code != 200:
-        client.post(
-            "/api/auth/register",
-            json={
-                "email": "admin@test.com",
-                "nome": "Admin",
-                "senha": "Senha123!",
-                "tipo": "admin"
-            }
-        )
-        response = client.post(
-            "/api/auth/login",
-            json={"email": "admin@test.com", "senha": "Senha123!"}
-        )
-    
-    return response.json().get("access_token")
-
-
 class TestAuthRouter:
     """Testes para autenticação"""
 
@@ -119,6 +91,60 @@ class TestAuthRouter:
         )
         assert response.status_code == 401  # Senha incorreta
 
+    def test_login_rehashes_on_cost_change(self, client, monkeypatch):
+        """Hash com custo antigo é refeito no login"""
+        import bcrypt
+        import database
+        from utils import security
+
+        session = database.SessionLocal()
+        old_hash = bcrypt.hashpw(b"Senha123!", bcrypt.gensalt(rounds=5)).decode()
+        session.add(Usuario(email="custo@test.com", nome="Custo", senha_hash=old_hash, tipo="jogador"))
+        session.commit()
+
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+        response = client.post("/api/auth/login", json={"email": "custo@test.com", "senha": "Senha123!"})
+        assert response.status_code == 200
+
+        session.expire_all()
+        new_hash = session.query(Usuario).filter(Usuario.email == "custo@test.com").one().senha_hash
+        session.close()
+        assert new_hash.startswith("$2b$04$")
+        assert security.verify_password("Senha123!", new_hash)
+
+    def test_password_pool_saturated_returns_503(self, client, monkeypatch):
+        """Pool de bcrypt cheio recusa na hora com 503"""
+        from utils import security
+
+        monkeypatch.setattr(security, "password_pool", security.PasswordPool(workers=1, max_pending=0))
+        response = client.post(
+            "/api/auth/register",
+            json={"email": "ocupado@test.com", "nome": "Ocupado", "senha": "Senha123!", "tipo": "usuario"}
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert security.password_pool.stats()["rejected"] == 1
+
+    def test_login_rate_limited_per_ip(self, client):
+        """Rajada de logins do mesmo IP recebe 429 com Retry-After"""
+        from utils import rate_limit
+        from limits import parse_many
+
+        allowed = min(item.amount for item in parse_many(rate_limit.LOGIN_LIMIT))
+        statuses = [
+            client.post("/api/auth/login", json={"email": "ninguem@test.com", "senha": "Senha123!"}).status_code
+            for _ in range(allowed + 2)
+        ]
+        assert statuses == [401] * allowed + [429, 429]
+
+        response = client.post("/api/auth/login", json={"email": "ninguem@test.com", "senha": "Senha123!"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.headers["error_code"] == "RATE_LIMITED"
+        assert rate_limit.stats()["rejected"] == [
+            {"method": "POST", "route": "/api/auth/login", "key": "ip", "count": 3}
+        ]
+
 
 class TestEventRouter:
     """Testes para gerenciamento de eventos"""
@@ -159,6 +185,35 @@ class TestEventRouter:
         assert response.status_code == 200
         assert len(response.json()) >= 1
 
+    def test_list_events_by_date(self, client, test_admin_token):
+        """Testa filtro por período e ordenação por data (starts_at)"""
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        for name, day, hour in [("C", "2026-03-10", "10:00"), ("A", "2026-01-05", "19:00"),
+                                ("B", "2026-03-10", "09:00"), ("D", "2026-05-01", "14:00")]:
+            client.post("/api/events", json={"name": name, "date": day, "time": hour}, headers=headers)
+        
+        names = []
+        cursor = None
+        while True:
+            params = {"order": "date", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/events", params=params, headers=headers)
+            assert response.status_code == 200
+            names += [e["name"] for e in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert names == ["A", "B", "C", "D"]
+        
+        march = client.get(
+            "/api/events",
+            params={"date_from": "2026-03-01", "date_to": "2026-03-10", "order": "-date"},
+            headers=headers
+        ).json()
+        assert [e["name"] for e in march] == ["C", "B"]
+        assert march[1]["starts_at"] == "2026-03-10T09:00:00"
+
     def test_get_event_by_id(self, client, test_admin_token):
         """Testa obter evento por ID"""
         # Criar evento
@@ -244,6 +299,35 @@ class TestPlayerRouter:
         assert response.status_code == 200
         assert len(response.json()) == 3
 
+    def test_register_to_event_once(self, client, test_admin_token):
+        """Testa que a inscrição usa ON CONFLICT e não duplica o jogador"""
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "Torneio", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        
+        first = client.post(f"/api/players/eventos/{event_id}/inscricao", headers=headers)
+        second = client.post(f"/api/players/eventos/{event_id}/inscricao", headers=headers)
+        
+        assert first.status_code == 200
+        assert second.status_code == 400
+        inscritos = client.get(f"/api/players/eventos/{event_id}/inscritos", headers=headers).json()
+        assert len(inscritos) == 1
+
+    def test_insert_ignore_postgres_statement(self):
+        """Testa o SQL gerado para PostgreSQL pelo insert_ignore"""
+        from unittest.mock import MagicMock
+        from sqlalchemy.dialects import postgresql
+        from utils.upsert import insert_ignore
+        
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "postgresql"
+        insert_ignore(session, Player, {"event_id": 1, "usuario_id": 2, "name": "x"}, ["event_id", "usuario_id"])
+        
+        stmt = session.execute.call_args[0][0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (event_id, usuario_id) DO NOTHING RETURNING player.id" in sql
+
 
 class TestMatchRouter:
     """Testes para gerenciamento de partidas"""
@@ -337,6 +421,136 @@ class TestMatchRouter:
         assert response.json()["winner_id"] == p1_id
 
 
+    def test_bulk_create_matches(self, client, setup_match_test):
+        """Testa criação em lote: itens válidos gravados, inválidos reportados"""
+        token, event_id, p1_id, p2_id = setup_match_test
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = client.post(
+            "/api/matches/bulk",
+            json={
+                "event_id": event_id,
+                "matches": [
+                    {"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": p1_id},
+                    {"player_1_id": p1_id, "player_2_id": 9999, "winner_id": p1_id},
+                    {"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": p2_id},
+                    {"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": None}
+                ]
+            },
+            headers=headers
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert data["created"] == 3
+        assert data["failed"] == 1
+        assert [r["status"] for r in data["results"]] == ["created", "error", "created", "created"]
+        assert data["results"][0]["match"]["player_1_elo"] == 1616.0
+        
+        # Mesmo resultado que criar as partidas uma a uma
+        listed = client.get(f"/api/matches/{event_id}", headers=headers).json()
+        assert len(listed) == 3
+        ranking = client.get(f"/api/ranking/{event_id}", headers=headers).json()
+        by_id = {r["player_id"]: r for r in ranking}
+        last = data["results"][3]["match"]
+        assert by_id[p1_id]["elo"] == round(last["player_1_elo"], 1)
+        assert by_id[p1_id]["matches"] == 3 and by_id[p1_id]["victories"] == 1
+
+
+    def test_list_matches_constant_queries(self, client, setup_match_test):
+        """Testa que listar partidas não faz uma query por partida"""
+        from sqlalchemy import event
+        import database
+        
+        token, event_id, p1_id, p2_id = setup_match_test
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post(
+            "/api/matches/bulk",
+            json={
+                "event_id": event_id,
+                "matches": [
+                    {"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": w}
+                    for w in [p1_id, p2_id, None] * 5
+                ]
+            },
+            headers=headers
+        )
+        
+        statements = []
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(database.engine, "before_cursor_execute", count)
+        try:
+            response = client.get(f"/api/matches/{event_id}", headers=headers)
+        finally:
+            event.remove(database.engine, "before_cursor_execute", count)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 15
+        assert data[0]["winner_name"] == "Jogador 1"
+        assert data[2]["winner_name"] is None
+        assert len(statements) <= 2
+
+    def test_list_matches_keyset_pagination(self, client, setup_match_test):
+        """Testa paginação por cursor e filtros na listagem de partidas"""
+        token, event_id, p1_id, p2_id = setup_match_test
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post(
+            "/api/matches/bulk",
+            json={
+                "event_id": event_id,
+                "matches": [
+                    {"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": w}
+                    for w in [p1_id, p2_id, p1_id] * 4
+                ]
+            },
+            headers=headers
+        )
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 5, "include_total": True}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(f"/api/matches/{event_id}", params=params, headers=headers)
+            assert response.status_code == 200
+            assert response.headers["X-Total-Count"] == "12"
+            seen.extend(m["id"] for m in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert len(seen) == 12 and seen == sorted(seen)
+        
+        wins = client.get(f"/api/matches/{event_id}", params={"winner_id": p2_id}, headers=headers)
+        assert len(wins.json()) == 4
+        assert client.get(
+            f"/api/matches/{event_id}", params={"cursor": "???"}, headers=headers
+        ).status_code == 400
+
+    def test_export_matches_csv(self, client, setup_match_test):
+        """Testa a exportação em CSV (streaming) das partidas"""
+        token, event_id, p1_id, p2_id = setup_match_test
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post(
+            "/api/matches/bulk",
+            json={
+                "event_id": event_id,
+                "matches": [{"player_1_id": p1_id, "player_2_id": p2_id, "winner_id": p1_id}] * 3
+            },
+            headers=headers
+        )
+        
+        response = client.get(f"/api/matches/{event_id}/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.strip().splitlines()
+        assert lines[0].startswith("id,player_1_id,player_1_name")
+        assert len(lines) == 4
+        assert "Jogador 1" in lines[1]
+        assert client.get("/api/matches/9999/export").status_code == 404
+
+
 class TestRankingRouter:
     """Testes para ranking/Elo"""
 
@@ -0,0 +1,216 @@
+"""
+Testes dos caches: leitura por evento (LRU + TTL + invalidação) e autenticação
+"""
+import time
+import pytest
+from utils.cache import EventCache, RANKING, PLAYERS, read_cache
+
+
+class TestEventCache:
+    """Comportamento do EventCache"""
+
+    def test_hit_miss_and_lru_eviction(self):
+        cache = EventCache(max_entries=2, ttl=60)
+        calls = []
+        load = lambda v: (lambda: calls.append(v) or v)
+
+        assert cache.get_or_load(1, RANKING, load("a")) == "a"
+        assert cache.get_or_load(1, RANKING, load("x")) == "a"
+        cache.get_or_load(2, RANKING, load("b"))
+        cache.get_or_load(1, RANKING, load("x"))  # 1 vira o mais recente
+        cache.get_or_load(3, RANKING, load("c"))  # descarta 2
+
+        assert cache.get_or_load(2, RANKING, load("b2")) == "b2"
+        assert calls == ["a", "b", "c", "b2"]
+        stats = cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 4 and stats["evictions"] == 2
+
+    def test_ttl_expiry(self):
+        cache = EventCache(ttl=0)
+        cache.get_or_load(1, RANKING, lambda: "old")
+        assert cache.get_or_load(1, RANKING, lambda: "new") == "new"
+
+    def test_invalidate_by_name_and_event(self):
+        cache = EventCache()
+        cache.get_or_load(1, RANKING, lambda: "r1")
+        cache.get_or_load(1, PLAYERS, lambda: "p1")
+        cache.get_or_load(2, RANKING, lambda: "r2")
+
+        cache.invalidate(1, RANKING)
+        assert cache.get_or_load(1, RANKING, lambda: "r1b") == "r1b"
+        assert cache.get_or_load(1, PLAYERS, lambda: "x") == "p1"
+        assert cache.get_or_load(2, RANKING, lambda: "x") == "r2"
+
+    def test_load_racing_with_write_is_not_stored(self):
+        cache = EventCache()
+
+        def stale_loader():
+            cache.invalidate(1)  # escrita concorrente durante a leitura
+            return "stale"
+
+        assert cache.get_or_load(1, RANKING, stale_loader) == "stale"
+        assert cache.get_or_load(1, RANKING, lambda: "fresh") == "fresh"
+
+
+class TestReadCacheEndpoints:
+    """Leituras servidas pelo cache e invalidadas pelas escritas"""
+
+    def test_ranking_cached_until_match_created(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        a = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        b = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+
+        before = read_cache.stats()
+        client.get(f"/api/ranking/{event_id}")
+        client.get(f"/api/ranking/{event_id}")
+        client.get(f"/api/players/{event_id}")
+        after = read_cache.stats()
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 2
+
+        client.post(
+            "/api/matches",
+            json={"event_id": event_id, "player_1_id": a, "player_2_id": b, "winner_id": a},
+            headers=headers
+        )
+        ranking = client.get(f"/api/ranking/{event_id}").json()
+        assert ranking[0]["player_id"] == a and ranking[0]["matches"] == 1
+        players = {p["id"]: p for p in client.get(f"/api/players/{event_id}").json()}
+        assert players[a]["initial_elo"] > 1600.0
+
+        stats = client.get("/api/admin/cache/stats", headers=headers).json()
+        assert stats["invalidations"] > 0
+
+
+class TestConditionalGet:
+    """ETag pela versão do evento e respostas 304"""
+
+    def test_etag_changes_only_on_event_writes(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        a = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        b = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+
+        for url in (f"/api/ranking/{event_id}", f"/api/matches/{event_id}"):
+            first = client.get(url)
+            etag = first.headers["ETag"]
+            assert first.headers["Cache-Control"] == "no-cache"
+
+            cached = client.get(url, headers={"If-None-Match": etag})
+            assert cached.status_code == 304 and cached.content == b""
+            assert cached.headers["ETag"] == etag
+            assert client.get(url, headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+            # Outra página/filtro é outra representação
+            assert client.get(url, params={"limit": 1}).headers["ETag"] != etag
+
+        ranking_etag = client.get(f"/api/ranking/{event_id}").headers["ETag"]
+        match_id = client.post(
+            "/api/matches",
+            json={"event_id": event_id, "player_1_id": a, "player_2_id": b, "winner_id": a},
+            headers=headers
+        ).json()["id"]
+
+        changed = client.get(f"/api/ranking/{event_id}", headers={"If-None-Match": ranking_etag})
+        assert changed.status_code == 200 and changed.json()[0]["matches"] == 1
+        assert changed.headers["ETag"] != ranking_etag
+
+        etags = {changed.headers["ETag"]}
+        client.put(f"/api/matches/{match_id}", json={"winner_id": b}, headers=headers)
+        etags.add(client.get(f"/api/ranking/{event_id}").headers["ETag"])
+        client.delete(f"/api/matches/{match_id}", headers=headers)
+        etags.add(client.get(f"/api/ranking/{event_id}").headers["ETag"])
+        assert len(etags) == 3
+
+
+class TestRedisBackend:
+    """Backend compartilhado contra um servidor Redis local de teste"""
+
+    @pytest.fixture
+    def redis_url(self):
+        from tests.fake_redis import FakeRedisServer
+
+        server = FakeRedisServer()
+        yield server.url
+        server.close()
+
+    def _worker(self, url):
+        from utils.cache import MemoryBackend, RedisBackend
+
+        cache = EventCache(backend=RedisBackend(url, ttl=60), local=MemoryBackend(ttl=60))
+        cache.start_listener()
+        return cache
+
+    def test_shared_store_and_cross_worker_invalidation(self, redis_url):
+        a, b = self._worker(redis_url), self._worker(redis_url)
+        try:
+            assert a.get_or_load(1, RANKING, lambda: [{"elo": 1600}]) == [{"elo": 1600}]
+            # Segundo worker lê do Redis, sem ir ao banco
+            assert b.get_or_load(1, RANKING, lambda: pytest.fail("não deveria carregar")) == [{"elo": 1600}]
+            assert b.stats()["hits"] == 1
+
+            a.invalidate(1, RANKING)
+            deadline = time.monotonic() + 5
+            while b.stats()["remote_invalidations"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+            assert b.get_or_load(1, RANKING, lambda: [{"elo": 1616}]) == [{"elo": 1616}]
+            assert a.get_or_load(1, RANKING, lambda: pytest.fail("não deveria carregar")) == [{"elo": 1616}]
+        finally:
+            a.stop_listener()
+            b.stop_listener()
+
+    def test_unavailable_server_falls_back_to_loader(self):
+        from utils.cache import RedisBackend
+
+        cache = EventCache(backend=RedisBackend("redis://127.0.0.1:1/0"))
+        assert cache.get_or_load(1, RANKING, lambda: "db") == "db"
+        cache.invalidate(1)
+        assert cache.stats()["errors"] == 2
+
+
+class TestAuthCache:
+    """Resolução do usuário autenticado sem ida ao banco"""
+
+    def test_hot_path_has_no_queries(self, client, test_admin_token):
+        from sqlalchemy import event
+        import database
+
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        assert client.get("/api/admin/cache/stats", headers=headers).status_code == 200
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(database.engine, "before_cursor_execute", record)
+        try:
+            stats = client.get("/api/admin/cache/stats", headers=headers).json()
+        finally:
+            event.remove(database.engine, "before_cursor_execute", record)
+        assert statements == []
+        assert stats["auth"]["hits"] >= 1 and stats["auth"]["tokens"] >= 1
+
+    def test_user_changes_invalidate(self, client, test_admin_token):
+        import database
+        from models.usuario import Usuario
+
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        assert client.get("/api/admin/cache/stats", headers=headers).status_code == 200
+
+        session = database.SessionLocal()
+        try:
+            usuario = session.query(Usuario).filter(Usuario.email == "admin@test.com").first()
+            usuario.tipo = "jogador"
+            session.commit()
+            assert client.get("/api/admin/cache/stats", headers=headers).status_code == 403
+
+            usuario.tipo = "admin"
+            usuario.ativo = False
+            session.commit()
+            response = client.get("/api/admin/cache/stats", headers=headers)
+            assert response.status_code == 403 and response.json()["detail"] == "Usuário inativo"
+        finally:
+            session.close()
@@ -0,0 +1,137 @@
+"""
+Testes da configuração do SQLite (perfil de PRAGMAs e backups em modo WAL)
+"""
+import sqlite3
+import database
+import backup_manager
+from backup_manager import BackupManager
+
+
+def _wal_connection(path):
+    conn = sqlite3.connect(str(path))
+    database._apply_sqlite_pragmas(conn, None)
+    return conn
+
+
+class TestSqlitePragmas:
+    """Perfil de PRAGMAs aplicado nas conexões"""
+
+    def test_profile_applied_on_connect(self, tmp_path):
+        conn = _wal_connection(tmp_path / "t.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        conn.close()
+
+    def test_profile_can_be_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, "SQLITE_TUNING", False)
+        conn = _wal_connection(tmp_path / "t.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        conn.close()
+
+    def test_restore_with_open_wal_connection(self, tmp_path):
+        db_path = tmp_path / "live.db"
+        conn = _wal_connection(db_path)
+        conn.execute("CREATE TABLE t (v INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+
+        manager = BackupManager(db_path=str(db_path), backup_dir=str(tmp_path / "backups"))
+        ok, _ = manager.create_backup()
+        assert ok
+        backup_name = manager.list_backups()[0]["filename"]
+
+        conn.execute("INSERT INTO t VALUES (2)")
+        conn.commit()
+        ok, _ = manager.restore_backup(backup_name)
+        assert ok
+        assert conn.execute("SELECT v FROM t").fetchall() == [(1,)]
+        conn.close()
+
+
+class TestSteppedBackup:
+    """Cópia em passos, gzip com sha256 e escritas concorrentes"""
+
+    @staticmethod
+    def _database(path, journal_mode):
+        conn = sqlite3.connect(str(path))
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        conn.execute("CREATE TABLE t (v TEXT)")
+        conn.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,) for _ in range(200)])
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _restored_count(manager, db_path):
+        backup_name = manager.list_backups()[0]["filename"]
+        ok, msg = manager.restore_backup(backup_name)
+        assert ok, msg
+        conn = sqlite3.connect(str(db_path))
+        try:
+            return conn.execute("SELECT count(*) FROM t").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_wal_snapshot_not_restarted_by_writes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(backup_manager, "BACKUP_PAGES_PER_STEP", 8)
+        monkeypatch.setattr(backup_manager, "BACKUP_STEP_SLEEP_MS", 0)
+        db_path = tmp_path / "live.db"
+        writer = self._database(db_path, "wal")
+        updates = []
+
+        def write_during_copy(state):
+            updates.append(state)
+            if state["phase"] == "copy" and 0 < state["pages_done"] < state["pages_total"]:
+                writer.execute("INSERT INTO t VALUES ('novo')")
+                writer.commit()
+
+        manager = BackupManager(db_path=str(db_path), backup_dir=str(tmp_path / "backups"))
+        ok, msg = manager.create_backup(progress=write_during_copy)
+        assert ok, msg
+        writer.close()
+
+        info = manager.list_backups()[0]
+        assert info["filename"].endswith(".db.gz")
+        assert info["restarts"] == 0 and info["compressed"] is True
+        assert info["uncompressed_size"] > info["size"]
+        assert info["sha256"] == backup_manager.file_sha256(tmp_path / "backups" / info["filename"])
+        phases = [u["phase"] for u in updates]
+        assert phases[0] == "copy" and "compress" in phases and phases[-1] == "done"
+        assert backup_manager.backup_progress.snapshot()["running"] is False
+        # Snapshot do início da cópia: sem as linhas escritas durante o backup
+        assert self._restored_count(manager, db_path) == 200
+
+    def test_rollback_journal_falls_back_after_restarts(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(backup_manager, "BACKUP_PAGES_PER_STEP", 8)
+        monkeypatch.setattr(backup_manager, "BACKUP_STEP_SLEEP_MS", 0)
+        monkeypatch.setattr(backup_manager, "BACKUP_MAX_RESTARTS", 2)
+        db_path = tmp_path / "live.db"
+        writer = self._database(db_path, "delete")
+
+        def write_during_copy(state):
+            if state["phase"] == "copy" and 0 < state["pages_done"] < state["pages_total"]:
+                writer.execute("INSERT INTO t VALUES ('novo')")
+                writer.commit()
+
+        manager = BackupManager(db_path=str(db_path), backup_dir=str(tmp_path / "backups"))
+        ok, msg = manager.create_backup(progress=write_during_copy)
+        assert ok, msg
+        writer.close()
+
+        assert manager.list_backups()[0]["restarts"] == 3
+        # A cópia final (de uma vez) tem tudo o que foi escrito até ela
+        assert self._restored_count(manager, db_path) == 203
+
+    def test_restore_rejects_corrupted_backup(self, tmp_path):
+        db_path = tmp_path / "live.db"
+        self._database(db_path, "wal").close()
+        manager = BackupManager(db_path=str(db_path), backup_dir=str(tmp_path / "backups"))
+        assert manager.create_backup()[0]
+
+        backup_name = manager.list_backups()[0]["filename"]
+        with open(tmp_path / "backups" / backup_name, "r+b") as f:
+            f.seek(20)
+            f.write(b"\x00\x00\x00\x00")
+        ok, msg = manager.restore_backup(backup_name)
+        assert not ok and "Checksum" in msg
@@ -0,0 +1,237 @@
+"""
+Testes do motor de Elo (checkpoints e replay de sufixo)
+"""
+import random
+import pytest
+from database import SessionLocal, Base, engine
+from models import Event, Player, Match, RatingHistory
+from utils.elo import append_match, change_winner, remove_match, calculate_elo_change, seed_event_history
+
+
+@pytest.fixture
+def db_session():
+    """Sessão com banco limpo"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def league(db_session):
+    """Evento com 6 jogadores (ratings iniciais diferentes) e 40 partidas"""
+    rng = random.Random(42)
+    event = Event(name="Liga", date="2025-12-20", time="19:00")
+    db_session.add(event)
+    db_session.flush()
+
+    base = {}
+    players = []
+    for i in range(6):
+        p = Player(event_id=event.id, name=f"J{i}", initial_elo=1500.0 + 40 * i)
+        db_session.add(p)
+        db_session.flush()
+        base[p.id] = p.initial_elo
+        players.append(p)
+
+    for _ in range(40):
+        p1, p2 = rng.sample(players, 2)
+        winner = rng.choice([p1.id, p2.id, None])
+        match = Match(event_id=event.id, player_1_id=p1.id, player_2_id=p2.id, winner_id=winner)
+        db_session.add(match)
+        db_session.flush()
+        append_match(db_session, match, p1, p2)
+    db_session.commit()
+    return event, base
+
+
+def _from_scratch(session, event_id, base):
+    """Recalcular o evento inteiro a partir dos ratings iniciais"""
+    ratings = dict(base)
+    for m in session.query(Match).filter(Match.event_id == event_id).order_by(Match.id):
+        if m.winner_id is None:
+            continue
+        loser = m.player_2_id if m.winner_id == m.player_1_id else m.player_1_id
+        change = calculate_elo_change(ratings[m.winner_id], ratings[loser])
+        ratings[m.winner_id] += change
+        ratings[loser] -= change
+    return ratings
+
+
+def _current(session, event_id):
+    session.expire_all()
+    return {p.id: p.initial_elo for p in session.query(Player).filter(Player.event_id == event_id)}
+
+
+class TestEloReplay:
+    """Edições e remoções recalculam só o sufixo sem desvio"""
+
+    def test_change_winner_matches_full_recompute(self, db_session, league):
+        event, base = league
+        matches = db_session.query(Match).filter(Match.event_id == event.id).order_by(Match.id).all()
+
+        for match in (matches[10], matches[25], matches[39]):
+            new_winner = match.player_2_id if match.winner_id == match.player_1_id else match.player_1_id
+            change_winner(db_session, match, new_winner)
+            db_session.commit()
+
+        expected = _from_scratch(db_session, event.id, base)
+        current = _current(db_session, event.id)
+        for player_id, elo in expected.items():
+            assert current[player_id] == pytest.approx(elo)
+
+    def test_clear_winner_matches_full_recompute(self, db_session, league):
+        event, base = league
+        match = db_session.query(Match).filter(
+            Match.event_id == event.id, Match.winner_id.isnot(None)
+        ).order_by(Match.id).first()
+
+        change_winner(db_session, match, None)
+        db_session.commit()
+
+        expected = _from_scratch(db_session, event.id, base)
+        assert _current(db_session, event.id) == pytest.approx(expected)
+
+    def test_remove_match_matches_full_recompute(self, db_session, league):
+        event, base = league
+        matches = db_session.query(Match).filter(Match.event_id == event.id).order_by(Match.id).all()
+
+        remove_match(db_session, matches[5])
+        remove_match(db_session, matches[30])
+        db_session.commit()
+
+        expected = _from_scratch(db_session, event.id, base)
+        assert _current(db_session, event.id) == pytest.approx(expected)
+        assert db_session.query(RatingHistory).filter(
+            RatingHistory.match_id.in_([matches[5].id, matches[30].id])
+        ).count() == 0
+
+    def test_seed_history_recovers_initial_ratings(self, db_session, league):
+        event, base = league
+        db_session.query(RatingHistory).delete()
+        db_session.commit()
+
+        seed_event_history(db_session, event.id)
+        db_session.commit()
+
+        first = {}
+        for row in db_session.query(RatingHistory).order_by(RatingHistory.match_id):
+            first.setdefault(row.player_id, row.elo_before)
+        for player_id, elo in first.items():
+            assert elo == pytest.approx(base[player_id], abs=1e-6)
+
+
+class TestDeleteMatchEndpoint:
+    """Endpoint DELETE /api/matches/{id}"""
+
+    def test_delete_reverts_elo_and_standings(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        p1 = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        p2 = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+
+        match_id = client.post(
+            "/api/matches",
+            json={"event_id": event_id, "player_1_id": p1, "player_2_id": p2, "winner_id": p1},
+            headers=headers
+        ).json()["id"]
+
+        response = client.delete(f"/api/matches/{match_id}", headers=headers)
+        assert response.status_code == 200
+
+        ranking = client.get(f"/api/ranking/{event_id}", headers=headers).json()
+        assert all(r["elo"] == 1600.0 and r["matches"] == 0 for r in ranking)
+        assert client.delete(f"/api/matches/{match_id}", headers=headers).status_code == 404
+
+
+class TestRatingHistory:
+    """Histórico de rating por jogador"""
+
+    def test_history_endpoint_follows_matches(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        a = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        b = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+
+        for winner in (a, a, b, None):
+            client.post(
+                "/api/matches",
+                json={"event_id": event_id, "player_1_id": a, "player_2_id": b, "winner_id": winner},
+                headers=headers
+            )
+
+        data = client.get(f"/api/players/player/{a}/rating-history", headers=headers).json()
+        assert data["initial_elo"] == 1600.0
+        assert data["total_points"] == 3
+        assert [p["delta"] > 0 for p in data["points"]] == [True, True, False]
+        assert data["points"][-1]["elo"] == pytest.approx(data["current_elo"])
+        for p in data["points"]:
+            assert p["elo"] - p["elo_before"] == pytest.approx(p["delta"])
+
+    def test_history_downsampling(self):
+        from utils.series import downsample_lttb
+
+        series = [float(i % 50) for i in range(1000)]
+        sampled = downsample_lttb(series, 100, value=lambda v: v)
+        assert len(sampled) == 100
+        assert sampled[0] == series[0] and sampled[-1] == series[-1]
+        assert max(sampled) == 49.0
+        assert downsample_lttb(series[:10], 100, value=lambda v: v) == series[:10]
+
+
+class TestBatchRecompute:
+    """Recálculo em lote com NumPy"""
+
+    def test_batch_matches_sequential(self, db_session, league):
+        from utils.elo_batch import recompute_events
+
+        event, base = league
+        expected = _from_scratch(db_session, event.id, base)
+        db_session.query(Player).update({Player.initial_elo: 0.0})
+        db_session.commit()
+
+        summary = recompute_events(db_session, [event.id])
+
+        rated = db_session.query(Match).filter(Match.event_id == event.id, Match.winner_id.isnot(None)).count()
+        assert summary == {event.id: rated}
+        assert _current(db_session, event.id) == pytest.approx(expected)
+        assert db_session.query(RatingHistory).count() == 2 * rated
+
+    def test_match_created_between_compute_and_store(self, db_session, league):
+        """Partida gravada depois do cálculo (outro processo): o evento é recalculado no lock"""
+        from utils.elo import K_FACTOR
+        from utils.elo_batch import compute_event, _store
+
+        event, base = league
+        result = compute_event(event.id)
+
+        p1, p2 = db_session.query(Player).filter(Player.event_id == event.id).limit(2).all()
+        match = Match(event_id=event.id, player_1_id=p1.id, player_2_id=p2.id, winner_id=p2.id)
+        db_session.add(match)
+        db_session.flush()
+        append_match(db_session, match, p1, p2)
+        db_session.commit()
+        expected = _from_scratch(db_session, event.id, base)
+
+        rated = db_session.query(Match).filter(Match.event_id == event.id, Match.winner_id.isnot(None)).count()
+        assert _store(db_session, event.id, K_FACTOR, result) == rated
+        assert _current(db_session, event.id) == pytest.approx(expected)
+        assert db_session.query(RatingHistory).filter(RatingHistory.match_id == match.id).count() == 2
+        assert db_session.query(RatingHistory).count() == 2 * rated
+
+    def test_waves_never_repeat_player(self):
+        import numpy as np
+        from utils.elo_batch import compute_waves
+
+        rng = np.random.default_rng(1)
+        winners = rng.integers(0, 20, 500)
+        losers = (winners + rng.integers(1, 20, 500)) % 20
+        waves = compute_waves(winners, losers, 20)
+        for wave in np.unique(waves):
+            players = np.concatenate([winners[waves == wave], losers[waves == wave]])
+            assert len(players) == len(np.unique(players))
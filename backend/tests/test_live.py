@@ -0,0 +1,140 @@
+"""
+Testes do ranking/partidas ao vivo (hub de transmissão e WebSocket)
+"""
+import asyncio
+import json
+import pytest
+from utils.cache import read_cache, RANKING
+from utils.live import LiveHub, live_hub, RESYNC
+
+
+class TestLiveHub:
+    """Filas limitadas por conexão"""
+
+    def test_slow_consumer_drops_to_snapshot(self):
+        async def scenario():
+            hub = LiveHub(max_queue=2)
+            slow = hub.subscribe(1)
+            fast = hub.subscribe(1)
+            other = hub.subscribe(2)
+
+            hub.publish(1, {"n": 1})
+            hub.publish(1, {"n": 2})
+            await asyncio.sleep(0)
+            assert [json.loads(await fast.next(1))["n"] for _ in range(2)] == [1, 2]
+            hub.publish(1, {"n": 3})  # fila do lento já está cheia
+            hub.publish(1, {"n": 4})
+            await asyncio.sleep(0)
+
+            assert await slow.next(1) is RESYNC
+            assert slow.queue.empty() and slow.dropped == 2
+            assert [json.loads(await fast.next(1))["n"] for _ in range(2)] == [3, 4]
+            assert await other.next(0.01) is None
+
+            hub.unsubscribe(other)
+            stats = hub.stats()
+            assert stats["overflows"] == 1 and stats["published"] == 4
+            assert stats["events"] == 1 and stats["subscribers"] == 2
+
+        asyncio.run(scenario())
+
+    def test_resync_builds_one_snapshot_for_all(self):
+        async def scenario():
+            hub = LiveHub(max_queue=2)
+            builds = []
+
+            async def build(event_id):
+                builds.append(event_id)
+                await asyncio.sleep(0.01)
+                return json.dumps({"type": "snapshot", "n": len(builds)})
+
+            subscribers = [hub.subscribe(1) for _ in range(2000)]
+            hub.resync(1)
+            await asyncio.sleep(0)
+
+            async def consume(subscriber):
+                assert await subscriber.next(1) is RESYNC
+                return await hub.snapshot(subscriber, build)
+
+            payloads = await asyncio.gather(*(consume(s) for s in subscribers))
+            assert builds == [1] and set(payloads) == {json.dumps({"type": "snapshot", "n": 1})}
+
+            # Só o assinante cuja fila encheu depois do snapshot monta outro
+            slow, fast = subscribers[0], subscribers[1]
+            for other in subscribers[2:]:
+                hub.unsubscribe(other)
+            hub.publish(1, {"n": 1})
+            hub.publish(1, {"n": 2})
+            await asyncio.sleep(0)
+            assert [json.loads(await fast.next(1))["n"] for _ in range(2)] == [1, 2]
+            hub.publish(1, {"n": 3})  # fila do lento já está cheia
+            await asyncio.sleep(0)
+            assert await slow.next(1) is RESYNC
+            assert json.loads(await hub.snapshot(slow, build))["n"] == 2
+            assert json.loads(await fast.next(1))["n"] == 3
+            assert hub.stats()["snapshots"] == 2
+
+        asyncio.run(scenario())
+
+    def test_publish_from_worker_thread(self):
+        async def scenario():
+            hub = LiveHub()
+            subscriber = hub.subscribe(1)
+            await asyncio.get_running_loop().run_in_executor(None, hub.publish, 1, {"n": 1})
+            assert json.loads(await subscriber.next(1)) == {"n": 1}
+
+        asyncio.run(scenario())
+
+
+class TestLiveWebSocket:
+    """Canal /api/live/{event_id}/ws"""
+
+    def test_snapshot_then_match_delta(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        a = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        b = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+        c = client.post("/api/players", json={"event_id": event_id, "name": "C"}, headers=headers).json()["id"]
+
+        with client.websocket_connect(f"/api/live/{event_id}/ws") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert {row["player_id"] for row in snapshot["ranking"]} == {a, b, c}
+
+            match_id = client.post(
+                "/api/matches",
+                json={"event_id": event_id, "player_1_id": a, "player_2_id": b, "winner_id": a},
+                headers=headers
+            ).json()["id"]
+            delta = ws.receive_json()
+            assert delta["type"] == "match" and delta["action"] == "created"
+            assert delta["version"] > snapshot["version"]
+            assert delta["matches"][0]["id"] == match_id
+            rows = {row["player_id"]: row for row in delta["standings"]}
+            assert set(rows) == {a, b}
+            assert rows[a]["victories"] == 1 and rows[a]["elo"] > 1600
+
+            client.put(f"/api/matches/{match_id}", json={"winner_id": b}, headers=headers)
+            delta = ws.receive_json()
+            assert delta["action"] == "updated" and delta["matches"][0]["winner_id"] == b
+
+            # Jogador novo: snapshot completo
+            client.post("/api/players", json={"event_id": event_id, "name": "D"}, headers=headers)
+            assert len(ws.receive_json()["ranking"]) == 4
+
+            # Escrita em outro worker (invalidação recebida pelo cache compartilhado)
+            read_cache.handle_message({"origin": "outro", "event_id": event_id, "names": [RANKING]})
+            assert ws.receive_json()["type"] == "snapshot"
+
+        assert not live_hub.has_subscribers(event_id)
+
+    def test_unknown_event_closes(self, client):
+        from starlette.websockets import WebSocketDisconnect
+
+        with client.websocket_connect("/api/live/999999/ws") as ws:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_json()
+        assert exc.value.code == 4404
+        assert client.get("/api/live/999999/stream").status_code == 404
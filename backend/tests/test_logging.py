@@ -0,0 +1,61 @@
+"""
+Testes do pipeline de logs assíncrono (QueueHandler + QueueListener)
+"""
+import json
+import logging
+import queue
+import pytest
+import logger_production
+from logger_production import DroppingQueueHandler, setup_logging, logging_stats, stop_logging_queue
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    # Voltar à configuração da aplicação (logs/ no diretório atual)
+    setup_logging(log_level=logging.INFO, log_dir='logs', json_format=True)
+
+
+class TestAsyncLogging:
+    """Registros passam pela fila e são escritos pela thread do listener"""
+
+    def test_records_written_by_listener(self, tmp_path, restore_logging):
+        logger = setup_logging(log_dir=tmp_path, console_output=False, async_output=True)
+        assert isinstance(logger.handlers[0], DroppingQueueHandler)
+
+        logger_production.get_logger('api').info("GET /api/events 200")
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logger_production.get_logger('matches_router').error("Erro %s", "ao criar", exc_info=True)
+        stop_logging_queue()  # esvazia a fila
+
+        app_lines = [json.loads(line) for line in (tmp_path / 'app.log').read_text().splitlines()]
+        assert [line['message'] for line in app_lines] == ["GET /api/events 200", "Erro ao criar"]
+        assert "ValueError: falhou" in app_lines[1]['exception']
+        assert app_lines[1]['function'] == 'test_records_written_by_listener'
+
+        access = (tmp_path / 'access.log').read_text().splitlines()
+        errors = (tmp_path / 'errors.log').read_text().splitlines()
+        assert len(access) == 1 and "GET /api/events" in access[0]
+        assert len(errors) == 1 and "Erro ao criar" in errors[0]
+
+    def test_full_queue_drops_without_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        logger = logging.getLogger('racket_hero.test_drop')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for i in range(5):
+                logger.warning("registro %d", i)
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+
+        assert handler.enqueued == 2 and handler.dropped == 3
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == ["registro 0", "registro 1"]
+
+    def test_sync_mode_has_no_queue(self, tmp_path, restore_logging):
+        logger = setup_logging(log_dir=tmp_path, console_output=False, async_output=False)
+        assert not any(isinstance(h, DroppingQueueHandler) for h in logger.handlers)
+        assert logging_stats() == {"async": False}
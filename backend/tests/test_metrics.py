@@ -0,0 +1,90 @@
+"""
+Testes das métricas (registro por thread, formato Prometheus e /metrics)
+"""
+import threading
+from utils.metrics import MetricsRegistry, merge, render, metrics
+
+
+def sample(text, line_prefix):
+    """Valor da primeira linha do /metrics que começa com `line_prefix`"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetricsRegistry:
+    """Shards por thread somados na coleta"""
+
+    def test_threads_summed_on_snapshot(self):
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc("matches_created_total")
+                registry.observe("db_query_duration_seconds", 0.002)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        registry.add_collector(lambda: [("live_subscribers", (), 3)])
+
+        text = render(*merge([registry.snapshot()]))
+        assert "racket_hero_matches_created_total 4000" in text
+        assert 'racket_hero_db_query_duration_seconds_bucket{le="0.001"} 0' in text
+        assert 'racket_hero_db_query_duration_seconds_bucket{le="0.0025"} 4000' in text
+        assert 'racket_hero_db_query_duration_seconds_bucket{le="+Inf"} 4000' in text
+        assert "racket_hero_db_query_duration_seconds_count 4000" in text
+        assert "racket_hero_live_subscribers 3" in text
+
+    def test_worker_snapshots_merge(self):
+        a, b = MetricsRegistry(), MetricsRegistry()
+        labels = (("method", "GET"), ("route", "/api/x"))
+        a.observe("http_request_duration_seconds", 0.02, labels)
+        b.observe("http_request_duration_seconds", 3.0, labels)
+        b.inc("http_requests_total", labels + (("status", "200"),), 2)
+
+        text = render(*merge([a.snapshot(), b.snapshot()]))
+        assert 'racket_hero_http_request_duration_seconds_count{method="GET",route="/api/x"} 2' in text
+        assert 'racket_hero_http_request_duration_seconds_bucket{method="GET",route="/api/x",le="0.025"} 1' in text
+        assert 'racket_hero_http_requests_total{method="GET",route="/api/x",status="200"} 2' in text
+
+
+class TestMetricsEndpoint:
+    """Middleware e contadores de domínio expostos em /metrics"""
+
+    def test_request_and_domain_metrics(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        a = client.post("/api/players", json={"event_id": event_id, "name": "A"}, headers=headers).json()["id"]
+        b = client.post("/api/players", json={"event_id": event_id, "name": "B"}, headers=headers).json()["id"]
+
+        metrics.reset()
+        client.post(
+            "/api/matches",
+            json={"event_id": event_id, "player_1_id": a, "player_2_id": b, "winner_id": a},
+            headers=headers
+        )
+        client.get(f"/api/matches/{event_id}")
+        client.get("/api/nao-existe/1")
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+
+        route = 'method="GET",route="/api/matches/{event_id}"'
+        assert sample(text, f'racket_hero_http_requests_total{{{route},status="200"}}') == 1
+        assert sample(text, f"racket_hero_http_request_duration_seconds_count{{{route}}}") == 1
+        assert sample(text, f"racket_hero_http_response_size_bytes_sum{{{route}}}") > 0
+        assert sample(text, f"racket_hero_db_queries_per_request_sum{{{route}}}") >= 1
+        assert sample(text, "racket_hero_matches_created_total") == 1
+        assert sample(text, "racket_hero_db_query_duration_seconds_count") >= 1
+        assert sample(text, "racket_hero_read_cache_misses_total") is not None
+        # O /metrics em andamento conta a si mesmo
+        assert sample(text, "racket_hero_http_requests_in_flight") == 1
+        # Caminho concreto não vira label (cardinalidade)
+        assert "/api/nao-existe/1" not in text
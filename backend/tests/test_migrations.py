@@ -0,0 +1,91 @@
+"""
+Testes das migrações do Alembic e dos índices das consultas frequentes
+"""
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from database import Base, run_migrations
+from models import Event, Player, Match, EventoOrganizador
+
+MIGRATED_INDEXES = [
+    "uq_player_event_usuario",
+    "ix_match_event_created",
+    "ix_event_active_usuario",
+    "uq_evento_organizador_event_usuario",
+    "ix_event_active_starts_at",
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """Banco no formato anterior à migração (sem os índices compostos)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in MIGRATED_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("ALTER TABLE event DROP COLUMN starts_at"))
+        conn.execute(text("ALTER TABLE event DROP COLUMN version"))
+        conn.execute(text("INSERT INTO event (id, name, date, time, active) VALUES (1, 'E', '2025-12-20', '19:30', 1)"))
+        conn.execute(text("INSERT INTO evento_organizador (event_id, usuario_id, é_criador) VALUES (1, 5, 1)"))
+        conn.execute(text("INSERT INTO evento_organizador (event_id, usuario_id, é_criador) VALUES (1, 5, 0)"))
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, query):
+    sql = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+class TestMigrations:
+    """Pipeline de migrações"""
+
+    def test_upgrade_adds_indexes_and_dedupes(self, legacy_engine):
+        run_migrations(legacy_engine)
+
+        inspector = inspect(legacy_engine)
+        indexes = {ix["name"] for table in inspector.get_table_names() for ix in inspector.get_indexes(table)}
+        assert set(MIGRATED_INDEXES) <= indexes
+        with legacy_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM evento_organizador")).scalar() == 1
+            assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0003"
+        session = Session(bind=legacy_engine)
+        assert session.get(Event, 1).starts_at == datetime(2025, 12, 20, 19, 30)
+        assert session.get(Event, 1).version == 0
+        session.close()
+
+        # Rodar de novo não faz nada
+        run_migrations(legacy_engine)
+
+    def test_hot_queries_use_indexes(self, legacy_engine):
+        run_migrations(legacy_engine)
+        session = Session(bind=legacy_engine)
+        hot_queries = {
+            "uq_player_event_usuario": session.query(Player).filter(
+                Player.event_id == 1, Player.usuario_id == 2
+            ),
+            "ix_match_event_created": session.query(Match.id).filter(
+                Match.event_id == 1, Match.created_at >= datetime(2025, 1, 1)
+            ),
+            "ix_event_active_usuario": session.query(Event).filter(
+                Event.active == True, Event.usuario_id == 2
+            ),
+            "ix_event_active_starts_at": session.query(Event).filter(
+                Event.active == True,
+                Event.starts_at >= datetime(2025, 1, 1),
+                Event.starts_at < datetime(2025, 1, 15)
+            ).order_by(Event.starts_at, Event.id),
+            "uq_evento_organizador_event_usuario": session.query(EventoOrganizador).filter(
+                EventoOrganizador.event_id == 1, EventoOrganizador.usuario_id == 2
+            ),
+        }
+        for index, query in hot_queries.items():
+            plan = _plan(legacy_engine, query)
+            assert index in plan, plan
+            assert "SCAN" not in plan, plan
+        session.close()
@@ -0,0 +1,105 @@
+"""
+Testes do profiling de requisições (header de admin e modo contínuo por rota)
+"""
+import os
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from database import SessionLocal, engine
+from models import Usuario
+from utils import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def slow_queries():
+    """Cada consulta dorme 10 ms para a rota aparecer nas amostras"""
+    def before(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(0.01)
+
+    event.listen(engine, "before_cursor_execute", before)
+    yield
+    event.remove(engine, "before_cursor_execute", before)
+
+
+class TestProfileOnDemand:
+    """X-Profile: 1 de um admin grava as stacks da thread da rota"""
+
+    def test_admin_header_writes_collapsed_stacks(self, client, test_admin_token, profile_dir, slow_queries):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+
+        response = client.get(f"/api/ranking/{event_id}", headers={**headers, "X-Profile": "1"})
+        name = response.headers["X-Profile"]
+        assert name.endswith("-GET-api_ranking_event_id.folded")
+
+        lines = (profile_dir / name).read_text().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1
+        # Amostras da thread do threadpool atribuídas à requisição
+        assert any("routers/ranking.py" in line for line in lines)
+
+        listed = client.get("/api/admin/profiles", headers=headers).json()
+        assert listed["profiles"][0]["filename"] == name
+        download = client.get(f"/api/admin/profiles/{name}", headers=headers)
+        assert download.status_code == 200
+        assert client.get("/api/admin/profiles/..%2F..%2Fmain.py", headers=headers).status_code == 404
+
+    def test_flag_ignored_without_admin(self, client, profile_dir):
+        response = client.get("/api/ranking/1", params={"profile": 1}, headers={"X-Profile": "1"})
+        assert "X-Profile" not in response.headers
+        assert os.listdir(profile_dir) == []
+
+    def test_flag_ignored_for_demoted_admin(self, client, test_admin_token, profile_dir):
+        """Token emitido como admin não basta: o tipo vem do banco"""
+        session = SessionLocal()
+        try:
+            usuario = session.query(Usuario).filter(Usuario.email == "admin@test.com").first()
+            usuario.tipo = "jogador"
+            session.commit()
+        finally:
+            session.close()
+
+        headers = {"Authorization": f"Bearer {test_admin_token}", "X-Profile": "1"}
+        response = client.get("/api/ranking/1", headers=headers)
+        assert "X-Profile" not in response.headers
+        assert os.listdir(profile_dir) == []
+
+
+class TestSampledProfiling:
+    """Modo contínuo: 1 a cada N requisições por rota, só os mais recentes ficam"""
+
+    def test_one_in_n_per_route(self, profile_dir, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_KEEP", 2)
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: int):
+            time.sleep(0.01)
+            return {"id": item_id}
+
+        @app.get("/other")
+        def other():
+            return {}
+
+        app.add_middleware(profiling.ProfilingMiddleware, sample_every=3)
+        with TestClient(app) as client:
+            for i in range(9):
+                client.get(f"/items/{i}")
+            client.get("/other")
+            client.get("/other")
+
+        files = sorted(os.listdir(profile_dir / "sampled"))
+        assert len(files) == 2
+        assert all(name.endswith("-GET-items_item_id.folded") for name in files)
+        assert "read_item" in (profile_dir / "sampled" / files[-1]).read_text()
@@ -0,0 +1,92 @@
+"""
+Orçamento de consultas SQL por endpoint e detecção de consultas repetidas (N+1)
+"""
+import json
+import logging
+import pytest
+from logger_production import setup_logging
+from utils.query_tracker import QueryTracker, check_budget, fingerprint
+
+
+class TestQueryTracker:
+    """Fingerprints e relatório do tracker"""
+
+    def test_fingerprint_collapses_values(self):
+        assert fingerprint("SELECT * FROM player WHERE id IN (?, ?, ?)") == \
+            fingerprint("SELECT * FROM player WHERE id IN (?, ?)") == \
+            "SELECT * FROM player WHERE id IN (?...)"
+        assert fingerprint("SELECT anon_1.x FROM t LIMIT 10") == "SELECT anon_1.x FROM t LIMIT ?"
+
+    def test_repeated_statements_logged(self, tmp_path):
+        tracker = QueryTracker()
+        tracker.record("SELECT 1 FROM event WHERE id = ?", 0.001)
+        for _ in range(6):
+            tracker.record("SELECT * FROM player WHERE id = ?", 0.001)
+
+        assert tracker.repeated() == [("SELECT * FROM player WHERE id = ?", 6)]
+        # O aviso passa pelos handlers de racket_hero (app.log em JSON)
+        setup_logging(log_dir=tmp_path, console_output=False, async_output=False)
+        try:
+            check_budget(tracker, "GET", "/api/x/{id}")
+        finally:
+            setup_logging(log_level=logging.INFO, log_dir='logs', json_format=True)
+        records = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+        record = next(r for r in records if r["logger"] == "racket_hero.query_tracker")
+        assert record["level"] == "WARNING"
+        assert "GET /api/x/{id} fez 7 consultas" in record["message"]
+        assert "6x SELECT * FROM player WHERE id = ?" in record["message"]
+
+
+class TestEndpointQueryBudgets:
+    """Número máximo de consultas por endpoint (regressões quebram a suíte)"""
+
+    @pytest.fixture
+    def event_with_matches(self, client, test_admin_token):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        ids = [
+            client.post("/api/players", json={"event_id": event_id, "name": f"P{i}"}, headers=headers).json()["id"]
+            for i in range(6)
+        ]
+        match_ids = [
+            client.post("/api/matches", json={
+                "event_id": event_id, "player_1_id": ids[i], "player_2_id": ids[i + 1], "winner_id": ids[i]
+            }, headers=headers).json()["id"]
+            for i in range(5)
+        ]
+        return event_id, ids, match_ids, headers
+
+    def test_reads(self, client, max_queries, event_with_matches):
+        event_id, _, _, headers = event_with_matches
+
+        with max_queries(2):
+            assert client.get(f"/api/matches/{event_id}").status_code == 200
+        with max_queries(3):
+            assert client.get(f"/api/matches/{event_id}", params={"include_total": True}).status_code == 200
+        with max_queries(2):
+            assert client.get(f"/events/{event_id}/organizadores", headers=headers).status_code == 200
+        with max_queries(2):
+            assert client.get(f"/api/ranking/{event_id}").status_code == 200
+
+    def test_writes(self, client, max_queries, event_with_matches):
+        event_id, ids, match_ids, headers = event_with_matches
+
+        with max_queries(13):
+            response = client.post("/api/matches", json={
+                "event_id": event_id, "player_1_id": ids[0], "player_2_id": ids[5], "winner_id": ids[0]
+            }, headers=headers)
+            assert response.status_code == 201
+        # No SQLite o INSERT do lote ainda sai uma vez por partida
+        with max_queries(14):
+            response = client.post("/api/matches/bulk", json={"event_id": event_id, "matches": [
+                {"player_1_id": ids[i], "player_2_id": ids[i + 1], "winner_id": ids[i + 1]} for i in range(5)
+            ]}, headers=headers)
+            assert response.status_code == 201
+        # Editar e apagar: +2 consultas (evento da partida e lock_event antes de ler a partida)
+        with max_queries(23):
+            response = client.put(f"/api/matches/{match_ids[0]}", json={"winner_id": ids[1]}, headers=headers)
+            assert response.status_code == 200
+        with max_queries(19):
+            assert client.delete(f"/api/matches/{match_ids[1]}", headers=headers).status_code == 200
@@ -0,0 +1,65 @@
+"""
+Testes do log de consultas lentas (parâmetros mascarados, rota, plano e limite por fingerprint)
+"""
+import json
+import logging
+import pytest
+from logger_production import setup_logging
+from utils import slow_query
+from utils.slow_query import redact, slow_queries
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    """Toda consulta é "lenta"; o log vai para tmp_path/slow_queries.log"""
+    monkeypatch.setattr(slow_query, "SLOW_QUERY_MS", 0)
+    slow_queries.reset()
+    setup_logging(log_dir=tmp_path, console_output=False, async_output=False)
+
+    def read():
+        return [json.loads(line) for line in (tmp_path / "slow_queries.log").read_text().splitlines()]
+
+    yield read
+    slow_queries.reset()
+    setup_logging(log_level=logging.INFO, log_dir='logs', json_format=True)
+
+
+class TestRedaction:
+    """Valores de texto e nomes sensíveis não chegam ao log"""
+
+    def test_redact(self):
+        assert redact("event_id_1", 7) == 7
+        assert redact("name", "Maria Silva") == "<str len=11>"
+        assert redact("email_1", "a@b.com") == "***"
+        assert redact("senha_hash", None) == "***"
+
+
+class TestSlowQueryLog:
+    """Consultas acima do limite vão para slow_queries.log com o plano"""
+
+    def test_logged_with_route_plan_and_redacted_params(self, client, test_admin_token, slow_log):
+        headers = {"Authorization": f"Bearer {test_admin_token}"}
+        event_id = client.post(
+            "/api/events", json={"name": "T", "date": "2025-12-20"}, headers=headers
+        ).json()["id"]
+        client.get(f"/api/ranking/{event_id}")
+        client.get(f"/api/ranking/{event_id}")
+        client.post("/api/auth/login", json={"email": "admin@test.com", "senha": "Senha123!"})
+
+        records = slow_log()
+        ranking = [r for r in records if r["route"] == "GET /api/ranking/{event_id}"]
+        assert ranking
+        record = ranking[0]
+        assert record["level"] == "WARNING"
+        assert record["duration_ms"] >= 0
+        assert record["plan"] and all(isinstance(line, str) for line in record["plan"])
+        assert event_id in record["parameters"].values()
+
+        # Mesma fingerprint no intervalo: a segunda requisição não gera linhas novas
+        assert len(ranking) == len({r["fingerprint"] for r in ranking})
+        assert slow_queries.stats()["suppressed"] > 0
+
+        login = [r for r in records if r["route"] == "POST /api/auth/login"]
+        assert login
+        assert "admin@test.com" not in json.dumps(login)
+        assert "***" in json.dumps(login[0]["parameters"])
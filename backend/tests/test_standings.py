@@ -0,0 +1,146 @@
+"""
+Testes da classificação materializada (tabela standing)
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import event
+from database import SessionLocal, engine
+from models import Match, Player, Standing
+from utils.elo import apply_result
+from utils.standings import rebuild_event_standings
+
+
+@pytest.fixture
+def event_with_players(client, test_admin_token):
+    """Cria evento com três jogadores"""
+    headers = {"Authorization": f"Bearer {test_admin_token}"}
+    event_id = client.post(
+        "/api/events",
+        json={"name": "Liga", "date": "2025-12-20", "time": "19:00"},
+        headers=headers
+    ).json()["id"]
+
+    player_ids = [
+        client.post(
+            "/api/players",
+            json={"event_id": event_id, "name": f"Jogador {i}", "initial_elo": 1600.0},
+            headers=headers
+        ).json()["id"]
+        for i in range(3)
+    ]
+    return headers, event_id, player_ids
+
+
+def _snapshot(event_id):
+    session = SessionLocal()
+    try:
+        rows = session.query(Standing).filter(Standing.event_id == event_id).all()
+        return {s.player_id: (s.wins, s.losses, s.matches, round(s.elo, 6)) for s in rows}
+    finally:
+        session.close()
+
+
+class TestStandings:
+    """Testes de manutenção incremental da classificação"""
+
+    def test_player_creation_creates_standing(self, client, event_with_players):
+        """Todo jogador criado já aparece no ranking"""
+        headers, event_id, player_ids = event_with_players
+
+        ranking = client.get(f"/api/ranking/{event_id}", headers=headers).json()
+        assert sorted(r["player_id"] for r in ranking) == sorted(player_ids)
+        assert all(r["matches"] == 0 for r in ranking)
+
+    def test_ranking_follows_matches(self, client, event_with_players):
+        """Criar e editar partidas atualiza vitórias, partidas e ordem"""
+        headers, event_id, (a, b, c) = event_with_players
+
+        def play(p1, p2, winner):
+            return client.post(
+                "/api/matches",
+                json={"event_id": event_id, "player_1_id": p1, "player_2_id": p2, "winner_id": winner},
+                headers=headers
+            ).json()["id"]
+
+        play(a, b, a)
+        m2 = play(a, c, a)
+        play(b, c, None)
+
+        ranking = client.get(f"/api/ranking/{event_id}", headers=headers).json()
+        by_id = {r["player_id"]: r for r in ranking}
+        assert ranking[0]["player_id"] == a
+        assert by_id[a]["victories"] == 2 and by_id[a]["matches"] == 2
+        assert by_id[b]["matches"] == 2 and by_id[c]["matches"] == 2
+        assert by_id[a]["win_percentage"] == 100.0
+
+        # Inverter vencedor da segunda partida
+        client.put(f"/api/matches/{m2}", json={"winner_id": c}, headers=headers)
+        by_id = {r["player_id"]: r for r in client.get(f"/api/ranking/{event_id}", headers=headers).json()}
+        assert by_id[a]["victories"] == 1
+        assert by_id[c]["victories"] == 1
+        assert by_id[c]["matches"] == 2
+
+    def test_rebuild_matches_incremental(self, client, event_with_players):
+        """Reconstrução a partir das partidas coincide com o estado incremental"""
+        headers, event_id, (a, b, c) = event_with_players
+
+        for p1, p2, w in [(a, b, a), (b, c, c), (a, c, None), (c, a, c)]:
+            client.post(
+                "/api/matches",
+                json={"event_id": event_id, "player_1_id": p1, "player_2_id": p2, "winner_id": w},
+                headers=headers
+            )
+
+        incremental = _snapshot(event_id)
+
+        session = SessionLocal()
+        try:
+            rebuild_event_standings(session, event_id)
+            session.commit()
+        finally:
+            session.close()
+
+        assert _snapshot(event_id) == incremental
+
+    def test_concurrent_matches_lose_no_update(self, client, event_with_players):
+        """Partidas postadas em paralelo: Elo e classificação iguais aos da ordem sequencial"""
+        headers, event_id, (a, b, c) = event_with_players
+        pairs = [(a, b, a), (b, c, b), (c, a, c), (a, b, b), (b, c, c), (c, a, a)] * 2
+
+        # Cada consulta dorme 2 ms: sem serialização, as rotas leem o mesmo Elo
+        def before(conn, cursor, statement, parameters, context, executemany):
+            time.sleep(0.002)
+
+        def play(pair):
+            p1, p2, w = pair
+            return client.post(
+                "/api/matches",
+                json={"event_id": event_id, "player_1_id": p1, "player_2_id": p2, "winner_id": w},
+                headers=headers
+            ).status_code
+
+        event.listen(engine, "before_cursor_execute", before)
+        try:
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                statuses = list(pool.map(play, pairs))
+        finally:
+            event.remove(engine, "before_cursor_execute", before)
+        assert statuses == [201] * len(pairs)
+
+        session = SessionLocal()
+        try:
+            matches = session.query(Match).filter(Match.event_id == event_id).order_by(Match.id).all()
+            ratings = {pid: 1600.0 for pid in (a, b, c)}
+            for m in matches:
+                apply_result(ratings, event_id, m.id, m.player_1_id, m.player_2_id, m.winner_id)
+            elo = dict(session.query(Player.id, Player.initial_elo).filter(Player.event_id == event_id).all())
+        finally:
+            session.close()
+
+        assert len(matches) == len(pairs)
+        assert elo == pytest.approx(ratings)
+        snapshot = _snapshot(event_id)
+        assert sum(s[2] for s in snapshot.values()) == 2 * len(pairs)
+        assert sum(s[0] for s in snapshot.values()) == len(pairs)
+        assert {pid: s[3] for pid, s in snapshot.items()} == pytest.approx(ratings)
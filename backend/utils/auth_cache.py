@@ -0,0 +1,154 @@
+# utils/auth_cache.py - Cache curto da autenticação (tokens decodificados e usuários)
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from jose import jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models.usuario import Usuario
+from utils.cache import MemoryBackend
+from utils.security import TokenData, verify_token
+from logger import get_logger
+
+log = get_logger("auth_cache")
+
+# Colunas do usuário guardadas no cache (senha_hash e tokens de reset ficam de fora)
+CACHED_COLUMNS = ("id", "email", "nome", "tipo", "ativo")
+USUARIO = "usuario"
+
+
+class AuthCache:
+    """
+    Cache em processo da resolução do usuário autenticado.
+
+    - Tokens: JWT já verificado -> TokenData, até o `exp` do próprio token
+      (só tokens válidos entram, então tokens inventados não ocupam espaço).
+    - Usuários: id -> colunas de CACHED_COLUMNS, por `ttl` segundos.
+
+    Qualquer alteração de um Usuario pelo ORM (ativo, tipo, senha...)
+    descarta o usuário e os tokens dele no flush e de novo no commit.
+    Entre workers a defasagem máxima é o TTL.
+    """
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 4096, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._users = MemoryBackend(max_entries, ttl)
+        self._tokens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def token(self, token: str) -> Optional[TokenData]:
+        """Verificar o JWT, reaproveitando a decodificação enquanto ele vale"""
+        if not self.enabled:
+            return verify_token(token)
+
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is not None:
+                if entry[0] > now:
+                    self._tokens.move_to_end(token)
+                    return entry[1]
+                del self._tokens[token]
+
+        token_data = verify_token(token)
+        if token_data is not None:
+            expires = jwt.get_unverified_claims(token).get("exp") or now
+            with self._lock:
+                self._tokens[token] = (expires, token_data)
+                while len(self._tokens) > self.max_entries:
+                    self._tokens.popitem(last=False)
+        return token_data
+
+    def usuario(self, usuario_id: int, loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """Colunas do usuário (cache ou loader()); None se não existe"""
+        if not self.enabled:
+            return loader()
+
+        key = (usuario_id, USUARIO, ())
+        found, value, generation = self._users.load(key)
+        if found:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = loader()
+        if value is not None:
+            self._users.store(key, value, generation)
+        return value
+
+    def invalidate(self, usuario_id: int) -> None:
+        """Descartar o usuário e os tokens dele"""
+        self._count("invalidations")
+        self._users.invalidate(usuario_id, (USUARIO,))
+        with self._lock:
+            for token in [t for t, entry in self._tokens.items() if entry[1].usuario_id == usuario_id]:
+                del self._tokens[token]
+
+    def clear(self) -> None:
+        self._users.clear()
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self) -> dict:
+        """Contadores para monitoramento"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "users": self._users.entries(),
+                "tokens": len(self._tokens),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+auth_cache = AuthCache(
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "10")),
+    max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "4096")),
+    enabled=os.getenv("AUTH_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+)
+
+
+def usuario_columns(usuario: Usuario) -> dict:
+    return {column: getattr(usuario, column) for column in CACHED_COLUMNS}
+
+
+# Invalidação pelas escritas do ORM (UPDATE/DELETE em massa por Query não passam aqui)
+_PENDING = "auth_cache_usuarios"
+
+
+@event.listens_for(Usuario, "after_insert")
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _usuario_changed(mapper, connection, target):
+    auth_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    # De novo após o commit: uma leitura entre o flush e o commit viu os dados antigos
+    for usuario_id in session.info.pop(_PENDING, ()):
+        auth_cache.invalidate(usuario_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,358 @@
+# utils/cache.py - Cache de leitura (LRU + TTL) por evento, em processo ou compartilhado
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from logger import get_logger
+
+log = get_logger("cache")
+
+# Nomes das leituras em cache (usados na invalidação)
+EVENT = "event"
+PLAYERS = "players"
+EVENT_PLAYERS = "event_players"
+RANKING = "ranking"
+
+ALL_READS = (EVENT, PLAYERS, EVENT_PLAYERS, RANKING)
+# Leituras que mudam quando jogadores ou partidas mudam (Elo, inscritos, classificação)
+PLAYER_READS = (PLAYERS, EVENT_PLAYERS, RANKING)
+
+
+class MemoryBackend:
+    """
+    Armazenamento em processo: LRU com expiração (TTL).
+
+    Cada evento tem um contador de geração: load() devolve a geração vista
+    e store() só grava se ela não mudou, então um valor carregado antes de
+    uma invalidação não é gravado depois dela.
+    """
+
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def load(self, key: Tuple) -> Tuple[bool, Any, Any]:
+        """Retornar (encontrado, valor, geração) para a chave (event_id, nome, params)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                return True, entry[1], None
+            if entry is not None:
+                del self._data[key]
+            return False, None, (self._epoch, self._generations.get(key[0], 0))
+
+    def store(self, key: Tuple, value: Any, token: Any) -> None:
+        """Gravar o valor se o evento não foi invalidado desde o load()"""
+        with self._lock:
+            if (self._epoch, self._generations.get(key[0], 0)) != token:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, event_id: int, names: Iterable[str]) -> None:
+        names = set(names)
+        with self._lock:
+            self._generations[event_id] = self._generations.get(event_id, 0) + 1
+            for key in [k for k in self._data if k[0] == event_id and k[1] in names]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._data.clear()
+
+    def entries(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Armazenamento compartilhado entre workers em um servidor Redis.
+
+    Cada leitura (evento, nome) é um hash com um campo por conjunto de
+    parâmetros; os valores vão em JSON com a geração da leitura e o
+    instante de expiração. Invalidar incrementa a geração e apaga o hash.
+    Também publica/assina as mensagens de invalidação entre workers.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "racket_hero:cache"):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidate"
+        self.client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._pubsub = None
+        self._listener = None
+
+    def _keys(self, event_id: int, name: str) -> Tuple[str, str]:
+        return f"{self.prefix}:gen:{event_id}:{name}", f"{self.prefix}:data:{event_id}:{name}"
+
+    @staticmethod
+    def _field(params: Hashable) -> str:
+        return json.dumps(params, default=str)
+
+    def load(self, key: Tuple) -> Tuple[bool, Any, Any]:
+        event_id, name, params = key
+        gen_key, data_key = self._keys(event_id, name)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(f"{self.prefix}:epoch")
+        pipe.get(gen_key)
+        pipe.hget(data_key, self._field(params))
+        epoch, generation, raw = pipe.execute()
+        token = [int(epoch or 0), int(generation or 0)]
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry["token"] == token and entry["expires"] > time.time():
+                return True, entry["value"], None
+        return False, None, token
+
+    def store(self, key: Tuple, value: Any, token: Any) -> None:
+        event_id, name, params = key
+        _, data_key = self._keys(event_id, name)
+        entry = json.dumps({"token": token, "expires": time.time() + self.ttl, "value": value}, default=str)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(data_key, self._field(params), entry)
+        pipe.pexpire(data_key, int(self.ttl * 1000))
+        pipe.execute()
+
+    def invalidate(self, event_id: int, names: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            gen_key, data_key = self._keys(event_id, name)
+            pipe.incr(gen_key)
+            pipe.delete(data_key)
+        pipe.execute()
+
+    def clear(self) -> None:
+        self.client.incr(f"{self.prefix}:epoch")
+
+    def entries(self) -> Optional[int]:
+        return None
+
+    def publish(self, message: dict) -> None:
+        self.client.publish(self.channel, json.dumps(message))
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        """Assinar o canal de invalidação em uma thread de fundo"""
+        if self._listener is not None:
+            return
+
+        def handler(message):
+            try:
+                callback(json.loads(message["data"]))
+            except Exception as e:
+                log.warning(f"Mensagem de invalidação ignorada: {e}")
+
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: handler})
+        self._listener = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def unsubscribe(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            # A thread sai no próximo get_message (até sleep_time); fechar antes
+            # disso deixaria a leitura dela numa conexão já fechada
+            self._listener.join(timeout=1)
+            self._pubsub.close()
+            self._listener = self._pubsub = None
+
+
+class EventCache:
+    """
+    Cache de leitura das rotas públicas de um evento.
+
+    As chaves são (event_id, nome, parâmetros) e as escritas invalidam por
+    evento e nome. O armazenamento é um backend (MemoryBackend por padrão).
+    Com um backend compartilhado (Redis), cada worker mantém também um
+    cache local curto na frente dele; as invalidações são publicadas e os
+    outros workers descartam o seu cache local ao recebê-las.
+
+    Falhas do backend não derrubam a leitura: o valor é carregado do banco.
+    Os valores são compartilhados entre requisições e não devem ser
+    alterados por quem os recebe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 30.0,
+        enabled: bool = True,
+        backend=None,
+        local: Optional[MemoryBackend] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.backend = backend or MemoryBackend(max_entries, ttl)
+        self.local = local
+        self.worker_id = uuid.uuid4().hex
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.local_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        self.errors = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_or_load(self, event_id: int, name: str, loader: Callable[[], Any], params: Hashable = ()) -> Any:
+        """Retornar o valor em cache ou carregá-lo com loader() e guardar"""
+        if not self.enabled:
+            return loader()
+
+        key = (event_id, name, params)
+        local_token = None
+        if self.local is not None:
+            found, value, local_token = self.local.load(key)
+            if found:
+                self._count("local_hits")
+                self._count("hits")
+                return value
+
+        try:
+            found, value, token = self.backend.load(key)
+        except Exception as e:
+            self._count("errors")
+            log.warning(f"Cache {self.backend.name} indisponível na leitura: {e}")
+            return loader()
+
+        if found:
+            self._count("hits")
+        else:
+            self._count("misses")
+            value = loader()
+            try:
+                self.backend.store(key, value, token)
+            except Exception as e:
+                self._count("errors")
+                log.warning(f"Cache {self.backend.name} indisponível na gravação: {e}")
+
+        if self.local is not None:
+            self.local.store(key, value, local_token)
+        return value
+
+    def invalidate(self, event_id: int, *names: str) -> None:
+        """Descartar as leituras do evento (todas, se nenhum nome for informado)"""
+        names = names or ALL_READS
+        self._count("invalidations")
+        try:
+            self.backend.invalidate(event_id, names)
+            if self.backend.shared:
+                self.backend.publish({"origin": self.worker_id, "event_id": event_id, "names": list(names)})
+        except Exception as e:
+            self._count("errors")
+            log.error(f"Falha ao invalidar cache {self.backend.name} do evento {event_id}: {e}")
+        if self.local is not None:
+            self.local.invalidate(event_id, names)
+
+    def clear(self) -> None:
+        """Descartar todas as leituras (ex: após restaurar um backup)"""
+        self._count("invalidations")
+        try:
+            self.backend.clear()
+            if self.backend.shared:
+                self.backend.publish({"origin": self.worker_id, "event_id": None, "names": []})
+        except Exception as e:
+            self._count("errors")
+            log.error(f"Falha ao limpar cache {self.backend.name}: {e}")
+        if self.local is not None:
+            self.local.clear()
+
+    def add_listener(self, callback: Callable[[Optional[int], Iterable[str]], None]) -> None:
+        """Chamar callback(event_id, nomes) a cada invalidação vinda de outro worker (event_id None = tudo)"""
+        self._listeners.append(callback)
+
+    def handle_message(self, message: dict) -> None:
+        """Aplicar no cache local uma invalidação publicada por outro worker"""
+        if message.get("origin") == self.worker_id:
+            return
+        self._count("remote_invalidations")
+        event_id = message.get("event_id")
+        names = message.get("names") or ALL_READS
+        if self.local is not None:
+            if event_id is None:
+                self.local.clear()
+            else:
+                self.local.invalidate(event_id, names)
+        for callback in self._listeners:
+            try:
+                callback(event_id, names)
+            except Exception as e:
+                log.warning(f"Listener de invalidação falhou: {e}")
+
+    def start_listener(self) -> None:
+        """Assinar as invalidações dos outros workers (backend compartilhado)"""
+        if self.enabled and self.backend.shared:
+            self.backend.subscribe(self.handle_message)
+
+    def stop_listener(self) -> None:
+        if self.backend.shared:
+            self.backend.unsubscribe()
+
+    def stats(self) -> dict:
+        """Contadores para monitoramento"""
+        memory = self.local if self.local is not None else self.backend
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "backend": self.backend.name,
+                "entries": memory.entries() if isinstance(memory, MemoryBackend) else None,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "local_hits": self.local_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": memory.evictions if isinstance(memory, MemoryBackend) else 0,
+                "invalidations": self.invalidations,
+                "remote_invalidations": self.remote_invalidations,
+                "errors": self.errors,
+            }
+
+
+def create_read_cache() -> EventCache:
+    """
+    Montar o cache de leitura a partir das variáveis de ambiente.
+
+    CACHE_BACKEND=memory (padrão) usa só o processo atual; CACHE_BACKEND=redis
+    usa REDIS_URL como armazenamento compartilhado, com um cache local de
+    READ_CACHE_LOCAL_TTL segundos em cada worker.
+    """
+    max_entries = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+    ttl = float(os.getenv("READ_CACHE_TTL", "30"))
+    enabled = os.getenv("READ_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+
+    if backend_name == "redis":
+        backend = RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl)
+        local = MemoryBackend(max_entries, float(os.getenv("READ_CACHE_LOCAL_TTL", "5")))
+        return EventCache(max_entries, ttl, enabled, backend=backend, local=local)
+    return EventCache(max_entries, ttl, enabled)
+
+
+read_cache = create_read_cache()
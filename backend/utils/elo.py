@@ -0,0 +1,265 @@
+# utils/elo.py - Cálculo de Elo e motor de replay por evento
+
+import os
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from models.player import Player
+from models.match import Match
+from models.rating_history import RatingHistory
+from utils.standings import load_standings, sync_elo
+from logger import get_logger
+
+log = get_logger("elo")
+
+# K-factor global; ao alterar, recalcular os eventos (scripts/recompute_ratings.py)
+K_FACTOR = float(os.getenv("ELO_K_FACTOR", "32"))
+
+
+def calculate_elo_change(winner_elo: float, loser_elo: float, k_factor: float = K_FACTOR) -> float:
+    """
+    Calcula mudança de Elo após partida.
+    K-factor padrão de 32 para jogadores normais (ELO_K_FACTOR).
+
+    Fórmula: change = K * (1 - expected_score)
+    expected_score = 1 / (1 + 10^((loser_elo - winner_elo)/400))
+    """
+    expected_winner = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
+    elo_change = k_factor * (1 - expected_winner)
+    return elo_change
+
+
+def apply_result(
+    ratings: Dict[int, float],
+    event_id: int,
+    match_id: int,
+    player_1_id: int,
+    player_2_id: int,
+    winner_id: Optional[int]
+) -> List[dict]:
+    """
+    Aplicar o resultado de uma partida sobre o dicionário de ratings.
+
+    Retorna as linhas de histórico (checkpoints) da partida, vazias se a
+    partida não tem vencedor.
+    """
+    if winner_id is None:
+        return []
+
+    loser_id = player_2_id if winner_id == player_1_id else player_1_id
+    winner_before = ratings[winner_id]
+    loser_before = ratings[loser_id]
+    change = calculate_elo_change(winner_before, loser_before)
+    ratings[winner_id] = winner_before + change
+    ratings[loser_id] = loser_before - change
+
+    return [
+        {"event_id": event_id, "match_id": match_id, "player_id": winner_id,
+         "elo_before": winner_before, "elo_after": ratings[winner_id], "delta": change},
+        {"event_id": event_id, "match_id": match_id, "player_id": loser_id,
+         "elo_before": loser_before, "elo_after": ratings[loser_id], "delta": -change},
+    ]
+
+
+def append_match(session: Session, match: Match, p1: Player, p2: Player) -> None:
+    """
+    Aplicar o Elo de uma partida recém-criada (a última do evento).
+
+    Como não há partidas posteriores, o rating atual dos jogadores é o
+    rating imediatamente anterior à partida. Exige match.id (flush antes).
+    """
+    ratings = {p1.id: p1.initial_elo, p2.id: p2.initial_elo}
+    rows = apply_result(ratings, match.event_id, match.id, p1.id, p2.id, match.winner_id)
+    if rows:
+        session.bulk_insert_mappings(RatingHistory, rows)
+    p1.initial_elo = ratings[p1.id]
+    p2.initial_elo = ratings[p2.id]
+
+
+def _checkpoint_before(session: Session, event_id: int, from_match_id: int) -> Dict[int, float]:
+    """
+    Ratings imediatamente anteriores à partida from_match_id.
+
+    Para cada jogador envolvido no sufixo (partidas com id >= from_match_id)
+    usa o último checkpoint anterior; se não houver, o elo_before do
+    primeiro checkpoint do sufixo; se não houver nenhum, o rating atual
+    (jogador ainda sem partidas com resultado).
+    """
+    suffix = session.query(
+        Match.player_1_id, Match.player_2_id
+    ).filter(
+        Match.event_id == event_id, Match.id >= from_match_id
+    ).all()
+    suffix_rows = session.query(
+        RatingHistory.player_id, RatingHistory.elo_before
+    ).filter(
+        RatingHistory.event_id == event_id, RatingHistory.match_id >= from_match_id
+    ).order_by(RatingHistory.match_id.desc()).all()
+
+    first_before = {player_id: elo for player_id, elo in suffix_rows}
+    involved = set(first_before)
+    for p1_id, p2_id in suffix:
+        involved.update((p1_id, p2_id))
+    if not involved:
+        return {}
+
+    latest = session.query(
+        RatingHistory.player_id,
+        func.max(RatingHistory.match_id).label("match_id")
+    ).filter(
+        RatingHistory.event_id == event_id,
+        RatingHistory.match_id < from_match_id,
+        RatingHistory.player_id.in_(involved)
+    ).group_by(RatingHistory.player_id).subquery()
+    prior = dict(session.query(
+        RatingHistory.player_id, RatingHistory.elo_after
+    ).join(
+        latest,
+        and_(RatingHistory.player_id == latest.c.player_id,
+             RatingHistory.match_id == latest.c.match_id)
+    ).all())
+
+    current = dict(session.query(Player.id, Player.initial_elo).filter(Player.id.in_(involved)).all())
+
+    return {
+        player_id: prior.get(player_id, first_before.get(player_id, current.get(player_id)))
+        for player_id in involved
+        if player_id in current
+    }
+
+
+def _replay(session: Session, event_id: int, from_match_id: int, ratings: Dict[int, float]) -> Dict[int, float]:
+    """Reaplicar as partidas com id >= from_match_id e gravar ratings finais."""
+    matches = session.query(
+        Match.id, Match.player_1_id, Match.player_2_id, Match.winner_id
+    ).filter(
+        Match.event_id == event_id, Match.id >= from_match_id
+    ).order_by(Match.id).all()
+
+    rows = []
+    for match_id, p1_id, p2_id, winner_id in matches:
+        rows.extend(apply_result(ratings, event_id, match_id, p1_id, p2_id, winner_id))
+    if rows:
+        session.bulk_insert_mappings(RatingHistory, rows)
+
+    players = session.query(Player).filter(Player.id.in_(ratings)).all()
+    for p in players:
+        p.initial_elo = ratings[p.id]
+    sync_elo(load_standings(session, event_id, ratings), players)
+
+    log.info(f"Replay do evento {event_id} a partir da partida {from_match_id}: "
+             f"{len(matches)} partidas, {len(ratings)} jogadores")
+    return ratings
+
+
+def _truncate(session: Session, event_id: int, from_match_id: int) -> None:
+    """Remover checkpoints do sufixo que será recalculado."""
+    session.query(RatingHistory).filter(
+        RatingHistory.event_id == event_id,
+        RatingHistory.match_id >= from_match_id
+    ).delete(synchronize_session=False)
+
+
+def change_winner(session: Session, match: Match, winner_id: Optional[int]) -> Dict[int, float]:
+    """
+    Trocar o vencedor de uma partida e recalcular só o sufixo do evento.
+
+    Retorna os ratings finais dos jogadores afetados. Não faz commit.
+    """
+    ratings = _checkpoint_before(session, match.event_id, match.id)
+    _truncate(session, match.event_id, match.id)
+    match.winner_id = winner_id
+    session.flush()
+    return _replay(session, match.event_id, match.id, ratings)
+
+
+def remove_match(session: Session, match: Match) -> Dict[int, float]:
+    """
+    Remover uma partida e recalcular só o sufixo do evento.
+
+    Retorna os ratings finais dos jogadores afetados. Não faz commit.
+    """
+    event_id, match_id = match.event_id, match.id
+    ratings = _checkpoint_before(session, event_id, match_id)
+    _truncate(session, event_id, match_id)
+    session.delete(match)
+    session.flush()
+    return _replay(session, event_id, match_id, ratings)
+
+
+def _invert_result(winner_after: float, loser_after: float) -> tuple:
+    """
+    Inverter uma atualização de Elo: ratings depois -> ratings antes.
+
+    A soma dos ratings é preservada e a diferença depois é
+    x + 2 * change(x), estritamente crescente em x; resolve por bisseção.
+    """
+    total = winner_after + loser_after
+    diff_after = winner_after - loser_after
+    low, high = diff_after - 2 * K_FACTOR, diff_after
+    for _ in range(100):
+        mid = (low + high) / 2
+        if mid + 2 * calculate_elo_change(total / 2 + mid / 2, total / 2 - mid / 2) < diff_after:
+            low = mid
+        else:
+            high = mid
+    diff = (low + high) / 2
+    return total / 2 + diff / 2, total / 2 - diff / 2
+
+
+def seed_event_history(session: Session, event_id: int) -> None:
+    """
+    Gerar checkpoints para um evento anterior à tabela rating_history.
+
+    O rating inicial foi sobrescrito nesses eventos, então as partidas são
+    percorridas de trás para frente invertendo cada atualização a partir
+    dos ratings atuais. Não faz commit.
+    """
+    matches = session.query(
+        Match.id, Match.player_1_id, Match.player_2_id, Match.winner_id
+    ).filter(
+        Match.event_id == event_id, Match.winner_id.isnot(None)
+    ).order_by(Match.id.desc()).all()
+    ratings = dict(session.query(Player.id, Player.initial_elo).filter(Player.event_id == event_id).all())
+
+    rows = []
+    for match_id, p1_id, p2_id, winner_id in matches:
+        loser_id = p2_id if winner_id == p1_id else p1_id
+        if winner_id not in ratings or loser_id not in ratings:
+            continue
+        winner_before, loser_before = _invert_result(ratings[winner_id], ratings[loser_id])
+        rows.append({"event_id": event_id, "match_id": match_id, "player_id": winner_id,
+                     "elo_before": winner_before, "elo_after": ratings[winner_id],
+                     "delta": ratings[winner_id] - winner_before})
+        rows.append({"event_id": event_id, "match_id": match_id, "player_id": loser_id,
+                     "elo_before": loser_before, "elo_after": ratings[loser_id],
+                     "delta": ratings[loser_id] - loser_before})
+        ratings[winner_id], ratings[loser_id] = winner_before, loser_before
+
+    if rows:
+        session.bulk_insert_mappings(RatingHistory, rows)
+    log.info(f"Checkpoints gerados para evento {event_id}: {len(matches)} partidas")
+
+
+def backfill_rating_history(session: Session) -> int:
+    """
+    Gerar checkpoints para eventos com partidas e sem nenhum histórico.
+
+    Executado na inicialização. Retorna o número de eventos processados.
+    """
+    with_history = session.query(RatingHistory.event_id).distinct()
+    event_ids = [
+        row[0] for row in session.query(Match.event_id).filter(
+            Match.winner_id.isnot(None),
+            Match.event_id.isnot(None),
+            Match.event_id.notin_(with_history)
+        ).distinct().all()
+    ]
+
+    for event_id in event_ids:
+        seed_event_history(session, event_id)
+
+    if event_ids:
+        session.commit()
+
+    return len(event_ids)
@@ -0,0 +1,259 @@
+# utils/elo_batch.py - Recálculo em lote do Elo com NumPy
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func, update
+from sqlalchemy.orm import Session
+
+from models.player import Player
+from models.match import Match
+from models.rating_history import RatingHistory
+from utils.elo import K_FACTOR
+from utils.etag import bump_event_version
+from utils.event_lock import lock_event, unlock_event
+from utils.metrics import metrics
+from utils.standings import rebuild_event_standings
+from logger import get_logger
+
+log = get_logger("elo_batch")
+
+
+def load_event_arrays(session: Session, event_id: int) -> Optional[dict]:
+    """
+    Carregar o log de partidas com vencedor e os ratings iniciais em arrays.
+
+    O rating inicial de cada jogador é o elo_before do seu primeiro
+    checkpoint; jogadores sem histórico usam o rating atual. Retorna None
+    se o evento não tem jogadores.
+    """
+    players = session.query(Player.id, Player.initial_elo).filter(Player.event_id == event_id).all()
+    if not players:
+        return None
+
+    first = session.query(
+        RatingHistory.player_id,
+        func.min(RatingHistory.match_id).label("match_id")
+    ).filter(RatingHistory.event_id == event_id).group_by(RatingHistory.player_id).subquery()
+    base = dict(session.query(
+        RatingHistory.player_id, RatingHistory.elo_before
+    ).join(
+        first,
+        and_(RatingHistory.player_id == first.c.player_id,
+             RatingHistory.match_id == first.c.match_id)
+    ).all())
+
+    player_ids = np.array([p.id for p in players], dtype=np.int64)
+    index = {pid: i for i, pid in enumerate(player_ids.tolist())}
+    ratings = np.array([base.get(p.id, p.initial_elo) for p in players], dtype=np.float64)
+
+    matches = session.query(
+        Match.id, Match.player_1_id, Match.player_2_id, Match.winner_id
+    ).filter(
+        Match.event_id == event_id, Match.winner_id.isnot(None)
+    ).order_by(Match.id).all()
+    matches = [
+        m for m in matches
+        if m.player_1_id in index and m.player_2_id in index and m.player_1_id != m.player_2_id
+    ]
+
+    winners = np.array([index[m.winner_id] for m in matches], dtype=np.int64)
+    losers = np.array([
+        index[m.player_2_id if m.winner_id == m.player_1_id else m.player_1_id] for m in matches
+    ], dtype=np.int64)
+
+    return {
+        "event_id": event_id,
+        "player_ids": player_ids,
+        "ratings": ratings,
+        "match_ids": np.array([m.id for m in matches], dtype=np.int64),
+        "winners": winners,
+        "losers": losers,
+    }
+
+
+def compute_waves(winners: np.ndarray, losers: np.ndarray, n_players: int) -> np.ndarray:
+    """
+    Agrupar partidas em ondas independentes.
+
+    Uma partida entra na onda seguinte à última onda de qualquer um dos
+    seus jogadores, então uma onda nunca repete jogador e todas as suas
+    partidas podem ser calculadas juntas, respeitando a ordem original.
+    """
+    last = np.full(n_players, -1, dtype=np.int64)
+    waves = np.empty(len(winners), dtype=np.int64)
+    for i, (w, l) in enumerate(zip(winners.tolist(), losers.tolist())):
+        wave = max(last[w], last[l]) + 1
+        waves[i] = wave
+        last[w] = wave
+        last[l] = wave
+    return waves
+
+
+def run_elo(data: dict, k_factor: float = K_FACTOR) -> dict:
+    """
+    Executar a sequência de atualizações de Elo, uma onda por vez.
+
+    Retorna arrays com rating antes do vencedor/perdedor e a variação por
+    partida (na ordem original) e os ratings finais dos jogadores.
+    """
+    ratings = data["ratings"].copy()
+    winners, losers = data["winners"], data["losers"]
+    n = len(winners)
+    winner_before = np.empty(n)
+    loser_before = np.empty(n)
+    delta = np.empty(n)
+
+    if n:
+        waves = compute_waves(winners, losers, len(ratings))
+        order = np.argsort(waves, kind="stable")
+        bounds = np.searchsorted(waves[order], np.arange(waves.max() + 2))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            idx = order[start:end]
+            w, l = winners[idx], losers[idx]
+            rw, rl = ratings[w], ratings[l]
+            d = k_factor * (1 - 1 / (1 + 10 ** ((rl - rw) / 400)))
+            winner_before[idx], loser_before[idx], delta[idx] = rw, rl, d
+            ratings[w] = rw + d
+            ratings[l] = rl - d
+
+    return {
+        "event_id": data["event_id"],
+        "player_ids": data["player_ids"],
+        "initial": data["ratings"],
+        "final": ratings,
+        "match_ids": data["match_ids"],
+        "winner_ids": data["player_ids"][winners],
+        "loser_ids": data["player_ids"][losers],
+        "winner_before": winner_before,
+        "loser_before": loser_before,
+        "delta": delta,
+    }
+
+
+def write_results(session: Session, result: dict) -> None:
+    """
+    Gravar o resultado do recálculo: ratings com um único UPDATE em lote,
+    checkpoints regravados e classificação reconstruída. Não faz commit.
+    """
+    event_id = result["event_id"]
+
+    session.execute(update(Player), [
+        {"id": pid, "initial_elo": elo}
+        for pid, elo in zip(result["player_ids"].tolist(), result["final"].tolist())
+    ])
+
+    session.query(RatingHistory).filter(RatingHistory.event_id == event_id).delete(synchronize_session=False)
+    rows: List[dict] = []
+    for match_id, w, l, wb, lb, d in zip(
+        result["match_ids"].tolist(), result["winner_ids"].tolist(), result["loser_ids"].tolist(),
+        result["winner_before"].tolist(), result["loser_before"].tolist(), result["delta"].tolist()
+    ):
+        rows.append({"event_id": event_id, "match_id": match_id, "player_id": w,
+                     "elo_before": wb, "elo_after": wb + d, "delta": d})
+        rows.append({"event_id": event_id, "match_id": match_id, "player_id": l,
+                     "elo_before": lb, "elo_after": lb - d, "delta": -d})
+    if rows:
+        session.bulk_insert_mappings(RatingHistory, rows)
+
+    session.expire_all()
+    rebuild_event_standings(session, event_id)
+
+
+def compute_event(event_id: int, k_factor: float = K_FACTOR) -> Optional[dict]:
+    """Carregar e calcular um evento em sessão própria (executável em outro processo)."""
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        data = load_event_arrays(session, event_id)
+        return run_elo(data, k_factor) if data is not None else None
+    finally:
+        session.close()
+
+
+def _init_worker():
+    """Descartar conexões herdadas do processo pai (fork)."""
+    from database import engine
+    engine.dispose(close=False)
+
+
+def recompute_events(
+    session: Session,
+    event_ids: Iterable[int],
+    workers: int = 1,
+    k_factor: float = K_FACTOR
+) -> Dict[int, int]:
+    """
+    Recalcular o Elo de vários eventos.
+
+    Com workers > 1 o cálculo de cada evento roda em um pool de processos;
+    a gravação continua serial na sessão informada (um escritor por vez,
+    como o SQLite exige), com as escritas de partidas do evento travadas
+    (lock_event) até o commit, que é feito por evento.
+
+    Returns:
+        Dicionário event_id -> número de partidas recalculadas
+    """
+    from database import DATABASE_URL
+
+    event_ids = list(event_ids)
+    summary: Dict[int, int] = {}
+    started = time.perf_counter()
+
+    if workers > 1 and len(event_ids) > 1 and ":memory:" not in DATABASE_URL:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(compute_event, event_ids, [k_factor] * len(event_ids))
+            for event_id, result in zip(event_ids, results):
+                summary[event_id] = _store(session, event_id, k_factor, result)
+    else:
+        for event_id in event_ids:
+            summary[event_id] = _store(session, event_id, k_factor)
+
+    log.info(f"Recálculo em lote: {len(event_ids)} eventos, {sum(summary.values())} partidas "
+             f"em {time.perf_counter() - started:.2f}s (workers={workers}, K={k_factor})")
+    return summary
+
+
+def _same_input(result: dict, data: dict) -> bool:
+    """O resultado foi calculado sobre os mesmos jogadores, ratings e partidas?"""
+    return (
+        np.array_equal(result["player_ids"], data["player_ids"])
+        and np.array_equal(result["initial"], data["ratings"])
+        and np.array_equal(result["match_ids"], data["match_ids"])
+        and np.array_equal(result["winner_ids"], data["player_ids"][data["winners"]])
+        and np.array_equal(result["loser_ids"], data["player_ids"][data["losers"]])
+    )
+
+
+def _store(session: Session, event_id: int, k_factor: float, result: Optional[dict] = None) -> int:
+    """
+    Gravar um evento com as escritas de partidas dele serializadas (lock_event)
+    do carregamento até o commit. write_results regrava todo o histórico do
+    evento: um resultado calculado antes do lock (outro processo) só é gravado
+    se as entradas ainda são as atuais; senão o evento é recalculado aqui.
+    """
+    try:
+        lock_event(session, event_id)
+        data = load_event_arrays(session, event_id)
+        if data is None:
+            result = None
+        elif result is None or not _same_input(result, data):
+            if result is not None:
+                log.info(f"Evento {event_id} mudou durante o recálculo em lote; recalculando com o lock")
+            result = run_elo(data, k_factor)
+        if result is not None:
+            write_results(session, result)
+            bump_event_version(session, event_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        unlock_event(session)
+    if result is None:
+        return 0
+    metrics.inc("elo_recomputes_total")
+    return len(result["match_ids"])
@@ -0,0 +1,63 @@
+# utils/etag.py - GET condicional (ETag / If-None-Match) pela versão do evento
+
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from models import Event
+
+ETAG_HEADER = "ETag"
+# O cliente guarda a resposta mas revalida a cada uso
+CACHE_CONTROL = "no-cache"
+
+
+def event_version(session: Session, event_id: int) -> Optional[int]:
+    """Versão atual dos dados do evento (None se o evento não existe)"""
+    row = session.query(Event.version).filter(Event.id == event_id).first()
+    return row[0] if row else None
+
+
+def bump_event_version(session: Session, event_id: int) -> None:
+    """
+    Incrementar a versão do evento na transação da escrita.
+
+    UPDATE atômico no banco: escritas simultâneas (e de outros workers)
+    nunca geram a mesma versão.
+    """
+    session.query(Event).filter(Event.id == event_id).update(
+        {Event.version: Event.version + 1}, synchronize_session=False
+    )
+
+
+def event_etag(resource: str, event_id: int, version: int, request: Request) -> str:
+    """
+    ETag forte de uma leitura do evento.
+
+    A query string entra no ETag: cada página/filtro é uma representação
+    diferente do mesmo recurso.
+    """
+    tag = f"{resource}-{event_id}-{version}"
+    if request.url.query:
+        tag += "-" + hashlib.sha1(request.url.query.encode("utf-8")).hexdigest()[:12]
+    return f'"{tag}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Verificar If-None-Match (comparação fraca, RFC 9110 13.1.2)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """Resposta 304 sem corpo"""
+    return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,64 @@
+# utils/event_lock.py - Escritas de partidas de um evento em série
+
+import threading
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from models.event import Event
+
+# Um lock por evento neste processo. Criar, editar e apagar partidas lê o
+# Elo/classificação atuais e grava o resultado (e append_match supõe que a
+# partida nova é a última do evento): duas rotas do threadpool intercaladas
+# perderiam uma das atualizações.
+_locks: Dict[int, threading.Lock] = {}
+_guard = threading.Lock()
+_INFO_KEY = "event_lock"
+
+
+def _event_lock(event_id: int) -> threading.Lock:
+    with _guard:
+        lock = _locks.get(event_id)
+        if lock is None:
+            lock = _locks[event_id] = threading.Lock()
+        return lock
+
+
+def _begin_immediate(session: Session) -> None:
+    """
+    SQLite em arquivo: pegar o lock de escrita do banco já no início da
+    transação (BEGIN IMMEDIATE), para os outros workers esperarem antes de
+    ler o Elo. O pysqlite só abre a transação no primeiro INSERT/UPDATE, então
+    as leituras anteriores desta sessão estão fora dela. :memory: (testes)
+    compartilha uma única conexão entre as threads: fica só o lock do processo.
+    """
+    connection = session.connection()
+    if connection.dialect.name != "sqlite" or connection.engine.url.database in (None, "", ":memory:"):
+        return
+    # Direto no pysqlite, como o BEGIN implícito dele (fora das métricas de consultas)
+    dbapi_connection = connection.connection.dbapi_connection
+    if not dbapi_connection.in_transaction:
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+
+def lock_event(session: Session, event_id: int) -> Optional[Event]:
+    """
+    Serializar as escritas de partidas do evento e retornar o evento (None
+    se não existe). Chamar antes de ler jogadores, partidas e classificação
+    que serão gravados; liberar com unlock_event no finally da rota.
+
+    No processo, um threading.Lock por evento, mantido até unlock_event (o
+    delta ao vivo publicado depois do commit sai na ordem dos commits); entre
+    workers, SELECT ... FOR UPDATE na linha do evento (PostgreSQL) ou BEGIN
+    IMMEDIATE (SQLite), até o fim da transação.
+    """
+    lock = _event_lock(event_id)
+    lock.acquire()
+    session.info[_INFO_KEY] = lock
+    _begin_immediate(session)
+    return session.query(Event).filter(Event.id == event_id).with_for_update().first()
+
+
+def unlock_event(session: Session) -> None:
+    """Liberar o lock de lock_event (sem efeito se a sessão não pegou nenhum)"""
+    lock = session.info.pop(_INFO_KEY, None)
+    if lock is not None:
+        lock.release()
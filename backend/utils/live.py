@@ -0,0 +1,253 @@
+# utils/live.py - Hub de transmissão ao vivo (partidas e classificação) por evento
+
+import asyncio
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from utils.cache import read_cache, RANKING
+from utils.etag import event_version
+from utils.standings import standing_rows
+from logger import get_logger
+
+log = get_logger("live")
+
+# Marcador na fila: o assinante precisa de um snapshot do ranking
+RESYNC = object()
+
+
+class Subscriber:
+    """
+    Conexão inscrita nas mudanças de um evento.
+
+    A fila é limitada: se o cliente não consome rápido o bastante e ela
+    enche, as mensagens pendentes são descartadas e trocadas por um pedido
+    de snapshot (o cliente recebe o ranking completo e segue a partir
+    dele). Fila e flags só são usadas na thread do event loop da conexão.
+
+    snapshot_after é a geração do evento (LiveHub) da última mudança que
+    não entrou na fila: o snapshot precisa ter começado depois dela.
+    """
+
+    def __init__(self, event_id: int, max_queue: int, generation: int = 0):
+        self.event_id = event_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.resync_pending = False
+        self.snapshot_after = generation
+        self.dropped = 0
+
+    def push(self, payload, generation: int = 0) -> bool:
+        """Enfileirar uma mensagem; retorna True se a fila estava cheia"""
+        if self.resync_pending:
+            # O snapshot pendente já inclui esta mudança
+            self.snapshot_after = max(self.snapshot_after, generation)
+            return False
+        if payload is not RESYNC:
+            try:
+                self.queue.put_nowait(payload)
+                return False
+            except asyncio.QueueFull:
+                pass
+
+        overflow = payload is not RESYNC
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.resync_pending = True
+        self.snapshot_after = max(self.snapshot_after, generation)
+        self.queue.put_nowait(RESYNC)
+        return overflow
+
+    async def next(self, timeout: Optional[float] = None):
+        """Próxima mensagem (texto JSON ou RESYNC); None se o timeout passar"""
+        try:
+            payload = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if payload is RESYNC:
+            self.resync_pending = False
+        return payload
+
+
+class LiveHub:
+    """
+    Distribui as mudanças de cada evento para as conexões inscritas.
+
+    As rotas de escrita rodam no threadpool: publish() serializa a
+    mensagem uma vez e agenda a entrega no event loop de cada conexão
+    (uma chamada por loop, não por conexão). O hub é por worker; as
+    mudanças feitas em outros workers chegam pela invalidação do cache
+    compartilhado e viram um snapshot.
+
+    O snapshot também é montado uma vez por evento (e event loop): um
+    resync com milhares de conexões faz uma consulta, não uma por conexão.
+    Cada publish/resync avança a geração do evento; um snapshot começado
+    na geração G serve a todo assinante com snapshot_after <= G.
+    """
+
+    def __init__(self, max_queue: int = 64):
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._generations: Dict[int, int] = {}
+        self._snapshots: Dict[Tuple[asyncio.AbstractEventLoop, int], Tuple[int, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.resyncs = 0
+        self.overflows = 0
+        self.snapshots = 0
+
+    def subscribe(self, event_id: int) -> Subscriber:
+        """Inscrever uma conexão (chamar de dentro do event loop dela)"""
+        with self._lock:
+            generation = self._generations.get(event_id, 0)
+            subscriber = Subscriber(event_id, self.max_queue, generation)
+            self._subscribers[event_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.event_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.event_id]
+                    self._generations.pop(subscriber.event_id, None)
+                    for key in [k for k in self._snapshots if k[1] == subscriber.event_id]:
+                        del self._snapshots[key]
+
+    def has_subscribers(self, event_id: int) -> bool:
+        return event_id in self._subscribers
+
+    def publish(self, event_id: int, message: dict) -> None:
+        """Enviar uma mensagem a todas as conexões do evento"""
+        payload = json.dumps(jsonable_encoder(message))
+        with self._lock:
+            self.published += 1
+        self._dispatch([event_id], payload)
+
+    async def snapshot(self, subscriber: Subscriber, build: Callable[[int], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        Snapshot (texto JSON) para o assinante, de build(event_id). Reaproveita
+        o que já está sendo montado (ou foi montado) no mesmo loop se ele
+        começou depois da última mudança que o assinante deixou de receber.
+        """
+        key = (subscriber.loop, subscriber.event_id)
+        with self._lock:
+            entry = self._snapshots.get(key)
+            if entry is None or entry[0] < subscriber.snapshot_after:
+                generation = self._generations.get(subscriber.event_id, 0)
+                entry = (generation, asyncio.ensure_future(build(subscriber.event_id)))
+                entry[1].add_done_callback(lambda future: self._forget_failed(key, future))
+                if subscriber.event_id in self._subscribers:
+                    self._snapshots[key] = entry
+                self.snapshots += 1
+        # shield: a conexão que desiste não cancela o snapshot das outras
+        return await asyncio.shield(entry[1])
+
+    def _forget_failed(self, key, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if key in self._snapshots and self._snapshots[key][1] is future:
+                    del self._snapshots[key]
+
+    def resync(self, event_id: Optional[int] = None) -> None:
+        """Pedir um snapshot novo às conexões do evento (todas, se None)"""
+        with self._lock:
+            event_ids = list(self._subscribers) if event_id is None else [event_id]
+            event_ids = [e for e in event_ids if e in self._subscribers]
+            if not event_ids:
+                return
+            self.resyncs += 1
+        self._dispatch(event_ids, RESYNC)
+
+    def _dispatch(self, event_ids: Iterable[int], payload) -> None:
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscriber]] = defaultdict(list)
+        with self._lock:
+            generations = {}
+            for event_id in event_ids:
+                subscribers = self._subscribers.get(event_id)
+                if not subscribers:
+                    continue
+                # Depois do commit de quem publica: snapshots começados a partir daqui já o incluem
+                generations[event_id] = self._generations[event_id] = self._generations.get(event_id, 0) + 1
+                for subscriber in subscribers:
+                    by_loop[subscriber.loop].append(subscriber)
+        for loop, subscribers in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, subscribers, payload, generations)
+            except RuntimeError:
+                pass  # loop já encerrado; a conexão sai no unsubscribe
+
+    def _deliver(self, subscribers: List[Subscriber], payload, generations: Dict[int, int]) -> None:
+        overflows = sum(
+            1 for subscriber in subscribers if subscriber.push(payload, generations[subscriber.event_id])
+        )
+        if overflows:
+            with self._lock:
+                self.overflows += overflows
+
+    def stats(self) -> dict:
+        """Contadores para monitoramento"""
+        with self._lock:
+            return {
+                "events": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "max_queue": self.max_queue,
+                "published": self.published,
+                "resyncs": self.resyncs,
+                "overflows": self.overflows,
+                "snapshots": self.snapshots,
+            }
+
+
+live_hub = LiveHub(int(os.getenv("LIVE_QUEUE_SIZE", "64")))
+
+
+def publish_match_delta(
+    session: Session,
+    event_id: int,
+    action: str,
+    matches: List,
+    player_ids: Iterable[int]
+) -> None:
+    """
+    Transmitir uma mudança de partidas aos inscritos no evento.
+
+    Chamar depois do commit, com a sessão ainda aberta: lê a versão do
+    evento e as linhas da classificação dos jogadores afetados. Sem
+    inscritos neste worker não faz nenhuma query.
+
+    Args:
+        action: "created", "updated" ou "deleted"
+        matches: Partidas alteradas (MatchResponse, ou {"id": ...} se removidas)
+        player_ids: Jogadores com classificação/Elo alterados
+    """
+    if not live_hub.has_subscribers(event_id):
+        return
+    try:
+        live_hub.publish(event_id, {
+            "type": "match",
+            "action": action,
+            "event_id": event_id,
+            "version": event_version(session, event_id),
+            "matches": matches,
+            "standings": standing_rows(session, event_id, player_ids),
+        })
+    except Exception as e:
+        log.error(f"Falha ao transmitir partidas do evento {event_id}: {e}")
+        live_hub.resync(event_id)
+
+
+def _on_remote_invalidation(event_id: Optional[int], names: Iterable[str]) -> None:
+    # Escrita feita em outro worker: as conexões daqui recebem um snapshot
+    if event_id is None:
+        live_hub.resync()
+    elif RANKING in names:
+        live_hub.resync(event_id)
+
+
+read_cache.add_listener(_on_remote_invalidation)
@@ -0,0 +1,323 @@
+# utils/metrics.py - Métricas no formato Prometheus (HTTP, banco e domínio)
+
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.query_tracker import check_budget, current_tracker, track_request
+from logger import get_logger
+
+log = get_logger("metrics")
+
+PREFIX = "racket_hero_"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+# nome -> (tipo, ajuda, buckets dos histogramas)
+METRICS = {
+    "http_requests_total": ("counter", "Requisições HTTP concluídas", None),
+    "http_requests_in_flight": ("gauge", "Requisições HTTP em andamento", None),
+    "http_request_duration_seconds": ("histogram", "Latência das requisições HTTP", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "Tamanho do corpo das respostas", SIZE_BUCKETS),
+    "db_queries_per_request": ("histogram", "Consultas SQL por requisição", QUERY_COUNT_BUCKETS),
+    "db_time_per_request_seconds": ("histogram", "Tempo em SQL por requisição", LATENCY_BUCKETS),
+    "db_query_duration_seconds": ("histogram", "Duração de cada consulta SQL", QUERY_LATENCY_BUCKETS),
+    "matches_created_total": ("counter", "Partidas criadas", None),
+    "elo_recomputes_total": ("counter", "Eventos com Elo recalculado em lote", None),
+    "read_cache_hits_total": ("counter", "Acertos do cache de leitura", None),
+    "read_cache_misses_total": ("counter", "Faltas do cache de leitura", None),
+    "auth_cache_hits_total": ("counter", "Acertos do cache de autenticação", None),
+    "auth_cache_misses_total": ("counter", "Faltas do cache de autenticação", None),
+    "live_subscribers": ("gauge", "Conexões ao vivo (WebSocket/SSE) abertas", None),
+    "rate_limit_rejected_total": ("counter", "Requisições recusadas com 429", None),
+    "log_records_dropped_total": ("counter", "Registros de log descartados com a fila cheia", None),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+class _Shard:
+    """Valores escritos por uma única thread (sem lock: só ela altera)"""
+
+    __slots__ = ("values", "histograms")
+
+    def __init__(self):
+        self.values: Dict[Key, float] = {}
+        self.histograms: Dict[Key, List[float]] = {}
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas por thread, somados na coleta.
+
+    Cada thread (event loop, threadpool das rotas) escreve só no próprio
+    shard, então o caminho quente não disputa lock; a coleta copia os
+    dicionários (`dict.copy` é atômico sob o GIL) e soma. Gauges e
+    contadores que já existem em outros objetos (caches, hub ao vivo)
+    entram por coletores chamados só na coleta.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()  # só na primeira escrita de cada thread
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = METRICS[name][2]
+        series = histograms.get(key)
+        if series is None:
+            # contagem por bucket (+Inf no fim), soma
+            series = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        series[bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Labels, float]]]) -> None:
+        """Função chamada na coleta que devolve (nome, labels, valor)"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """Somar os shards e os coletores deste worker"""
+        values: Dict[Key, float] = {}
+        histograms: Dict[Key, List[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in shard.values.copy().items():
+                values[key] = values.get(key, 0) + value
+            for key, series in shard.histograms.copy().items():
+                total = histograms.setdefault(key, [0] * len(series))
+                for i, count in enumerate(list(series)):
+                    total[i] += count
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    values[(name, labels)] = values.get((name, labels), 0) + value
+            except Exception as e:
+                log.warning(f"Coletor de métricas falhou: {e}")
+        return {
+            "values": [[name, list(labels), value] for (name, labels), value in values.items()],
+            "histograms": [[name, list(labels), series] for (name, labels), series in histograms.items()],
+        }
+
+    def reset(self) -> None:
+        """Zerar os valores (testes)"""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.values.clear()
+                shard.histograms.clear()
+
+
+def merge(snapshots: Iterable[dict]) -> Tuple[Dict[Key, float], Dict[Key, List[float]]]:
+    values: Dict[Key, float] = {}
+    histograms: Dict[Key, List[float]] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["values"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            values[key] = values.get(key, 0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total = histograms.setdefault(key, [0] * len(series))
+            for i, count in enumerate(series):
+                total[i] += count
+    return values, histograms
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(values: Dict[Key, float], histograms: Dict[Key, List[float]]) -> str:
+    """Texto no formato de exposição do Prometheus (0.0.4)"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series_values = sorted((labels, v) for (n, labels), v in values.items() if n == name)
+        series_histograms = sorted((labels, s) for (n, labels), s in histograms.items() if n == name)
+        if not series_values and not series_histograms:
+            continue
+        full_name = PREFIX + name
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value in series_values:
+            lines.append(f"{full_name}{_format_labels(labels)} {_format_number(value)}")
+        for labels, series in series_histograms:
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_number(bound)
+                lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_number(series[-1])}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Com vários workers (METRICS_DIR): cada um grava seu snapshot periodicamente
+# e quem recebe o scrape soma os arquivos de todos
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def write_snapshot() -> dict:
+    """Gravar o snapshot deste worker em METRICS_DIR (troca atômica do arquivo)"""
+    snapshot = metrics.snapshot()
+    fd, tmp = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, _snapshot_path(os.getpid()))
+    return snapshot
+
+
+def exposition() -> str:
+    """Métricas deste worker ou, com METRICS_DIR, de todos os workers"""
+    if not METRICS_DIR:
+        return render(*merge([metrics.snapshot()]))
+
+    snapshots = [write_snapshot()]
+    own = _snapshot_path(os.getpid())
+    for path in glob.glob(os.path.join(METRICS_DIR, "worker-*.json")):
+        if path == own:
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # worker gravando ou arquivo removido
+    return render(*merge(snapshots))
+
+
+_flusher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start_flusher() -> None:
+    """Gravar o snapshot a cada METRICS_FLUSH_SECONDS (só com METRICS_DIR)"""
+    global _flusher
+    if not METRICS_DIR or _flusher is not None:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _stop.clear()
+
+    def run():
+        while not _stop.wait(METRICS_FLUSH_SECONDS):
+            try:
+                write_snapshot()
+            except OSError as e:
+                log.warning(f"Falha ao gravar métricas em {METRICS_DIR}: {e}")
+
+    _flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+    _flusher.start()
+
+
+def stop_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        _stop.set()
+        _flusher.join(timeout=5)
+        _flusher = None
+        write_snapshot()  # contadores do worker continuam somando depois que ele sai
+
+
+# Consultas SQL: histograma por thread e tracker da requisição atual (utils.query_tracker)
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Total de consultas = _count do histograma
+    elapsed = time.perf_counter() - context._metrics_started
+    metrics.observe("db_query_duration_seconds", elapsed)
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.record(statement, elapsed)
+
+
+_in_flight = 0  # só o event loop altera
+metrics.add_collector(lambda: [("http_requests_in_flight", (), _in_flight)])
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latência, status, tamanho da resposta, requisições em
+    andamento e consultas SQL por rota (o template, não o caminho concreto).
+    Requisições acima do orçamento de consultas são logadas (check_budget).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+        _in_flight += 1
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        with track_request(scope) as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _in_flight -= 1
+                route = getattr(scope.get("route"), "path", "unmatched")
+                labels = (("method", scope["method"]), ("route", route))
+                metrics.inc("http_requests_total", labels + (("status", str(status_code)),))
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+                metrics.observe("http_response_size_bytes", size, labels)
+                metrics.observe("db_queries_per_request", queries.count, labels)
+                metrics.observe("db_time_per_request_seconds", queries.duration, labels)
+                check_budget(queries, scope["method"], route)
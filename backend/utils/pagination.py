@@ -0,0 +1,93 @@
+# utils/pagination.py - Paginação por cursor (keyset) para listagens
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.orm import Query
+from validators import QueryValidator
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(values: list) -> str:
+    """Codificar a chave da última linha da página em um cursor opaco."""
+    keys = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"k": keys}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Decodificar cursor recebido do cliente (HTTP 400 se inválido)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["k"]
+        if len(keys) != len(columns):
+            raise ValueError("tamanho da chave")
+        return [
+            datetime.fromisoformat(k) if isinstance(c.type, DateTime) else int(k)
+            for k, c in zip(keys, columns)
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def keyset_page(
+    query: Query,
+    key_column,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_total: bool = False,
+    descending: bool = False
+) -> list:
+    """
+    Aplicar paginação keyset (WHERE chave > cursor ORDER BY chave LIMIT n).
+
+    Sem limit e sem cursor retorna todas as linhas (compatível com os
+    clientes atuais). O corpo continua sendo uma lista; o cursor da
+    próxima página vai no header X-Next-Cursor e o total filtrado, se
+    pedido, em X-Total-Count.
+
+    Args:
+        query: Query já filtrada, sem ORDER BY
+        key_column: Coluna única e crescente usada como chave (ex: Match.id),
+            ou tupla de colunas terminando em uma única (ex: (Event.starts_at, Event.id));
+            colunas da chave não podem ser NULL
+        response: Response do FastAPI para receber os headers
+        cursor: Cursor recebido da página anterior
+        limit: Tamanho da página (1-1000)
+        include_total: Se True, calcula COUNT(*) dos filtros
+        descending: Ordem decrescente da chave
+    """
+    columns: List = list(key_column) if isinstance(key_column, (list, tuple)) else [key_column]
+
+    if limit is not None:
+        try:
+            limit = QueryValidator.validate_limit(limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+    query = query.order_by(*[c.desc() if descending else c for c in columns])
+
+    if limit is None:
+        return query.all()
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return rows
@@ -1,11 +1,12 @@
 # utils/permissions.py - Sistema de Permissões
 
 from enum import Enum
+from typing import Optional
 from fastapi import Depends, HTTPException, Header, status
 from sqlalchemy.orm import Session
 from database import get_db
 from models.usuario import Usuario, TipoUsuario
-from utils.security import verify_token
+from utils.auth_cache import auth_cache, usuario_columns
 from logger import get_logger
 
 log = get_logger("permissions")
@@ -72,7 +73,30 @@ PERMISSOES_POR_TIPO = {
 }
 
 
-def obter_permissoes(tipo_usuario: TipoUsuario) -> set:
+# Tipos legados (pré-enum) e seus equivalentes
+TIPOS_LEGADOS = {
+    "usuario": TipoUsuario.JOGADOR,
+    "organizador": TipoUsuario.ORGANIZADOR,
+    "admin": TipoUsuario.ADMIN
+}
+
+# Permissões já resolvidas por valor de tipo (enum ou string legada)
+_PERMISSOES_RESOLVIDAS = {
+    **{legado: frozenset(PERMISSOES_POR_TIPO[tipo]) for legado, tipo in TIPOS_LEGADOS.items()},
+    **{tipo: frozenset(permissoes) for tipo, permissoes in PERMISSOES_POR_TIPO.items()},
+}
+
+# Hierarquia: JOGADOR < ORGANIZADOR < ADMIN (TipoUsuario é str: vale para o valor salvo no banco)
+NIVEL_POR_TIPO = {
+    TipoUsuario.JOGADOR: 0,
+    TipoUsuario.ORGANIZADOR: 1,
+    TipoUsuario.ADMIN: 2,
+    # Mapeamento de tipos legados (pré-enum)
+    "usuario": 0,
+}
+
+
+def obter_permissoes(tipo_usuario: TipoUsuario) -> frozenset:
     """
     Obter permissões de um tipo de usuário.
     
@@ -80,17 +104,14 @@ def obter_permissoes(tipo_usuario: TipoUsuario) -> set:
     - "usuario" → JOGADOR (permissions)
     - "organizador" → ORGANIZADOR (permissions)
     - "admin" → ADMIN (all permissions)
+    
+    Outras strings recebem as permissões de JOGADOR.
     """
-    # Se for string (tipo legado), converter para tipo enum equivalente
+    if tipo_usuario in _PERMISSOES_RESOLVIDAS:
+        return _PERMISSOES_RESOLVIDAS[tipo_usuario]
     if isinstance(tipo_usuario, str):
-        tipo_map = {
-            "usuario": TipoUsuario.JOGADOR,
-            "organizador": TipoUsuario.ORGANIZADOR,
-            "admin": TipoUsuario.ADMIN
-        }
-        tipo_usuario = tipo_map.get(tipo_usuario, TipoUsuario.JOGADOR)
-    
-    return PERMISSOES_POR_TIPO.get(tipo_usuario, set())
+        return _PERMISSOES_RESOLVIDAS[TipoUsuario.JOGADOR]
+    return frozenset()
 
 
 def tem_permissao(usuario: Usuario, permissao: Permissao) -> bool:
@@ -101,13 +122,24 @@ def tem_permissao(usuario: Usuario, permissao: Permissao) -> bool:
     return permissao in permissoes
 
 
-async def get_usuario_autenticado(
+def _carregar_usuario(db: Session, usuario_id: int) -> Optional[dict]:
+    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    return usuario_columns(usuario) if usuario else None
+
+
+def get_usuario_autenticado(
     authorization: str = Header(None),
     db: Session = Depends(get_db)
 ) -> Usuario:
     """
     Dependency para obter o usuário autenticado a partir do token.
     
+    Síncrona de propósito: consulta o banco, então roda no threadpool.
+    Token decodificado e dados do usuário vêm do auth_cache (TTL curto,
+    invalidado quando o usuário é alterado); o banco só é consultado na
+    primeira requisição. O Usuario retornado não está ligado à sessão e
+    só tem as colunas de CACHED_COLUMNS.
+    
     Lança HTTPException 401 se:
     - Token não fornecido
     - Token inválido ou expirado
@@ -122,7 +154,7 @@ async def get_usuario_autenticado(
         )
     
     token = authorization.replace("Bearer ", "")
-    token_data = verify_token(token)
+    token_data = auth_cache.token(token)
     
     if not token_data:
         raise HTTPException(
@@ -131,23 +163,23 @@ async def get_usuario_autenticado(
             headers={"error_code": "INVALID_TOKEN"}
         )
     
-    usuario = db.query(Usuario).filter(Usuario.id == token_data.usuario_id).first()
+    dados = auth_cache.usuario(token_data.usuario_id, lambda: _carregar_usuario(db, token_data.usuario_id))
     
-    if not usuario:
+    if not dados:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
             headers={"error_code": "USER_NOT_FOUND"}
         )
     
-    if not usuario.ativo:
+    if not dados["ativo"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuário inativo",
             headers={"error_code": "USER_INACTIVE"}
         )
     
-    return usuario
+    return Usuario(**dados)
 
 
 def require_permission(permissao: Permissao):
@@ -156,7 +188,7 @@ def require_permission(permissao: Permissao):
     
     Exemplo:
         @router.get("/eventos")
-        async def listar_eventos(usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))):
+        def listar_eventos(usuario: Usuario = Depends(require_permission(Permissao.VER_EVENTOS))):
             return eventos
     """
     async def verificar_permissao(
@@ -187,24 +219,14 @@ def require_tipo(tipo_minimo: TipoUsuario):
     
     Exemplo:
         @router.post("/eventos")
-        async def criar_evento(usuario: Usuario = Depends(require_tipo(TipoUsuario.ORGANIZADOR))):
+        def criar_evento(usuario: Usuario = Depends(require_tipo(TipoUsuario.ORGANIZADOR))):
             return evento
     """
     async def verificar_tipo(
         usuario: Usuario = Depends(get_usuario_autenticado)
     ) -> Usuario:
-        hierarquia = {
-            TipoUsuario.JOGADOR: 0,
-            TipoUsuario.ORGANIZADOR: 1,
-            TipoUsuario.ADMIN: 2,
-            # Mapeamento de tipos legados (pré-enum)
-            "usuario": 0,
-            "organizador": 1,
-            "admin": 2
-        }
-        
-        nivel_usuario = hierarquia.get(usuario.tipo, -1)
-        nivel_minimo = hierarquia.get(tipo_minimo, 0)
+        nivel_usuario = NIVEL_POR_TIPO.get(usuario.tipo, -1)
+        nivel_minimo = NIVEL_POR_TIPO.get(tipo_minimo, 0)
         
         if nivel_usuario < nivel_minimo:
             log.warning(f"Acesso negado para usuário {usuario.email}: tipo {tipo_minimo.value} necessário (tipo atual: {usuario.tipo})")
@@ -0,0 +1,330 @@
+# utils/profiling.py - Profiling por amostragem de requisições (stacks colapsadas)
+
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+import anyio
+from starlette.routing import Match
+from database import SessionLocal
+from models.usuario import Usuario, TipoUsuario
+from utils.auth_cache import auth_cache, usuario_columns
+from utils.permissions import NIVEL_POR_TIPO
+from logger import get_logger
+
+log = get_logger("profiling")
+
+# Perfis gravados no formato "a;b;c N" (flamegraph.pl, speedscope, inferno)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getenv("LOG_DIR", "logs"), "profiles"))
+# Intervalo entre amostras das stacks enquanto há requisição sendo perfilada
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+# Modo contínuo: perfilar 1 a cada N requisições de cada rota (0 desliga)
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+# Perfis do modo contínuo mantidos em PROFILE_DIR/sampled (os mais antigos saem)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+PROFILE_HEADER = "X-Profile"
+_HEADER = PROFILE_HEADER.lower().encode()
+_TRUE = (b"1", b"true", b"yes")
+_QUERY_FLAG = re.compile(rb"(?:^|&)profile=(?:1|true|yes)(?:&|$)")
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+class Profile:
+    """Stacks amostradas de uma requisição"""
+
+    __slots__ = ("method", "route", "path", "frame", "stacks", "samples", "started", "duration")
+
+    def __init__(self, method: str, route: str, directory: str):
+        slug = _SLUG.sub("_", route).strip("_") or "root"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"{stamp}-{next(_sequence):06d}-{method}-{slug}.folded"
+        self.method = method
+        self.route = route
+        self.path = os.path.join(directory, name)
+        self.frame = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def save(self) -> str:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.stacks.items()):
+                f.write(f"{stack} {n}\n")
+        return self.path
+
+
+_sequence = itertools.count(1)
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    """Nome do frame na stack: função qualificada e arquivo (relativo ao sys.path)"""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for entry in sorted((p for p in sys.path if p), key=len, reverse=True):
+            if filename.startswith(entry + os.sep):
+                filename = filename[len(entry) + 1:]
+                break
+        # co_qualname só existe a partir do Python 3.11
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+        _labels[code] = label
+    return label
+
+
+# Perfil da requisição atual: o contexto copiado para a thread da rota
+# carrega o mesmo objeto, e é por ele que o sampler reconhece a thread
+_current: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+
+
+def _owner(frames: List, active: Dict[int, Profile]) -> Optional[Profile]:
+    """
+    A qual perfil ativo pertence a stack de uma thread (frames do topo para a base).
+
+    No event loop, a requisição é a que tem o frame do middleware na stack.
+    Nas threads do anyio, o frame que executa a rota (WorkerThread.run) tem
+    na variável local `context` a cópia do contexto da requisição.
+    """
+    for frame in frames:
+        profile = active.get(id(frame))
+        if profile is not None and profile.frame is frame:
+            return profile
+    for frame in frames[-1:-6:-1]:
+        if "context" in frame.f_code.co_varnames:
+            context = frame.f_locals.get("context")
+            if isinstance(context, Context):
+                profile = context.get(_current)
+                if profile is not None and active.get(id(profile.frame)) is profile:
+                    return profile
+    return None
+
+
+class Sampler:
+    """
+    Thread que amostra as stacks (sys._current_frames) enquanto existe
+    requisição perfilada; sem perfis ativos fica parada esperando o evento.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[int, Profile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._active[id(profile.frame)] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.pop(id(profile.frame), None)
+        profile.duration = time.perf_counter() - profile.started
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                active = dict(self._active)
+            self._sample(me, active)
+            time.sleep(self.interval)
+
+    def _sample(self, me: int, active: Dict[int, Profile]) -> None:
+        for ident, top in sys._current_frames().items():
+            if ident == me:
+                continue
+            frames = []
+            frame = top
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            profile = _owner(frames, active)
+            if profile is not None:
+                profile.stacks[";".join(_label(f.f_code) for f in reversed(frames))] += 1
+                profile.samples += 1
+
+
+sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+
+
+def _is_admin(usuario_id: int) -> bool:
+    """Tipo e ativo conferidos no banco (via auth_cache), como require_tipo(ADMIN)"""
+    def load():
+        session = SessionLocal()
+        try:
+            usuario = session.query(Usuario).filter(Usuario.id == usuario_id).first()
+            return usuario_columns(usuario) if usuario else None
+        finally:
+            session.close()
+
+    dados = auth_cache.usuario(usuario_id, load)
+    if not dados or not dados["ativo"]:
+        return False
+    return NIVEL_POR_TIPO.get(dados["tipo"], -1) >= NIVEL_POR_TIPO[TipoUsuario.ADMIN]
+
+
+async def _requested_by_admin(scope) -> bool:
+    """
+    Header X-Profile (ou ?profile=1) enviado por um admin. O tipo do token
+    não basta (pode ter mudado depois da emissão): o usuário é conferido no
+    banco, no threadpool, e só quando o profiling foi pedido.
+    """
+    query = scope.get("query_string", b"")
+    flagged = b"profile=" in query and _QUERY_FLAG.search(query) is not None
+    authorization = None
+    for key, value in scope["headers"]:
+        if key == _HEADER:
+            flagged = flagged or value.strip().lower() in _TRUE
+        elif key == b"authorization":
+            authorization = value
+    if not flagged:
+        return False
+    scheme, _, token = (authorization or b"").decode("latin-1").partition(" ")
+    token_data = auth_cache.token(token) if scheme.lower() == "bearer" and token else None
+    if token_data is None or not await anyio.to_thread.run_sync(_is_admin, token_data.usuario_id):
+        log.warning(f"Profiling pedido sem usuário admin: {scope['method']} {scope['path']}")
+        return False
+    return True
+
+
+def _prune(directory: str, keep: int) -> None:
+    """Manter só os `keep` perfis mais recentes do diretório"""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".folded"))
+    except FileNotFoundError:
+        return
+    for name in names[:-keep] if keep > 0 else names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def _write(profile: Profile, sampled: bool) -> None:
+    try:
+        profile.save()
+        if sampled:
+            _prune(os.path.dirname(profile.path), PROFILE_KEEP)
+        log.info(
+            f"Perfil gravado: {profile.method} {profile.route} "
+            f"({profile.samples} amostras em {profile.duration * 1000:.0f} ms) -> {profile.path}"
+        )
+    except Exception as e:
+        log.error(f"Erro ao gravar perfil {profile.path}: {e}", exc_info=True)
+
+
+def list_profiles() -> List[dict]:
+    """Perfis gravados (sob demanda e do modo contínuo), mais recentes primeiro"""
+    profiles = []
+    for subdir in ("", "sampled"):
+        directory = os.path.join(PROFILE_DIR, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if name.endswith(".folded"):
+                stat = os.stat(os.path.join(directory, name))
+                profiles.append({
+                    "filename": os.path.join(subdir, name) if subdir else name,
+                    "size": stat.st_size,
+                    "created": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                })
+    return sorted(profiles, key=lambda p: os.path.basename(p["filename"]), reverse=True)
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """Caminho de um perfil gravado; None para nomes fora de PROFILE_DIR"""
+    root = os.path.realpath(PROFILE_DIR)
+    path = os.path.realpath(os.path.join(root, filename))
+    if not path.startswith(root + os.sep) or not path.endswith(".folded") or not os.path.isfile(path):
+        return None
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI: perfila a requisição quando um admin envia o header
+    X-Profile: 1 (ou ?profile=1) e, com PROFILE_SAMPLE_EVERY=N, 1 a cada N
+    requisições de cada rota. O nome do arquivo volta no header X-Profile.
+
+    Desligado, o custo é procurar o header na lista da requisição.
+    """
+
+    def __init__(self, app, sample_every: Optional[int] = None):
+        self.app = app
+        self.sample_every = PROFILE_SAMPLE_EVERY if sample_every is None else sample_every
+        self._counters: Counter = Counter()
+        self._routes: Dict[tuple, str] = {}
+
+    def _route(self, scope) -> str:
+        """Template da rota antes do roteamento (o contador é por rota)"""
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is None:
+            route = "unmatched"
+            for candidate in scope["app"].router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = getattr(candidate, "path", route)
+                    break
+            if len(self._routes) >= 4096:
+                self._routes.clear()
+            self._routes[key] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = await _requested_by_admin(scope)
+        route = None
+        if not requested and self.sample_every > 0:
+            route = self._route(scope)
+            self._counters[route] += 1
+            sampled = self._counters[route] % self.sample_every == 0
+        else:
+            sampled = False
+        if not requested and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        directory = os.path.join(PROFILE_DIR, "sampled") if sampled else PROFILE_DIR
+        profile = Profile(scope["method"], route or self._route(scope), directory)
+        profile.frame = sys._getframe()
+
+        async def send_wrapper(message):
+            if requested and message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(_HEADER, profile.name.encode())]
+            await send(message)
+
+        token = _current.set(profile)
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(profile)
+            _current.reset(token)
+            await anyio.to_thread.run_sync(_write, profile, sampled)
@@ -0,0 +1,149 @@
+# utils/query_tracker.py - Consultas SQL por requisição: orçamento e detecção de N+1
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from logger_production import get_logger
+
+log = get_logger("query_tracker")
+
+# Orçamento por requisição: acima disso a requisição é logada com as consultas repetidas
+QUERY_BUDGET_COUNT = int(os.getenv("QUERY_BUDGET_COUNT", "25"))
+QUERY_BUDGET_MS = float(os.getenv("QUERY_BUDGET_MS", "250"))
+# A mesma consulta (a menos dos parâmetros) repetida tantas vezes é suspeita de N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+_IN_LIST = re.compile(r"\((?:\?|%\(\w+\)s|%s)(?:,\s*(?:\?|%\(\w+\)s|%s))+\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Consulta sem valores: listas IN e literais numéricos colapsados"""
+    statement = _IN_LIST.sub("(?...)", statement)
+    statement = _NUMBER.sub("?", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+class QueryTracker:
+    """
+    Contagem e tempo das consultas de uma requisição (ou de um bloco).
+
+    As consultas guardam o texto como veio do SQLAlchemy (o mesmo objeto
+    str para a mesma consulta compilada); a normalização em fingerprint só
+    acontece no relatório.
+    """
+
+    __slots__ = ("count", "duration", "statements", "scope", "_lock")
+
+    def __init__(self, thread_safe: bool = False, scope: Optional[dict] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+        self.scope = scope  # requisição ASGI dona das consultas (rota para os logs)
+        self._lock = threading.Lock() if thread_safe else None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        if self._lock is None:
+            self.count += 1
+            self.duration += elapsed
+            self.statements[statement] += 1
+            return
+        with self._lock:
+            self.count += 1
+            self.duration += elapsed
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """SELECTs executados pelo menos `threshold` vezes, mais frequentes primeiro"""
+        counts: Counter = Counter()
+        for statement, n in list(self.statements.items()):
+            # Lotes de INSERT/UPDATE repetem a mesma instrução de propósito
+            if statement.lstrip()[:6].upper() == "SELECT":
+                counts[fingerprint(statement)] += n
+        return [(fp, n) for fp, n in counts.most_common() if n >= threshold]
+
+    def over_budget(self) -> bool:
+        return self.count > QUERY_BUDGET_COUNT or self.duration * 1000 > QUERY_BUDGET_MS
+
+    def report(self, limit: int = 5) -> str:
+        """Resumo legível: total, tempo e consultas mais repetidas"""
+        lines = [f"{self.count} consultas em {self.duration * 1000:.1f} ms"]
+        for fp, n in self.repeated(threshold=2)[:limit]:
+            lines.append(f"  {n}x {fp[:300]}")
+        return "\n".join(lines)
+
+
+# Tracker da requisição atual: o contexto é copiado para a thread da rota,
+# então o event loop e a thread do threadpool veem o mesmo objeto
+_current: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+@contextmanager
+def track_request(scope: Optional[dict] = None) -> Iterator[QueryTracker]:
+    """Acumular as consultas do contexto atual (requisição ou tarefa)"""
+    tracker = QueryTracker(scope=scope)
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+
+
+def current_tracker() -> Optional[QueryTracker]:
+    return _current.get()
+
+
+def current_route() -> Optional[str]:
+    """"MÉTODO /template/da/rota" da requisição atual; None fora de requisições"""
+    tracker = _current.get()
+    if tracker is None or tracker.scope is None:
+        return None
+    scope = tracker.scope
+    return f"{scope['method']} {getattr(scope.get('route'), 'path', 'unmatched')}"
+
+
+def check_budget(tracker: QueryTracker, method: str, route: str) -> None:
+    """Logar a requisição que estourou o orçamento, com os suspeitos de N+1"""
+    # Caminho comum sem normalizar nada: nenhuma consulta repetida demais e dentro do orçamento
+    if not tracker.over_budget() and max(tracker.statements.values(), default=0) < QUERY_REPEAT_THRESHOLD:
+        return
+    repeated = tracker.repeated()
+    if not tracker.over_budget() and not repeated:
+        return
+    suspects = "; ".join(f"{n}x {fp[:200]}" for fp, n in repeated[:3]) or "-"
+    log.warning(
+        f"Orçamento de consultas: {method} {route} fez {tracker.count} consultas "
+        f"em {tracker.duration * 1000:.1f} ms (limites {QUERY_BUDGET_COUNT} / {QUERY_BUDGET_MS:.0f} ms); "
+        f"repetidas: {suspects}"
+    )
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[QueryTracker]:
+    """
+    Registrar todas as consultas do engine durante o bloco, de qualquer
+    thread (testes com TestClient: a rota roda fora da thread do teste).
+    """
+    tracker = QueryTracker(thread_safe=True)
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._capture_started = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        tracker.record(statement, time.perf_counter() - context._capture_started)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield tracker
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
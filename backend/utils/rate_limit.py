@@ -0,0 +1,114 @@
+# utils/rate_limit.py - Limites de requisições por IP e por usuário (slowapi)
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+from utils.auth_cache import auth_cache
+from logger import get_logger
+
+log = get_logger("rate_limit")
+
+# Limites por grupo de rotas, no formato do slowapi ("10/minute;100/hour")
+LOGIN_LIMIT = os.getenv("RATE_LIMIT_LOGIN", "10/minute;100/hour")
+AUTH_LIMIT = os.getenv("RATE_LIMIT_AUTH", "5/minute;30/hour")
+WRITE_LIMIT = os.getenv("RATE_LIMIT_WRITE", "120/minute")
+WRITE_IP_LIMIT = os.getenv("RATE_LIMIT_WRITE_IP", "600/minute")
+STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+
+def client_ip(request: Request) -> str:
+    """Chave por IP (atrás de proxy, rodar o uvicorn com --proxy-headers)"""
+    return f"ip:{get_remote_address(request)}"
+
+
+def user_or_ip(request: Request) -> str:
+    """Chave por usuário do token; sem token válido, por IP"""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        token_data = auth_cache.token(authorization[7:])
+        if token_data is not None:
+            return f"user:{token_data.usuario_id}"
+    return client_ip(request)
+
+
+# Janela deslizante aproximada (dois contadores por chave, sem lista de timestamps).
+# RATE_LIMIT_STORAGE_URI=redis://... compartilha os contadores entre workers;
+# com o Redis fora do ar cai para memória em vez de recusar requisições.
+limiter = Limiter(
+    key_func=client_ip,
+    strategy=os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter"),
+    storage_uri=STORAGE_URI,
+    key_prefix="racket_hero",
+    key_style="endpoint",
+    in_memory_fallback_enabled=True,
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+)
+
+_lock = threading.Lock()
+_rejected: Counter = Counter()
+
+
+def retry_after(request: Request) -> int:
+    """Segundos até a janela do limite estourado liberar uma requisição"""
+    current = getattr(request.state, "view_rate_limit", None)
+    if current is None:
+        return 1
+    try:
+        reset_at, _ = limiter.limiter.get_window_stats(current[0], *current[1])
+    except Exception:
+        return 1
+    return max(1, math.ceil(reset_at - time.time()))
+
+
+def rate_limit_exceeded(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """Resposta 429 com Retry-After, contando a recusa por rota e tipo de chave"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    # Tipo da chave ("user" ou "ip") pela key_func do limite que estourou
+    key_func = exc.limit.key_func if exc.limit is not None else client_ip
+    kind = key_func(request).split(":", 1)[0]
+    with _lock:
+        _rejected[(request.method, path, kind)] += 1
+
+    seconds = retry_after(request)
+    log.warning(f"Limite excedido ({exc.detail}) por {kind} em {request.method} {path}")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Muitas requisições, tente novamente em {seconds}s"},
+        headers={"Retry-After": str(seconds), "error_code": "RATE_LIMITED"}
+    )
+
+
+def stats() -> dict:
+    """Configuração e recusas (429) desde o início do processo"""
+    with _lock:
+        rejected = [
+            {"method": method, "route": path, "key": kind, "count": count}
+            for (method, path, kind), count in _rejected.most_common()
+        ]
+    return {
+        "enabled": limiter.enabled,
+        "storage": STORAGE_URI.split("://", 1)[0],
+        "limits": {
+            "login": LOGIN_LIMIT,
+            "auth": AUTH_LIMIT,
+            "write": WRITE_LIMIT,
+            "write_ip": WRITE_IP_LIMIT,
+        },
+        "rejected_total": sum(item["count"] for item in rejected),
+        "rejected": rejected,
+    }
+
+
+def reset() -> None:
+    """Zerar contadores e janelas (testes)"""
+    limiter.reset()
+    with _lock:
+        _rejected.clear()
@@ -1,8 +1,10 @@
 # utils/security.py - Utilidades de segurança (JWT, bcrypt)
 
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 import os
+import threading
 import bcrypt
 from jose import JWTError, jwt
 from pydantic import BaseModel
@@ -27,7 +29,76 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     expires_in: int  # segundos
 
-# Funções de senha com bcrypt direto
+# Custo do bcrypt; hashes com outro custo são refeitos no próximo login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dedicadas ao bcrypt e operações aceitas ao mesmo tempo (rodando + na fila)
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(4 * PASSWORD_WORKERS)))
+
+
+class PasswordPoolBusy(Exception):
+    """Pool de senhas saturado: a requisição deve ser recusada (HTTP 503)"""
+
+
+class PasswordPool:
+    """
+    Limite de concorrência para as operações de bcrypt.
+    
+    Cada hash/verificação leva ~250 ms de CPU (custo 12). Elas rodam em
+    `workers` threads próprias (o bcrypt libera o GIL), então no máximo
+    essa quantidade disputa a CPU ao mesmo tempo, e no máximo max_pending
+    ficam em andamento; acima disso run() falha na hora com
+    PasswordPoolBusy em vez de enfileirar logins que só terminariam
+    depois do timeout do cliente.
+    
+    Não libera o threadpool das rotas: a thread que chama run() fica
+    bloqueada esperando o resultado, como se fizesse o bcrypt ela mesma.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+    
+    def run(self, fn: Callable, *args):
+        """Executar fn(*args) no pool e esperar o resultado (bloqueia a thread que chama)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy("Muitas operações de senha em andamento")
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.completed += 1
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_pool = PasswordPool(PASSWORD_WORKERS, PASSWORD_MAX_PENDING)
+
+
+def _hashpw(password_bytes: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _checkpw(password_bytes: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password_bytes, hashed)
+
+
+# Funções de senha com bcrypt direto (no password_pool)
 def hash_password(password: str) -> str:
     """
     Hash de senha usando bcrypt.
@@ -37,11 +108,13 @@ def hash_password(password: str) -> str:
         
     Returns:
         Hash bcrypt da senha
+        
+    Raises:
+        PasswordPoolBusy: Pool de senhas saturado
     """
     # Limitar senha a 72 bytes (limite do bcrypt)
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt(rounds=12)
-    return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+    return password_pool.run(_hashpw, password_bytes, BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -53,9 +126,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         
     Returns:
         True se senha é válida, False caso contrário
+        
+    Raises:
+        PasswordPoolBusy: Pool de senhas saturado
     """
     password_bytes = plain_password.encode('utf-8')[:72]
-    return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
+    return password_pool.run(_checkpw, password_bytes, hashed_password.encode('utf-8'))
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Verificar se o hash foi gerado com um custo diferente de BCRYPT_ROUNDS"""
+    try:
+        # Formato: $2b$<custo>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
 
 # Funções de JWT
 def create_access_token(usuario_id: int, email: str, tipo: str) -> str:
@@ -0,0 +1,54 @@
+# utils/series.py - Redução de séries temporais para gráficos
+
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def downsample_lttb(points: Sequence[T], max_points: int, value: Callable[[T], float]) -> List[T]:
+    """
+    Reduzir uma série para no máximo max_points pontos (Largest Triangle Three Buckets).
+
+    Mantém o primeiro e o último ponto e, em cada balde intermediário, o
+    ponto que forma o maior triângulo com o ponto escolhido no balde
+    anterior e a média do balde seguinte. Preserva picos e vales, ao
+    contrário de amostrar a cada N pontos.
+
+    Args:
+        points: Série ordenada (o eixo x é a posição na série)
+        max_points: Número máximo de pontos na saída (>= 3 para reduzir)
+        value: Função que extrai o valor (eixo y) de um ponto
+
+    Returns:
+        Lista com os pontos selecionados, na ordem original
+    """
+    n = len(points)
+    if max_points >= n or max_points < 3:
+        return list(points)
+
+    ys = [value(p) for p in points]
+    selected = [points[0]]
+    bucket_size = (n - 2) / (max_points - 2)
+    a = 0
+
+    for i in range(max_points - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        count = next_end - next_start
+        avg_x = (next_start + next_end - 1) / 2 if count > 0 else n - 1
+        avg_y = sum(ys[next_start:next_end]) / count if count > 0 else ys[-1]
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (ys[j] - ys[a]) - (a - j) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+
+        selected.append(points[best])
+        a = best
+
+    selected.append(points[-1])
+    return selected
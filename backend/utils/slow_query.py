@@ -0,0 +1,186 @@
+# utils/slow_query.py - Log de consultas lentas com o plano de execução
+
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.query_tracker import current_route, fingerprint
+from logger_production import get_logger
+
+log = get_logger("slow_query")
+
+# Consultas acima disso (ms) vão para logs/slow_queries.log; 0 registra todas, negativo desliga
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Capturar EXPLAIN QUERY PLAN (SQLite) / EXPLAIN (PostgreSQL) da consulta lenta
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1").lower() not in ("0", "false", "no")
+# A mesma consulta (fingerprint) é registrada no máximo uma vez nesse intervalo (s)
+SLOW_QUERY_LOG_INTERVAL = float(os.getenv("SLOW_QUERY_LOG_INTERVAL", "60"))
+
+# Parâmetros com esses nomes nunca aparecem no log, nem o tamanho
+_SENSITIVE = re.compile(r"senha|password|hash|token|secret|email", re.IGNORECASE)
+# Só esses comandos aceitam EXPLAIN nos dois bancos
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+_VERB = re.compile(r"\s*(\w+)")
+_MAX_STATEMENT = 4000
+_MAX_FINGERPRINTS = 10_000
+
+
+def redact(name: Optional[str], value: Any) -> Any:
+    """
+    Valor de parâmetro seguro para o log: números, booleanos, datas e None
+    como estão (úteis para reproduzir o plano); textos e binários viram só
+    o tipo e o tamanho; nomes sensíveis viram "***".
+    """
+    if name and _SENSITIVE.search(name):
+        return "***"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any, context=None) -> Any:
+    """Parâmetros de uma execução, por nome quando o compilado os conhece"""
+    if isinstance(parameters, dict):
+        return {name: redact(name, value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        names = getattr(getattr(context, "compiled", None), "positiontup", None)
+        if names and len(names) == len(parameters):
+            return {name: redact(name, value) for name, value in zip(names, parameters)}
+        return [redact(None, value) for value in parameters]
+    return None
+
+
+def explain(conn, statement: str, parameters: Any) -> Tuple[List[str], Optional[str]]:
+    """
+    Plano da consulta na mesma conexão (enxerga a transação em andamento).
+    Usa um cursor DBAPI próprio para não disparar os eventos do engine.
+    """
+    verb = _VERB.match(statement)
+    if verb is None or verb.group(1).upper() not in _EXPLAINABLE:
+        return [], None
+    dialect = conn.dialect.name
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            # Linhas (id, parent, notused, detail): indentar pela árvore, como o shell do sqlite
+            depth, plan = {}, []
+            for node, parent, _, detail in cursor.fetchall():
+                depth[node] = depth.get(parent, -1) + 1
+                plan.append("  " * depth[node] + detail)
+            return plan, None
+        if dialect == "postgresql":
+            # Um EXPLAIN com erro abortaria a transação da requisição
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                return [row[0] for row in cursor.fetchall()], None
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            finally:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return [], f"EXPLAIN não suportado para {dialect}"
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Limite por fingerprint: quantas ocorrências ficaram fora do log desde a última"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: Dict[str, Tuple[float, int]] = {}
+        self.logged = 0
+        self.suppressed = 0
+
+    def admit(self, fp: str) -> Optional[int]:
+        """None se a fingerprint já foi logada no intervalo; senão, as suprimidas"""
+        now = time.monotonic()
+        with self._lock:
+            last, skipped = self._last.get(fp, (None, 0))
+            if last is not None and now - last < SLOW_QUERY_LOG_INTERVAL:
+                self._last[fp] = (last, skipped + 1)
+                self.suppressed += 1
+                return None
+            if len(self._last) >= _MAX_FINGERPRINTS:
+                self._last.clear()
+            self._last[fp] = (now, 0)
+            self.logged += 1
+            return skipped
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last.clear()
+            self.logged = self.suppressed = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": SLOW_QUERY_MS,
+                "explain": SLOW_QUERY_EXPLAIN,
+                "log_interval": SLOW_QUERY_LOG_INTERVAL,
+                "logged": self.logged,
+                "suppressed": self.suppressed,
+                "fingerprints": len(self._last),
+            }
+
+
+slow_queries = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._slow_query_started
+    if SLOW_QUERY_MS < 0 or elapsed * 1000 < SLOW_QUERY_MS:
+        return
+    fp = fingerprint(statement)
+    skipped = slow_queries.admit(fp)
+    if skipped is None:
+        return
+    try:
+        # executemany: um conjunto de parâmetros basta para o plano e o exemplo
+        sample = parameters[0] if executemany and parameters else parameters
+        plan, explain_error = explain(conn, statement, sample) if SLOW_QUERY_EXPLAIN else ([], None)
+        route = current_route()
+        data = {
+            "duration_ms": round(elapsed * 1000, 2),
+            "route": route,
+            "fingerprint": fp[:_MAX_STATEMENT],
+            "statement": statement[:_MAX_STATEMENT],
+            "parameters": redact_parameters(sample, context),
+            "executemany": len(parameters) if executemany else None,
+            "plan": plan,
+            "suppressed_since_last": skipped,
+        }
+        if explain_error:
+            data["explain_error"] = explain_error
+        log.warning(
+            f"Consulta lenta: {elapsed * 1000:.1f} ms em {route or 'tarefa em segundo plano'}",
+            extra={"data": data}
+        )
+    except Exception as e:
+        # O log nunca pode derrubar a consulta que já executou
+        log.error(f"Erro ao registrar consulta lenta: {e}", exc_info=True)
+
+
+def instrument(engine: Engine) -> None:
+    """Registrar no engine os listeners do log de consultas lentas"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,161 @@
+# utils/standings.py - Manutenção da classificação materializada (tabela standing)
+
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models.player import Player
+from models.match import Match
+from models.standing import Standing
+from logger import get_logger
+
+log = get_logger("standings")
+
+
+def new_standing(player: Player) -> Standing:
+    """Criar linha de classificação zerada para um jogador recém-criado."""
+    return Standing(
+        event_id=player.event_id,
+        player_id=player.id,
+        wins=0,
+        losses=0,
+        matches=0,
+        elo=player.initial_elo if player.initial_elo is not None else 1600.0
+    )
+
+
+def load_standings(session: Session, event_id: int, player_ids: Iterable[int]) -> Dict[int, Standing]:
+    """
+    Carregar as linhas de classificação dos jogadores em uma única query.
+
+    Se algum jogador ainda não tiver linha (dados anteriores à tabela
+    standing), a classificação do evento inteiro é reconstruída a partir
+    das partidas antes de retornar.
+    """
+    ids = set(player_ids)
+    rows = session.query(Standing).filter(Standing.player_id.in_(ids)).all()
+    standings = {s.player_id: s for s in rows}
+
+    if len(standings) < len(ids):
+        rebuild_event_standings(session, event_id)
+        rows = session.query(Standing).filter(Standing.player_id.in_(ids)).all()
+        standings = {s.player_id: s for s in rows}
+
+    return standings
+
+
+def record_match(
+    standings: Dict[int, Standing],
+    player_1_id: int,
+    player_2_id: int,
+    winner_id: Optional[int],
+    sign: int = 1
+) -> None:
+    """
+    Contabilizar (sign=1) ou descontar (sign=-1) uma partida na classificação.
+
+    Atualiza partidas disputadas de ambos e vitória/derrota se houver vencedor.
+    """
+    for player_id in (player_1_id, player_2_id):
+        standings[player_id].matches += sign
+
+    if winner_id is not None:
+        loser_id = player_2_id if winner_id == player_1_id else player_1_id
+        standings[winner_id].wins += sign
+        standings[loser_id].losses += sign
+
+
+def sync_elo(standings: Dict[int, Standing], players: Iterable[Player]) -> None:
+    """Copiar o Elo atual dos jogadores para a classificação."""
+    for player in players:
+        standings[player.id].elo = player.initial_elo
+
+
+def standing_row(standing: Standing, name: str, club: Optional[str]) -> dict:
+    """Linha da classificação no formato do ranking (sem a posição)."""
+    return {
+        "player_id": standing.player_id,
+        "name": name,
+        "club": club,
+        "elo": round(standing.elo, 1),
+        "victories": standing.wins,
+        "matches": standing.matches,
+        "win_percentage": round((standing.wins / standing.matches) * 100, 1) if standing.matches > 0 else 0
+    }
+
+
+def standing_rows(session: Session, event_id: int, player_ids: Iterable[int]) -> List[dict]:
+    """Linhas da classificação de alguns jogadores do evento, em uma query."""
+    rows = session.query(Standing, Player.name, Player.club).join(
+        Player, Player.id == Standing.player_id
+    ).filter(
+        Standing.event_id == event_id, Standing.player_id.in_(set(player_ids))
+    ).order_by(Standing.player_id).all()
+    return [standing_row(s, name, club) for s, name, club in rows]
+
+
+def remove_standing(session: Session, player_id: int) -> None:
+    """Remover a linha de classificação de um jogador excluído."""
+    session.query(Standing).filter(Standing.player_id == player_id).delete(synchronize_session=False)
+
+
+def rebuild_event_standings(session: Session, event_id: int) -> None:
+    """
+    Reconstruir a classificação de um evento a partir das partidas.
+
+    Usa agregações GROUP BY (uma por coluna) em vez de percorrer as
+    partidas em Python. Não faz commit.
+    """
+    players = session.query(Player).filter(Player.event_id == event_id).all()
+
+    def _count(column, *criteria):
+        rows = session.query(column, func.count(Match.id)).filter(
+            Match.event_id == event_id, *criteria
+        ).group_by(column).all()
+        return dict(rows)
+
+    wins = _count(Match.winner_id, Match.winner_id.isnot(None))
+    as_p1 = _count(Match.player_1_id)
+    as_p2 = _count(Match.player_2_id)
+    rated_p1 = _count(Match.player_1_id, Match.winner_id.isnot(None))
+    rated_p2 = _count(Match.player_2_id, Match.winner_id.isnot(None))
+
+    session.query(Standing).filter(Standing.event_id == event_id).delete(synchronize_session=False)
+
+    for p in players:
+        rated = rated_p1.get(p.id, 0) + rated_p2.get(p.id, 0)
+        session.add(Standing(
+            event_id=event_id,
+            player_id=p.id,
+            wins=wins.get(p.id, 0),
+            losses=rated - wins.get(p.id, 0),
+            matches=as_p1.get(p.id, 0) + as_p2.get(p.id, 0),
+            elo=p.initial_elo
+        ))
+
+    session.flush()
+    log.info(f"Classificação reconstruída para evento {event_id}: {len(players)} jogadores")
+
+
+def backfill_missing_standings(session: Session) -> int:
+    """
+    Reconstruir a classificação dos eventos que têm jogadores sem linha.
+
+    Executado na inicialização para bancos criados antes da tabela standing.
+    Retorna o número de eventos reconstruídos.
+    """
+    event_ids = [
+        row[0] for row in session.query(Player.event_id).outerjoin(
+            Standing, Standing.player_id == Player.id
+        ).filter(
+            Standing.id.is_(None),
+            Player.event_id.isnot(None)
+        ).distinct().all()
+    ]
+
+    for event_id in event_ids:
+        rebuild_event_standings(session, event_id)
+
+    if event_ids:
+        session.commit()
+
+    return len(event_ids)
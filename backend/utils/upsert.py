@@ -0,0 +1,37 @@
+# utils/upsert.py - INSERT ... ON CONFLICT portável (PostgreSQL e SQLite)
+
+from typing import Optional, Sequence
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_ignore(session: Session, model, values: dict, conflict_columns: Sequence[str]) -> Optional[int]:
+    """
+    Inserir uma linha com ON CONFLICT DO NOTHING em uma única instrução.
+
+    Substitui o padrão "consultar e depois inserir", que tem condição de
+    corrida entre requisições concorrentes. Exige um índice único nas
+    colunas de conflito.
+
+    Args:
+        session: Sessão ativa (não faz commit)
+        model: Classe do model (precisa de coluna id)
+        values: Valores da nova linha
+        conflict_columns: Colunas do índice único
+
+    Returns:
+        id da linha inserida, ou None se ela já existia
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"ON CONFLICT não suportado para o banco {dialect}")
+
+    stmt = _INSERTS[dialect](model).values(**values).on_conflict_do_nothing(
+        index_elements=list(conflict_columns)
+    ).returning(model.id)
+    return session.execute(stmt).scalar()